@@ -0,0 +1,464 @@
+# -*- coding: utf-8 -*-
+"""
+跨會議待辦事項追蹤
+
+依會議日期讀入歷次會議記錄的待辦事項，正規化負責人 / 期限 / 任務內容後，
+與上一次會議仍未結案的事項做模糊比對：
+- 本週出現且能對應到上週事項 → carried_over（延續）
+- 本週新出現 → new
+- 上週有、本週沒有 → closed（於本週結案）
+
+比對使用預先建立的詞彙倒排索引（中文二字組 + 英數字詞，與 minutes_index 相同），
+每個事項只與共用至少一個詞的未結案事項計算相似度，
+整體耗時約與事項總數成正比，數百次會議也能快速完成。
+
+支援的輸入：
+- 會議記錄 .docx（二 待辦事項 段落或表格）
+- {"meeting_minutes": {...}} JSON（section_two_todos）
+- meeting_pm_system 的 AI 輸出 JSON（action_items）
+
+用法：
+    python action_tracker.py 會議記錄資料夾/
+    python action_tracker.py 會議記錄資料夾/ minutes_2026/ --all --json tracker.json
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import sys
+import unicodedata
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from minutes_index import extract_records, meeting_date_from_filename, parse_meeting_date, tokenize
+
+# 相似度（Dice 係數）門檻；負責人相同時另加 OWNER_BONUS
+MATCH_THRESHOLD = 0.6
+OWNER_BONUS = 0.1
+
+# 未結案事項多於 MIN_POSTING_LIMIT 時，出現在超過 MAX_POSTING_RATIO 比例事項中的詞
+# 不用來找候選（如「完成」「提供」），避免常見詞讓候選數量退化成全部事項
+MIN_POSTING_LIMIT = 32
+MAX_POSTING_RATIO = 0.5
+
+# 「(負責人: X)」「(負責：X / 期限：Y)」「(Owner: X, Due: Y)」
+_OWNER_DUE_RE = re.compile(
+    r"\s*[（(]\s*(?:負責人?|owner)\s*[:：]\s*(?P<owner>.+?)"
+    r"(?:\s*[/,，;；]\s*(?:期限|due)\s*[:：]\s*(?P<due>.+?))?\s*[）)]\s*$",
+    re.IGNORECASE,
+)
+# 句尾不含數字的短括號，如「（NSL Ben、設備廠商）」
+_TRAILING_OWNER_RE = re.compile(r"\s*[（(](?P<owner>[^（()）\d]{1,30})[）)]\s*[。.]?\s*$")
+# 「12/31 前」「11/28前」
+_DUE_BEFORE_RE = re.compile(r"(\d{1,2}\s*[/／]\s*\d{1,2})\s*前")
+_ENUMERATOR_RE = re.compile(r"^\s*(?:\d+[.、．)）]|[-•●*])\s*")
+_SPACE_RE = re.compile(r"\s+")
+
+# 表格標題列與代表「沒有待辦事項」的內容
+_HEADER_ROW_RE = re.compile(r"^負責人.*\|.*任務", re.IGNORECASE)
+_EMPTY_ITEMS = {"無", "none", "n/a", "-"}
+
+
+@dataclass
+class ActionItem:
+    """單次會議中的一筆待辦事項"""
+    meeting_date: str
+    source: str
+    task: str
+    owner: str = ""
+    due: str = ""
+    raw: str = ""
+    tokens: Set[str] = field(default_factory=set, repr=False)
+
+
+@dataclass
+class TrackedItem:
+    """跨會議追蹤的待辦事項"""
+    id: str
+    task: str
+    owner: str
+    due: str
+    first_seen: str
+    last_seen: str
+    status: str = "new"           # new / carried_over / closed
+    closed_on: Optional[str] = None
+    meetings: List[str] = field(default_factory=list)
+    tokens: Set[str] = field(default_factory=set, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop("tokens")
+        return data
+
+
+# ============ 正規化 ============
+
+def normalize_owner(owner: str) -> str:
+    """負責人正規化：全形轉半形、合併空白、英文轉小寫（作為比對用的 key）"""
+    owner = _SPACE_RE.sub(" ", unicodedata.normalize("NFKC", owner)).strip(" ，,、。")
+    return owner.casefold()
+
+
+def match_tokens(text: str) -> Set[str]:
+    """比對用詞彙：去除純數字（日期、期數每週都會變動）"""
+    return {token for token in tokenize(text) if not token.isdigit()}
+
+
+def parse_action_item(text: str, meeting_date: str = "", source: str = "",
+                      owner: str = "") -> Optional[ActionItem]:
+    """
+    解析一行待辦事項
+
+    Args:
+        text: 原始文字（如「報告動線計畫 (負責：搬遷團隊 / 期限：12/13)」）
+        meeting_date: 會議日期（YYYY-MM-DD）
+        source: 來源檔案
+        owner: 已知的負責人（表格或 JSON 欄位）；未提供時從文字中解析
+
+    Returns:
+        ActionItem；空白、「無」或只是分類標題（以冒號結尾）時回傳 None
+    """
+    raw = text.strip()
+    task = _ENUMERATOR_RE.sub("", raw).strip()
+    if not task or task.casefold() in _EMPTY_ITEMS or task.endswith((":", "：")):
+        return None
+
+    due = ""
+    match = _OWNER_DUE_RE.search(task)
+    if match:
+        owner = owner or match.group("owner")
+        due = (match.group("due") or "").strip()
+        task = task[:match.start()].strip()
+    else:
+        match = _TRAILING_OWNER_RE.search(task)
+        if match:
+            owner = owner or match.group("owner")
+            task = task[:match.start()].strip()
+
+    if not due:
+        match = _DUE_BEFORE_RE.search(task)
+        if match:
+            due = match.group(1)
+
+    task = _SPACE_RE.sub(" ", task).rstrip("。. ")
+    if not task:
+        return None
+    return ActionItem(
+        meeting_date=meeting_date,
+        source=source,
+        task=task,
+        owner=_SPACE_RE.sub(" ", owner).strip(" ，,、。"),
+        due=due,
+        raw=raw,
+        tokens=match_tokens(_DUE_BEFORE_RE.sub("", task)),
+    )
+
+
+# ============ 讀取 ============
+
+def _json_field(data: Dict[str, Any], key: str, kind: type, default: Any) -> Any:
+    """
+    Raises:
+        ValueError: 欄位型別不符
+    """
+    value = data.get(key)
+    if value is None:
+        return default
+    if not isinstance(value, kind):
+        raise ValueError(f"{key} 格式不符（{type(value).__name__}）")
+    return value
+
+
+def _items_from_json(data: Dict[str, Any], path: str) -> Tuple[str, List[ActionItem]]:
+    """
+    Raises:
+        ValueError: 不是會議記錄 JSON（meeting_minutes 或分析輸出的 meeting_info / action_items），
+            或欄位格式不符
+    """
+    if not isinstance(data, dict) or not ({"meeting_minutes", "meeting_info", "action_items"} & data.keys()):
+        raise ValueError("不是會議記錄 JSON")
+    items = []
+    if "meeting_minutes" in data:
+        minutes = _json_field(data, "meeting_minutes", dict, {})
+        metadata = _json_field(minutes, "metadata", dict, {})
+        meeting_date = parse_meeting_date(str(metadata.get("date", "")))
+        meeting_date = meeting_date or meeting_date_from_filename(path) or ""
+        records = _json_field(minutes, "discussion_records", dict, {})
+        for todo in _json_field(records, "section_two_todos", list, []):
+            # 待辦可以是 {"task", "owner"} 或單純的文字
+            if isinstance(todo, str):
+                item = parse_action_item(todo, meeting_date, path)
+            elif isinstance(todo, dict):
+                item = parse_action_item(str(todo.get("task") or ""), meeting_date, path,
+                                         str(todo.get("owner") or ""))
+            else:
+                raise ValueError(f"section_two_todos 項目格式不符（{type(todo).__name__}）")
+            if item:
+                items.append(item)
+    else:
+        info = _json_field(data, "meeting_info", dict, {})
+        meeting_date = parse_meeting_date(str(info.get("date_time", "")))
+        meeting_date = meeting_date or meeting_date_from_filename(path) or ""
+        for line in _json_field(data, "action_items", list, []):
+            if not isinstance(line, str):
+                raise ValueError(f"action_items 項目格式不符（{type(line).__name__}）")
+            item = parse_action_item(line, meeting_date, path)
+            if item:
+                items.append(item)
+    return meeting_date, items
+
+
+def load_meeting(path: str) -> Tuple[str, List[ActionItem]]:
+    """
+    讀取單次會議的待辦事項
+
+    Returns:
+        (會議日期, 待辦事項列表)；無法判斷日期時日期為空字串
+
+    Raises:
+        ValueError: 無法讀取的 docx，或不是會議記錄的 JSON
+    """
+    if path.lower().endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            return _items_from_json(json.load(f), path)
+
+    _, meeting_date, records, error = extract_records(path)
+    if error:
+        raise ValueError(f"無法讀取 {path}：{error}")
+    meeting_date = meeting_date or ""
+    items = []
+    for record in records:
+        if record["section"] != "待辦事項":
+            continue
+        text, owner = record["text"], ""
+        if " | " in text:
+            # convert_json_to_word 版面的表格列：負責人 | 任務內容
+            if _HEADER_ROW_RE.match(text):
+                continue
+            owner, _, text = text.partition(" | ")
+        item = parse_action_item(text, meeting_date, path, owner)
+        if item:
+            items.append(item)
+    return meeting_date, items
+
+
+def collect_paths(sources: Iterable[str]) -> List[str]:
+    """展開資料夾（*.docx 與 *.json，略過 ~$ 暫存檔）"""
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            for pattern in ("*.docx", "*.json"):
+                paths.extend(
+                    path for path in glob.glob(os.path.join(source, pattern))
+                    if not os.path.basename(path).startswith("~$")
+                )
+        else:
+            paths.append(source)
+    return paths
+
+
+# ============ 追蹤 ============
+
+def dice(a: Set[str], b: Set[str], shared: int) -> float:
+    return 2 * shared / (len(a) + len(b)) if a or b else 0.0
+
+
+class ActionTracker:
+    """
+    依會議順序追蹤待辦事項
+
+    open_items 為目前仍未結案的事項；postings 為其詞彙倒排索引，
+    只在事項開啟 / 結案時增刪，每次會議不需要重建。
+    """
+
+    def __init__(self, threshold: float = MATCH_THRESHOLD):
+        self.threshold = threshold
+        self.items: List[TrackedItem] = []
+        self.open_items: Dict[str, TrackedItem] = {}
+        self.postings: Dict[str, Set[str]] = defaultdict(set)
+        self.history: List[Dict[str, Any]] = []
+
+    def _open(self, item: ActionItem, meeting_date: str) -> TrackedItem:
+        tracked = TrackedItem(
+            id=f"A{len(self.items) + 1:04d}",
+            task=item.task,
+            owner=item.owner,
+            due=item.due,
+            first_seen=meeting_date,
+            last_seen=meeting_date,
+            meetings=[meeting_date],
+            tokens=set(item.tokens),
+        )
+        self.items.append(tracked)
+        self.open_items[tracked.id] = tracked
+        for token in tracked.tokens:
+            self.postings[token].add(tracked.id)
+        return tracked
+
+    def _unindex(self, tracked: TrackedItem, tokens: Iterable[str]) -> None:
+        for token in tokens:
+            ids = self.postings[token]
+            ids.discard(tracked.id)
+            if not ids:
+                del self.postings[token]
+
+    def _close(self, tracked: TrackedItem, meeting_date: str) -> None:
+        tracked.status = "closed"
+        tracked.closed_on = meeting_date
+        del self.open_items[tracked.id]
+        self._unindex(tracked, tracked.tokens)
+
+    def _carry(self, tracked: TrackedItem, item: ActionItem, meeting_date: str) -> None:
+        """延續事項改用本次的寫法，下次會議以最新的文字比對"""
+        tracked.status = "carried_over"
+        tracked.task = item.task
+        tracked.last_seen = meeting_date
+        tracked.meetings.append(meeting_date)
+        tracked.due = item.due or tracked.due
+        tracked.owner = item.owner or tracked.owner
+        if item.tokens != tracked.tokens:
+            self._unindex(tracked, tracked.tokens - item.tokens)
+            for token in item.tokens - tracked.tokens:
+                self.postings[token].add(tracked.id)
+            tracked.tokens = set(item.tokens)
+
+    def _candidates(self, item: ActionItem) -> Dict[str, int]:
+        """共用詞數：item_id → 共同詞彙數（略過過於常見的詞）"""
+        limit = max(MIN_POSTING_LIMIT, int(len(self.open_items) * MAX_POSTING_RATIO))
+        shared: Dict[str, int] = defaultdict(int)
+        for token in item.tokens:
+            ids = self.postings.get(token)
+            if ids and len(ids) <= limit:
+                for item_id in ids:
+                    shared[item_id] += 1
+        return shared
+
+    def add_meeting(self, meeting_date: str, items: List[ActionItem]) -> Dict[str, List[TrackedItem]]:
+        """
+        加入一次會議的待辦事項並更新狀態
+
+        Returns:
+            本次會議的差異 {"new", "carried_over", "closed", "assigned"}；
+            assigned 依輸入順序列出每個事項對應的 TrackedItem
+        """
+        # 1. 為每個新事項計算候選分數，再依分數由高到低做一對一配對
+        pairs = []
+        for position, item in enumerate(items):
+            for item_id, shared in self._candidates(item).items():
+                tracked = self.open_items[item_id]
+                score = dice(item.tokens, tracked.tokens, shared)
+                if item.owner and normalize_owner(item.owner) == normalize_owner(tracked.owner):
+                    score += OWNER_BONUS
+                if score >= self.threshold:
+                    pairs.append((score, position, item_id))
+        pairs.sort(key=lambda pair: (-pair[0], pair[1], pair[2]))
+
+        matched: Dict[int, str] = {}
+        used: Set[str] = set()
+        for _, position, item_id in pairs:
+            if position in matched or item_id in used:
+                continue
+            matched[position] = item_id
+            used.add(item_id)
+
+        # 2. 上次仍開啟但本次沒有對應的事項視為結案
+        diff = {"new": [], "carried_over": [], "closed": [], "assigned": []}
+        for item_id in list(self.open_items):
+            if item_id not in used:
+                tracked = self.open_items[item_id]
+                self._close(tracked, meeting_date)
+                diff["closed"].append(tracked)
+
+        # 3. 更新延續的事項，其餘新開
+        for position, item in enumerate(items):
+            item_id = matched.get(position)
+            if item_id is None:
+                tracked = self._open(item, meeting_date)
+                diff["new"].append(tracked)
+                diff["assigned"].append(tracked)
+                continue
+            tracked = self.open_items[item_id]
+            self._carry(tracked, item, meeting_date)
+            diff["carried_over"].append(tracked)
+            diff["assigned"].append(tracked)
+
+        self.history.append({
+            "meeting_date": meeting_date,
+            **{status: [tracked.id for tracked in diff[status]]
+               for status in ("new", "carried_over", "closed")},
+        })
+        return diff
+
+
+def track(meetings: Iterable[Tuple[str, List[ActionItem]]],
+          threshold: float = MATCH_THRESHOLD) -> ActionTracker:
+    """依會議日期排序後逐次加入追蹤器"""
+    tracker = ActionTracker(threshold)
+    for meeting_date, items in sorted(meetings, key=lambda meeting: meeting[0]):
+        tracker.add_meeting(meeting_date, items)
+    return tracker
+
+
+# ============ CLI ============
+
+def _print_diff(entry: Dict[str, Any], tracker: ActionTracker) -> None:
+    by_id = {tracked.id: tracked for tracked in tracker.items}
+    print(f"\n📅 {entry['meeting_date'] or '（未知日期）'}")
+    for status, label in (("new", "🆕 新增"), ("carried_over", "🔁 延續"), ("closed", "✅ 結案")):
+        for item_id in entry[status]:
+            tracked = by_id[item_id]
+            extra = []
+            if tracked.owner:
+                extra.append(f"負責：{tracked.owner}")
+            if tracked.due:
+                extra.append(f"期限：{tracked.due}")
+            if status == "carried_over":
+                extra.append(f"第 {len(tracked.meetings)} 次出現，自 {tracked.first_seen}")
+            suffix = f"（{'，'.join(extra)}）" if extra else ""
+            print(f"  {label} [{item_id}] {tracked.task}{suffix}")
+
+
+def main():
+    sys.stdout.reconfigure(encoding='utf-8')
+
+    parser = argparse.ArgumentParser(description="跨會議待辦事項追蹤")
+    parser.add_argument("sources", nargs="+", help="會議記錄資料夾或檔案（.docx / .json）")
+    parser.add_argument("--threshold", type=float, default=MATCH_THRESHOLD,
+                        help=f"比對門檻（預設：{MATCH_THRESHOLD}）")
+    parser.add_argument("--all", action="store_true", help="列出每次會議的差異（預設只列最近一次）")
+    parser.add_argument("--json", default=None, help="輸出完整追蹤結果 JSON")
+    args = parser.parse_args()
+
+    meetings = []
+    for path in collect_paths(args.sources):
+        try:
+            meeting_date, items = load_meeting(path)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  略過 {path}：{e}")
+            continue
+        if not meeting_date:
+            print(f"⚠️  略過 {path}：無法判斷會議日期")
+            continue
+        meetings.append((meeting_date, items))
+
+    tracker = track(meetings, args.threshold)
+    for entry in (tracker.history if args.all else tracker.history[-1:]):
+        _print_diff(entry, tracker)
+
+    open_count = len(tracker.open_items)
+    print(f"\n📊 {len(tracker.history)} 次會議，共 {len(tracker.items)} 項待辦，"
+          f"未結案 {open_count} 項，已結案 {len(tracker.items) - open_count} 項")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "items": [tracked.to_dict() for tracked in tracker.items],
+                "meetings": tracker.history,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"💾 已輸出 {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+會議記錄資料夾的增量掃描 manifest
+
+每個檔案記錄路徑、大小、修改時間與 SHA-256。再次掃描時：
+- 大小與修改時間都相同 → 視為未變更，不讀取檔案內容
+- 大小或修改時間不同 → 重新計算雜湊；雜湊相同（例如只是被複製或 touch）
+  只更新 metadata，不需要重新擷取
+- 雜湊不同或新出現的檔案 → 需要重新擷取
+- 已不存在的檔案 → 從 manifest 移除
+
+Manifest 可存成 JSON 檔（extract_all.py），也可由呼叫端自行保存
+entries（minutes_index.py 存在 SQLite 的 files 表）。
+"""
+import hashlib
+import json
+import os
+import tempfile
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from docx_extract import find_docx_files
+
+HASH_CHUNK = 1024 * 1024
+
+Entry = Dict[str, Any]
+
+
+def file_digest(path: str) -> str:
+    """以串流方式計算檔案的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@dataclass
+class ScanResult:
+    """一次掃描的差異結果；entries 為掃描後的完整 manifest 內容"""
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    touched: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    entries: Dict[str, Entry] = field(default_factory=dict)
+
+    @property
+    def dirty(self) -> List[str]:
+        """需要重新擷取的檔案（新增 + 內容變更）"""
+        return self.added + self.changed
+
+    def counts(self) -> Dict[str, int]:
+        return {
+            "added": len(self.added),
+            "changed": len(self.changed),
+            "touched": len(self.touched),
+            "unchanged": len(self.unchanged),
+            "removed": len(self.removed),
+        }
+
+
+def scan(paths: List[str], previous: Dict[str, Entry],
+         scope: Optional[str] = None) -> ScanResult:
+    """
+    比對目前檔案與上一次的 manifest
+
+    Args:
+        paths: 目前存在的檔案（絕對路徑）
+        previous: 上一次的 entries（路徑 → {"size", "mtime", "sha256"}）
+        scope: 只有位於此資料夾下的舊 entry 才會因檔案消失而被視為移除；
+               None 表示 previous 全部都在掃描範圍內
+
+    Returns:
+        ScanResult
+    """
+    result = ScanResult()
+    for path in paths:
+        stat = os.stat(path)
+        old = previous.get(path)
+        if old and old["size"] == stat.st_size and old["mtime"] == stat.st_mtime:
+            result.unchanged.append(path)
+            result.entries[path] = old
+            continue
+
+        entry = {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": file_digest(path)}
+        if old is None:
+            result.added.append(path)
+        elif old.get("sha256") == entry["sha256"]:
+            # 內容相同：保留呼叫端附加的欄位，只更新 metadata
+            entry = {**old, **entry}
+            result.touched.append(path)
+        else:
+            result.changed.append(path)
+        result.entries[path] = entry
+
+    prefix = scope.rstrip(os.sep) + os.sep if scope else None
+    for path, entry in previous.items():
+        if path in result.entries:
+            continue
+        if prefix is None or path.startswith(prefix):
+            result.removed.append(path)
+        else:
+            result.entries[path] = entry
+    return result
+
+
+def scan_directory(directory: str, previous: Dict[str, Entry],
+                   pattern: str = "*.docx") -> ScanResult:
+    """掃描資料夾（遞迴，略過 ~$ 暫存檔）並與上一次的 manifest 比對"""
+    root = os.path.abspath(directory)
+    return scan(find_docx_files(root, pattern), previous, scope=root)
+
+
+class Manifest:
+    """
+    以 JSON 檔保存的 manifest
+
+    除了 size / mtime / sha256，呼叫端可在 entry 中附加自己的欄位
+    （例如擷取結果），未變更的檔案會原樣保留這些欄位。
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Entry] = {}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            if data.get("version") == self.VERSION:
+                self.entries = data.get("files", {})
+
+    def scan(self, paths: List[str], scope: Optional[str] = None) -> ScanResult:
+        """比對並以掃描結果取代目前的 entries（需呼叫 save() 才會寫回）"""
+        result = scan(paths, self.entries, scope)
+        self.entries = result.entries
+        return result
+
+    def save(self) -> None:
+        """先寫入暫存檔再原子替換，中斷時不會留下損毀的 manifest"""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".manifest.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": self.VERSION, "files": self.entries}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+跨會議待辦事項追蹤效能與正確率測試
+
+產生模擬的每週待辦事項：每次會議延續部分未結案事項（改寫期限、增減補充說明、
+偶爾更換負責人寫法），其餘結案，並加入新事項。量測不同會議數下的總耗時、
+每次會議耗時，以及延續 / 結案判斷與實際答案相符的比例。
+
+用法：python bench_action_tracker.py [--meetings 100 300 1000] [--seed 7]
+"""
+import argparse
+import random
+import time
+
+from action_tracker import ActionTracker, parse_action_item
+
+VERBS = ["提交", "確認", "協調", "安排", "追蹤", "完成", "報告", "更新", "申請", "測試"]
+OBJECTS = [
+    "機櫃櫃位圖", "動線計畫", "網路切換計畫", "光纖接線表", "WWN LUN 對應表", "防火牆規則",
+    "單元測試檢核表", "整合測試情境", "Site Check 日期", "平台搬遷方法", "零件備品清單",
+    "SAP HANA 上架", "DCIM 驗收", "Storage Zoning", "取號表", "備份還原演練", "Ansible 腳本",
+    "DMZ 區域測試", "Server Farm 測試", "資產管理系統", "電力需求表", "線路品質抽測",
+]
+PLACES = ["是方機房", "文心機房", "新機房", "D 環境", "Q 環境", "P 環境", "Internet 區"]
+OWNERS = ["機房搬遷組 (Jack)", "網路組 (Hank)", "儲存組", "SAP (HW) 組", "文心搬遷組", "NSL Ben", "廠商"]
+EXTRAS = ["", "，並回報進度", "，需與廠商確認", "（含甲乙兩端）", "，本週內完成"]
+
+
+def make_task(rng: random.Random):
+    return {
+        "verb": rng.choice(VERBS),
+        "object": rng.choice(OBJECTS),
+        "place": rng.choice(PLACES),
+        "owner": rng.choice(OWNERS),
+        "extra": rng.choice(EXTRAS),
+    }
+
+
+def render(task, rng: random.Random, week: int) -> str:
+    due = f"{(week % 12) + 1}/{rng.randint(1, 28)}"
+    owner = task["owner"] if rng.random() > 0.1 else task["owner"].upper()
+    text = f"{task['place']}{task['verb']}{task['object']}{task['extra']}"
+    if rng.random() < 0.5:
+        return f"{text} (負責：{owner} / 期限：{due})"
+    return f"{due} 前{text}。 (負責人: {owner})"
+
+
+def simulate(meetings: int, rng: random.Random, open_target: int = 30):
+    """回傳 [(日期, [(truth_id, 文字)...])...]"""
+    schedule = []
+    live = {}
+    next_id = 0
+    for week in range(meetings):
+        for truth_id in list(live):
+            if rng.random() < 0.3:
+                del live[truth_id]
+        while len(live) < open_target + rng.randint(-5, 5):
+            live[next_id] = make_task(rng)
+            next_id += 1
+        date = f"{2025 + week // 52:04d}-W{week % 52 + 1:02d}"
+        schedule.append((date, [(truth_id, render(task, rng, week)) for truth_id, task in live.items()]))
+    return schedule
+
+
+def run(meetings: int, seed: int):
+    rng = random.Random(seed)
+    schedule = simulate(meetings, rng)
+    parsed = [
+        (date, [(truth_id, parse_action_item(text, date)) for truth_id, text in entries])
+        for date, entries in schedule
+    ]
+
+    tracker = ActionTracker()
+    truth_of = {}
+    correct = total = 0
+    start = time.perf_counter()
+    previous = set()
+    for date, entries in parsed:
+        items = [item for _, item in entries]
+        diff = tracker.add_meeting(date, items)
+        current = {truth_id for truth_id, _ in entries}
+        for (truth_id, _), tracked in zip(entries, diff["assigned"]):
+            expected = truth_id in previous
+            actual = tracked.id in truth_of
+            total += 1
+            if expected == actual and (not actual or truth_of[tracked.id] == truth_id):
+                correct += 1
+            truth_of[tracked.id] = truth_id
+        previous = current
+    elapsed = time.perf_counter() - start
+
+    items = sum(len(entries) for _, entries in parsed)
+    print(f"{meetings:>8} {items:>8} {elapsed * 1000:>10.1f} {elapsed / meetings * 1000:>10.3f} "
+          f"{elapsed / items * 1e6:>10.1f} {correct / total:>9.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="待辦事項追蹤效能測試")
+    parser.add_argument("--meetings", type=int, nargs="+", default=[100, 300, 1000])
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'meetings':>8} {'items':>8} {'total ms':>10} {'ms/mtg':>10} {'us/item':>10} {'accuracy':>9}")
+    for meetings in args.meetings:
+        run(meetings, args.seed)
+
+
+if __name__ == "__main__":
+    main()
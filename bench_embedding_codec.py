@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+向量壓縮的召回率與大小測試：維度 × 編碼（float32 / float16 / int8 / pq）
+
+以完整 768 維 float32 的 cosine top-k 為基準，計算各設定的 recall@k，
+並列出每個向量的二進位大小、輸出 JSON 中的大小，以及依 --years、--per-day
+推算的語料總大小。
+
+資料來源：
+- --input twitterhot_prompts_*.json：ETL 輸出的真實向量（需為 float32 完整維度）
+- 未指定時使用合成資料：分群的單位向量，前面的維度變異較大
+  （模擬可截短的嵌入模型，重要資訊集中在前段維度）
+
+降維以截取前 d 維再正規化模擬 output_dimensionality；實際模型的降維輸出
+不完全相同，確定設定前建議以 --input 用真實資料再跑一次。
+
+用法：python bench_embedding_codec.py [--input "twitterhot_prompts_*.json"] [--corpus 5000] [--k 10]
+"""
+import argparse
+import glob
+import json
+import time
+
+import numpy as np
+
+from embedding_codec import ProductQuantizer, decode_embedding, encode_embedding, load_embeddings
+
+DIMS = (768, 512, 256, 128)
+
+
+def synthetic_corpus(n: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    scale = 1 / np.sqrt(np.arange(1, dim + 1))
+    centers = rng.normal(size=(clusters, dim)) * scale
+    vectors = centers[rng.integers(clusters, size=n)] + 0.5 * rng.normal(size=(n, dim)) * scale
+    return normalize(vectors.astype(np.float32))
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ corpus.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def recall(truth: np.ndarray, found: np.ndarray) -> float:
+    hits = sum(len(set(a) & set(b)) for a, b in zip(truth, found))
+    return hits / truth.size
+
+
+def roundtrip(vectors: np.ndarray, codec: str, pq=None):
+    """編碼再解碼，回傳 (解碼後的向量, 平均二進位 bytes, 平均 JSON bytes)"""
+    stored = [encode_embedding(vector, codec, pq) for vector in vectors]
+    decoded = np.stack([decode_embedding(item, pq) for item in stored])
+    json_bytes = np.mean([len(json.dumps(item)) for item in stored])
+    raw_bytes = {
+        "float32": vectors.shape[1] * 4,
+        "float16": vectors.shape[1] * 2,
+        "int8": vectors.shape[1] + 4,
+        "pq": pq.m if pq else 0,
+    }[codec]
+    return decoded, raw_bytes, json_bytes
+
+
+def human(size: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="向量壓縮的召回率與大小測試")
+    parser.add_argument("--input", nargs="*", help="ETL 輸出的 JSON（可用萬用字元）")
+    parser.add_argument("--corpus", type=int, default=5000, help="合成語料的向量數")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--clusters", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--pq-dims", type=int, default=8, help="PQ 每段的維度（m = dim / pq-dims）")
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--per-day", type=int, default=200, help="每天新增的 prompt 數")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.input:
+        paths = sorted({path for pattern in args.input for path in glob.glob(pattern)})
+        corpus = normalize(load_embeddings(paths))
+        print(f"📥 {len(paths)} 個檔案，{len(corpus)} 個 {corpus.shape[1]} 維向量")
+    else:
+        corpus = synthetic_corpus(args.corpus, DIMS[0], args.clusters, args.seed)
+        print(f"合成語料：{len(corpus)} 個 {corpus.shape[1]} 維向量，{args.clusters} 群")
+
+    rng = np.random.default_rng(args.seed + 1)
+    picks = rng.choice(len(corpus), size=min(args.queries, len(corpus)), replace=False)
+    # 查詢為語料中某個 prompt 的變化版本（加上雜訊）
+    queries = normalize(corpus[picks] + 0.05 * rng.normal(size=(len(picks), corpus.shape[1])).astype(np.float32))
+    truth = top_k(corpus, queries, args.k)
+    total_vectors = args.years * 365 * args.per_day
+
+    print(f"\n{'dim':>5} {'codec':<8} {f'recall@{args.k}':>10} {'bytes':>7} {'json':>7} "
+          f"{f'{args.years:g} 年 JSON':>12} {'encode':>8}")
+    for dim in DIMS:
+        if dim > corpus.shape[1]:
+            continue
+        reduced = normalize(corpus[:, :dim])
+        reduced_queries = normalize(queries[:, :dim])
+        for codec in ("float32", "float16", "int8", "pq"):
+            pq = None
+            start = time.perf_counter()
+            if codec == "pq":
+                if dim % args.pq_dims:
+                    continue
+                pq = ProductQuantizer.train(reduced, dim // args.pq_dims, iterations=10, seed=args.seed)
+            decoded, raw_bytes, json_bytes = roundtrip(reduced, codec, pq)
+            elapsed = time.perf_counter() - start
+            found = top_k(decoded, reduced_queries, args.k)
+            print(f"{dim:>5} {codec:<8} {recall(truth, found):>10.3f} {raw_bytes:>7} {json_bytes:>7.0f} "
+                  f"{human(json_bytes * total_vectors):>12} {elapsed:>7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+endpoint_guard 模擬測試：hedged request 與 circuit breaker 對尾延遲的影響
+
+模擬的端點大多數請求很快，但有 --hang-rate 比例的請求卡到 --timeout 秒才失敗；
+第二段模擬端點整段時間故障（每個請求都等到逾時），比較有無 circuit breaker
+處理完所有項目的總時間。所有時間以 --scale 縮放，方便快速執行。
+
+用法：python bench_endpoint_guard.py [--requests 400] [--hang-rate 0.03] [--scale 0.01]
+"""
+import argparse
+import random
+import time
+
+from endpoint_guard import CircuitOpenError, Endpoint, _percentile
+
+
+def make_endpoint_func(rng, fast_median, hang_rate, timeout, down=False):
+    def call(_):
+        if down or rng.random() < hang_rate:
+            time.sleep(timeout)
+            raise TimeoutError("simulated timeout")
+        time.sleep(rng.lognormvariate(0, 0.4) * fast_median)
+        return "ok"
+    return call
+
+
+def run(endpoint, func, requests):
+    timings = []
+    failures = 0
+    for i in range(requests):
+        start = time.perf_counter()
+        try:
+            endpoint.call(func, i)
+        except (TimeoutError, CircuitOpenError):
+            failures += 1
+        timings.append(time.perf_counter() - start)
+    return timings, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="hedged request / circuit breaker 模擬")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--hang-rate", type=float, default=0.03)
+    parser.add_argument("--fast", type=float, default=0.5, help="正常請求的延遲中位數（秒，縮放前）")
+    parser.add_argument("--timeout", type=float, default=30.0, help="卡住請求的逾時（秒，縮放前）")
+    parser.add_argument("--scale", type=float, default=0.01, help="時間縮放比例")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    fast, timeout = args.fast * args.scale, args.timeout * args.scale
+    print(f"偶發卡住（{args.hang_rate:.0%} 請求等到逾時），{args.requests} 個請求，時間縮放 {args.scale}")
+    print(f"{'mode':<10} {'p50':>9} {'p95':>9} {'p99':>9} {'total':>9} {'fail':>6} {'hedged':>7}")
+    for hedge in (False, True):
+        endpoint = Endpoint("sim", hedge=hedge, default_delay=fast * 4, failure_threshold=10 ** 6)
+        func = make_endpoint_func(random.Random(args.seed), fast, args.hang_rate, timeout)
+        timings, failures = run(endpoint, func, args.requests)
+        print(f"{'hedge' if hedge else 'plain':<10} "
+              + " ".join(f"{_percentile(timings, q) / args.scale:>8.2f}s" for q in (0.5, 0.95, 0.99))
+              + f" {sum(timings) / args.scale:>8.0f}s {failures:>6} {endpoint.stats['hedged']:>7}")
+
+    requests = max(20, args.requests // 10)
+    print(f"\n端點整段故障，{requests} 個請求（時間為縮放前）")
+    for threshold, label in ((10 ** 6, "no breaker"), (5, "breaker")):
+        endpoint = Endpoint("sim", hedge=False, failure_threshold=threshold, reset_timeout=timeout * 5)
+        func = make_endpoint_func(random.Random(args.seed), fast, 0, timeout, down=True)
+        timings, failures = run(endpoint, func, requests)
+        print(f"{label:<10} 總時間 {sum(timings) / args.scale:>8.0f}s，失敗 {failures}，"
+              f"直接拒絕 {endpoint.stats['rejected']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+會議摘要流程壓力測試（本機 mock LLM，不需網路）
+
+啟動 mock_llm_server（或使用 --url 指定已在執行的伺服器），以 N 個並行工作
+執行完整流程：upload → analyze_content（模型 + JSON 解碼 / 修復）→ 填入範本並存檔，
+統計各階段耗時的 p50 / p95、吞吐量與失敗數，找出真正的瓶頸。
+
+用法：
+    python bench_meeting_pipeline.py --jobs 40 --concurrency 1 4 16
+    python bench_meeting_pipeline.py --latency-median 0.5 --tokens-per-sec 400 --malformed-rate 0.1
+"""
+import argparse
+import contextlib
+import glob
+import io
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from docx_template import load_template
+from llm_backend import MockHTTPBackend
+from meeting_pm_system import MeetingPMSummarizer, ReportGenerator
+from mock_llm_server import add_config_arguments, config_from_args, start_server
+
+DEFAULT_DIR = os.path.dirname(os.path.abspath(__file__))
+STAGES = ["upload", "analyze", "render", "total"]
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def run_job(agent, template, job_id):
+    timings = {}
+    start = time.perf_counter()
+    video_file = agent.upload_file(f"meeting-{job_id}.mp4")
+    timings["upload"] = time.perf_counter() - start
+
+    mark = time.perf_counter()
+    data = agent.analyze_content(video_file)
+    timings["analyze"] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    ReportGenerator(template).fill_report(data, io.BytesIO())
+    timings["render"] = time.perf_counter() - mark
+    timings["total"] = time.perf_counter() - start
+    return timings
+
+
+def run(base_url, template, jobs, concurrency):
+    backend = MockHTTPBackend(base_url, pool_size=max(concurrency, 1))
+    agent = MeetingPMSummarizer(backend=backend)
+    results, failures = [], 0
+    start = time.perf_counter()
+    # 流程本身的輸出（上傳 / 存檔訊息）在壓力測試中略過
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [pool.submit(run_job, agent, template, i) for i in range(jobs)]
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception:
+                    failures += 1
+    wall = time.perf_counter() - start
+
+    cells = []
+    for stage in STAGES:
+        values = [r[stage] for r in results]
+        cells.append(f"{percentile(values, 0.5) * 1000:>11.0f} {percentile(values, 0.95) * 1000:>11.0f}")
+    print(f"{concurrency:>5} {jobs:>5} {failures:>5} {jobs / wall:>8.2f} " + " ".join(cells))
+    return backend
+
+
+def main():
+    parser = argparse.ArgumentParser(description="會議摘要流程壓力測試（mock LLM）")
+    parser.add_argument("--template", default=None, help="範本 docx（預設使用 repo 內第一份會議摘要）")
+    parser.add_argument("--jobs", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--url", default=None, help="已在執行的 mock 伺服器；未指定時在本程序內啟動")
+    add_config_arguments(parser)
+    parser.set_defaults(latency_median=0.3, tokens_per_sec=2000.0)
+    args = parser.parse_args()
+
+    template_path = args.template or sorted(glob.glob(os.path.join(DEFAULT_DIR, "NSL-*會議摘要.docx")))[0]
+    template = load_template(template_path)
+
+    server = mock = None
+    base_url = args.url
+    if base_url is None:
+        server, mock, base_url = start_server(config_from_args(args))
+
+    header = " ".join(f"{stage + ' p50':>11} {stage + ' p95':>11}" for stage in STAGES)
+    print(f"範本：{os.path.basename(template_path)}（時間單位 ms）")
+    print(f"{'conc':>5} {'jobs':>5} {'fail':>5} {'jobs/s':>8} {header}")
+    try:
+        for concurrency in args.concurrency:
+            backend = run(base_url, template, args.jobs, concurrency)
+        print(backend.report())
+        if mock is not None:
+            stats = mock.stats_dict()
+            print(f"mock：請求 {stats['requests']}，成功 {stats['ok']}，500 {stats['errors']}，"
+                  f"429 {stats['rate_limited']}，逾時 {stats['timeouts']}，截斷 {stats['malformed']}，"
+                  f"最大並行 {stats['max_in_flight']}")
+    finally:
+        if server is not None:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
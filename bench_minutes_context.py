@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+過往會議上下文大小與檢索延遲：貼上完整歷史 vs. 每個分類 top-k
+
+以 repo 內的會議記錄為樣本複製成多年份的每週會議，使用本機 hashing 向量
+（不呼叫 API），比較完整歷史字數與 build_context() 的字數，
+並量測第一次（需計算嵌入）與之後（全部命中快取）的耗時。
+
+用法：python bench_minutes_context.py [會議記錄資料夾] [--years 1 5 10] [--k 2]
+"""
+import argparse
+import datetime
+import glob
+import os
+import tempfile
+import time
+
+from minutes_context import HashingEmbedder, MinutesContextRetriever
+from minutes_index import MinutesIndex, extract_records
+
+DEFAULT_DIR = os.path.dirname(os.path.abspath(__file__))
+QUERY = "儲存設備 WWN LUN 光纖接線表、SAP HANA 上架進度、文心機房第二梯次搬遷"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="過往會議上下文檢索效能測試")
+    parser.add_argument("directory", nargs="?", default=DEFAULT_DIR)
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 5, 10])
+    parser.add_argument("--k", type=int, default=2)
+    args = parser.parse_args()
+
+    samples = []
+    for path in sorted(glob.glob(os.path.join(args.directory, "*.docx"))):
+        _, _, records, error = extract_records(path)
+        if not error and records:
+            samples.append(records)
+    if not samples:
+        raise SystemExit("找不到可用的會議記錄樣本")
+
+    print(f"{'years':>5} {'chunks':>7} {'history chars':>14} {'context chars':>14} "
+          f"{'cold ms':>9} {'warm ms':>9}")
+    for years in args.years:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "bench.sqlite")
+            with MinutesIndex(db_path) as index:
+                day = datetime.date(2025, 1, 1)
+                for i in range(years * 52):
+                    date = (day + datetime.timedelta(weeks=i)).isoformat()
+                    # 每週內容加上週次，避免所有片段內容完全相同
+                    records = [{**r, "text": f"{r['text']}（W{i}）"} for r in samples[i % len(samples)]]
+                    index.replace_file(f"meeting-{date}.docx", date, records, 0, 0.0)
+
+            timings = []
+            for _ in range(2):
+                with MinutesContextRetriever(db_path, HashingEmbedder()) as retriever:
+                    start = time.perf_counter()
+                    context = retriever.build_context(QUERY, args.k)
+                    timings.append((time.perf_counter() - start) * 1000)
+                    history = sum(len(chunk["text"]) for chunk in retriever.vectors.chunks)
+                    chunks = len(retriever.vectors)
+
+            print(f"{years:>5} {chunks:>7} {history:>14} {len(context):>14} "
+                  f"{timings[0]:>9.0f} {timings[1]:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+會議記錄全文索引查詢延遲測試
+
+以 repo 內的會議記錄為樣本，複製成多年份的每週會議（日期依序遞增）寫入索引，
+再量測常見查詢的延遲（p50 / p95 / max）。
+
+用法：python bench_minutes_index.py [會議記錄資料夾] [--years 10] [--repeat 20]
+"""
+import argparse
+import datetime
+import glob
+import os
+import statistics
+import tempfile
+import time
+
+from minutes_index import MinutesIndex, extract_records
+
+DEFAULT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+QUERIES = [
+    ("WWN LUN", {}),
+    ("光纖接線表", {"section": "儲存"}),
+    ("SAP HANA", {}),
+    ("搬遷", {"rank": True}),
+    ("整合測試", {"since": "2030-01-01"}),
+    ("防火牆", {"section": "網路資安"}),
+    ("機", {}),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="會議記錄全文索引效能測試")
+    parser.add_argument("directory", nargs="?", default=DEFAULT_DIR)
+    parser.add_argument("--years", type=int, default=10, help="模擬的會議年數（每週一次）")
+    parser.add_argument("--repeat", type=int, default=20, help="每個查詢重複次數")
+    args = parser.parse_args()
+
+    samples = []
+    for path in sorted(glob.glob(os.path.join(args.directory, "*.docx"))):
+        _, _, records, error = extract_records(path)
+        if not error and records:
+            samples.append(records)
+    if not samples:
+        raise SystemExit("找不到可用的會議記錄樣本")
+
+    meetings = args.years * 52
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.sqlite")
+        with MinutesIndex(db_path) as index:
+            start = time.perf_counter()
+            day = datetime.date(2025, 1, 1)
+            for i in range(meetings):
+                date = (day + datetime.timedelta(weeks=i)).isoformat()
+                index.replace_file(f"meeting-{date}.docx", date, samples[i % len(samples)], 0, 0.0)
+            with index.conn:
+                index.conn.execute("INSERT INTO segments_fts (segments_fts) VALUES ('optimize')")
+            build = time.perf_counter() - start
+
+            summary = index.summary()
+            size_mb = os.path.getsize(db_path) / 1024 / 1024
+            print(f"meetings: {summary['files']}  segments: {summary['segments']}  "
+                  f"db: {size_mb:.1f} MB  build: {build:.2f} s")
+            print(f"{'query':<24} {'hits':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+
+            for query, options in QUERIES:
+                timings = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    results = index.search(query, **options)
+                    timings.append((time.perf_counter() - start) * 1000)
+                timings.sort()
+                p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+                label = query + (" " + ",".join(options) if options else "")
+                print(f"{label:<24} {len(results):>6} {statistics.median(timings):>8.2f} "
+                      f"{p95:>8.2f} {timings[-1]:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
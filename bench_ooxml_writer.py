@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+create_word_from_json 效能測試：python-docx vs. 直接串流 OOXML
+
+以相同的 JSON 產生含 N 列待辦事項、N 項風險與 N 項備註的會議記錄，
+比較耗時與 tracemalloc 峰值記憶體（僅 Python heap，不含 lxml 的 C 配置），
+並確認兩者的 document.xml 完全相同。python-docx 的 add_row 隨列數呈平方成長，
+超過 --max-docx-rows 的列數只量測 OOXML 串流。
+
+用法：python bench_ooxml_writer.py [--rows 10 1000 10000] [--max-docx-rows 1000]
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+from convert_json_to_word import create_word_from_json
+
+
+def make_minutes(rows: int):
+    return {
+        "meeting_minutes": {
+            "title": "技術小組進度會議紀錄（效能測試）",
+            "metadata": {"date": "2025/12/30", "time": "下午2時00分", "location": "會議室"},
+            "attendees": {"technical_team_representatives": ["Troy Tsuei", "Hank Hsieh"]},
+            "discussion_records": {
+                "section_one_key_records": {
+                    "overall_progress_summary": "專案整體進度 43%。",
+                    "sub_sections": {
+                        "storage": {"owner": "Storage Team", "details": [f"細項 {i}" for i in range(rows)]},
+                    },
+                },
+                "section_two_todos": [
+                    {"owner": f"負責組別 {i % 7}", "task": f"第 {i} 項待辦：追蹤 WWN & LUN 資訊"}
+                    for i in range(rows)
+                ],
+                "section_three_risks": [
+                    {"risk_item": f"風險 {i}", "description": "需密切監控是否影響後續梯次。"}
+                    for i in range(rows)
+                ],
+                "section_four_others": [f"備註 {i}" for i in range(rows)],
+            },
+        }
+    }
+
+
+def measure(json_data, path: str, backend: str):
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_word_from_json(json_data, path, backend=backend)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    with zipfile.ZipFile(path) as archive:
+        return elapsed, peak, archive.read("word/document.xml")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="python-docx vs. OOXML 串流輸出效能測試")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--max-docx-rows", type=int, default=1000,
+                        help="python-docx 路徑量測的列數上限（預設：1000）")
+    args = parser.parse_args()
+
+    # 先建立 OOXML 基底套件，避免計入第一次的初始化成本
+    with tempfile.TemporaryDirectory() as tmp:
+        measure(make_minutes(1), os.path.join(tmp, "warmup.docx"), "ooxml")
+
+        print(f"{'rows':>6} {'python-docx (s)':>16} {'ooxml (s)':>10} {'speedup':>8} "
+              f"{'python-docx peak':>17} {'ooxml peak':>11}")
+        for rows in args.rows:
+            json_data = make_minutes(rows)
+            fast, fast_peak, fast_xml = measure(json_data, os.path.join(tmp, "ooxml.docx"), "ooxml")
+            if rows > args.max_docx_rows:
+                print(f"{rows:>6} {'-':>16} {fast:>10.3f} {'-':>8} {'-':>17} {fast_peak / 2**20:>9.1f}MB")
+                continue
+            slow, slow_peak, slow_xml = measure(json_data, os.path.join(tmp, "docx.docx"), "python-docx")
+            if slow_xml != fast_xml:
+                raise AssertionError(f"document.xml 不一致（rows={rows}）")
+            print(f"{rows:>6} {slow:>16.3f} {fast:>10.3f} {slow / fast:>7.1f}x "
+                  f"{slow_peak / 2**20:>15.1f}MB {fast_peak / 2**20:>9.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+CLI 啟動時間測試：各進入點 --help 的耗時與 -X importtime 的最大 import
+
+每個進入點以子程序執行 N 次取中位數（含直譯器啟動；另列 python -c pass 作為基準），
+再以 python -X importtime 列出累計耗時最高的模組，找出拖慢啟動的 import。
+超過 --target（預設 200 ms）時結束碼為 1，可放進 CI 追蹤。
+
+用法：python bench_startup.py [--runs 5] [--target 200] [--top 5]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+DEFAULT_DIR = os.path.dirname(os.path.abspath(__file__))
+ENTRY_POINTS = [
+    ["twitterhot_etl.py", "--help"],
+    ["meeting_pm_system.py", "--help"],
+    ["minutes_service.py", "--help"],
+]
+
+
+def wall_ms(args, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=DEFAULT_DIR, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, check=False)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def import_times(code):
+    """python -X importtime -c code 的 [(模組, 累計 ms)]"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=DEFAULT_DIR, capture_output=True, text=True, check=False)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|")
+        rows.append((name.strip(), int(cumulative_us) / 1000))
+    return rows
+
+
+def top_imports(module, top, startup):
+    """module 的 import 中累計耗時最高者（略過直譯器啟動本身就會載入的模組）"""
+    rows = [row for row in import_times(f"import {module}") if row[0] != module and row[0] not in startup]
+    return sorted(rows, key=lambda row: -row[1])[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI 啟動時間測試")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target", type=float, default=200.0, help="--help 的目標耗時（ms）")
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    baseline = wall_ms(["-c", "pass"], args.runs)
+    startup = {name for name, _ in import_times("pass")}
+    print(f"python -c pass：{baseline:.0f} ms（直譯器基準）\n")
+    print(f"{'entry point':<32} {'ms':>8} {'target':>8}")
+    failed = False
+    for entry in ENTRY_POINTS:
+        ms = wall_ms(entry, args.runs)
+        ok = ms <= args.target
+        failed |= not ok
+        print(f"{' '.join(entry):<32} {ms:>8.0f} {'OK' if ok else 'SLOW':>8}")
+        for name, cumulative in top_imports(entry[0][:-3], args.top, startup):
+            print(f"    {name:<40} {cumulative:>8.1f} ms")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+tag_analytics 效能測試：合成多年的 prompt 標籤，比較向量化統計與逐筆 dict 迴圈
+
+標籤依 Zipf 分布抽樣，最後一週植入一個突然變熱門的標籤，確認 trending 找得到。
+
+用法：python bench_tag_analytics.py [--years 3] [--per-day 200] [--vocab 5000]
+"""
+import argparse
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+
+import tag_analytics as ta
+
+
+def synthetic(years: float, per_day: int, vocab: int, tags_per_item: int, seed: int):
+    rng = np.random.default_rng(seed)
+    n_days = int(years * 365)
+    n_items = n_days * per_day
+    item_dates = np.datetime64("2024-01-01") + np.repeat(np.arange(n_days), per_day)
+    weights = 1 / np.arange(1, vocab + 1) ** 1.1
+    tag_ids = rng.choice(vocab, size=(n_items, tags_per_item), p=weights / weights.sum())
+    names = np.array([f"tag{i}" for i in range(vocab)] + ["trending-tag"])
+    # 最後 7 天有 30% 的項目帶有新標籤
+    last_week = np.flatnonzero(item_dates >= item_dates[-1] - 6)
+    tag_ids[last_week[rng.random(len(last_week)) < 0.3], 0] = vocab
+    parents = np.repeat(np.arange(n_items), tags_per_item)
+    return item_dates, parents, names[tag_ids.ravel()]
+
+
+def naive_daily(item_dates, parents, tags):
+    """對照組：轉成 dict 後逐筆累加（原本 JSON 的處理方式）"""
+    items = defaultdict(set)
+    for parent, tag in zip(parents.tolist(), tags.tolist()):
+        items[parent].add(tag.lower().strip().lstrip("#"))
+    daily = defaultdict(Counter)
+    dates = item_dates.astype(str).tolist()
+    for parent, item_tags in items.items():
+        daily[dates[parent]].update(item_tags)
+    return daily
+
+
+def timed(label, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    print(f"  {label:<28} {time.perf_counter() - start:>8.2f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="tag_analytics 效能測試")
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--per-day", type=int, default=200)
+    parser.add_argument("--vocab", type=int, default=5000)
+    parser.add_argument("--tags-per-item", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-naive", action="store_true", help="不執行逐筆迴圈對照組")
+    args = parser.parse_args()
+
+    item_dates, parents, tags = synthetic(args.years, args.per_day, args.vocab, args.tags_per_item, args.seed)
+    print(f"{len(item_dates)} 個項目、{len(tags)} 個標籤（scipy：{'有' if ta.sparse is not None else '無'}）")
+
+    corpus = timed("build_corpus", ta.build_corpus, item_dates, parents, tags)
+    timed("daily_counts (top 200)", ta.daily_counts, corpus, 200)
+    scores = timed("trending", ta.trending, corpus)
+    timed("cooccurrence (top 200)", ta.cooccurrence, corpus, 200)
+    if not args.skip_naive:
+        timed("對照：dict 逐筆 daily", naive_daily, item_dates, parents, tags)
+
+    best = int(np.argmax(scores))
+    print(f"\n趨勢第一名：{corpus.vocabulary[best]}（分數 {scores[best]:.1f}）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+範本填入效能測試：逐 section 重新掃描 vs. 單次標題索引
+
+用法：python bench_template_fill.py [--sections 10 50 200] [--filler 20]
+"""
+import argparse
+import io
+import re
+import time
+
+from docx import Document
+
+from docx_template import TemplateIndex
+
+
+def build_template(sections: int, filler: int):
+    """建立含 sections 個標題、每個標題後有 filler 個段落的大型範本"""
+    doc = Document()
+    for s in range(sections):
+        doc.add_paragraph(f"區段{s:05d}：")
+        for f in range(filler):
+            doc.add_paragraph(f"範本說明文字 {s}-{f}")
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def legacy_fill_section(doc, header_keyword, content_list):
+    """原本的作法：每個 section 從頭掃描 doc.paragraphs 並重新編譯 regex"""
+    target_idx = -1
+    for i, para in enumerate(doc.paragraphs):
+        clean_text = re.sub(r"[\s：:\[\]]", "", para.text)
+        clean_target = re.sub(r"[\s：:\[\]]", "", header_keyword)
+        if clean_target in clean_text:
+            target_idx = i
+            break
+    if target_idx < 0:
+        return
+    paragraphs = doc.paragraphs
+    insert_point = paragraphs[target_idx + 1] if target_idx + 1 < len(paragraphs) else None
+    for item in content_list:
+        if insert_point:
+            new_p = insert_point.insert_paragraph_before(item)
+            new_p.style = doc.styles['Normal']
+        else:
+            doc.add_paragraph(item)
+
+
+def make_sections(sections: int, lines: int):
+    return [
+        (f"區段{s:05d}", [f"第 {s} 區段內容 {n}" for n in range(lines)])
+        for s in range(sections)
+    ]
+
+
+def run(template_bytes: bytes, sections, use_index: bool) -> float:
+    doc = Document(io.BytesIO(template_bytes))
+    start = time.perf_counter()
+    if use_index:
+        TemplateIndex.from_document(doc).fill_sections(sections)
+    else:
+        for header, content in sections:
+            legacy_fill_section(doc, header, content)
+    elapsed = time.perf_counter() - start
+    return elapsed, [p.text for p in doc.paragraphs]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="範本填入效能測試")
+    parser.add_argument("--sections", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--filler", type=int, default=20, help="每個標題後的範本段落數")
+    parser.add_argument("--lines", type=int, default=5, help="每個 section 填入的行數")
+    args = parser.parse_args()
+
+    print(f"{'sections':>8} {'paragraphs':>10} {'legacy (s)':>11} {'index (s)':>10} {'speedup':>8}")
+    for count in args.sections:
+        template = build_template(count, args.filler)
+        sections = make_sections(count, args.lines)
+        legacy, legacy_text = run(template, sections, use_index=False)
+        indexed, indexed_text = run(template, sections, use_index=True)
+        if legacy_text != indexed_text:
+            raise AssertionError(f"輸出不一致（sections={count}）")
+        print(f"{count:>8} {count * (args.filler + 1):>10} {legacy:>11.3f} {indexed:>10.3f} {legacy / indexed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
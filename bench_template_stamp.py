@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+單份報告產生時間：每次 Document(template_path) vs. CompiledTemplate.stamp()
+
+用法：python bench_template_stamp.py [範本.docx] [--reports 50]
+未指定範本時使用 repo 內的 Final_Meeting_Minutes_Filled.docx。
+"""
+import argparse
+import io
+import os
+import time
+
+from docx import Document
+
+from docx_template import load_template, open_template
+
+DEFAULT_TEMPLATE = os.path.join(os.path.dirname(__file__), "Final_Meeting_Minutes_Filled.docx")
+
+SECTIONS = [
+    ("機房搬遷", ["本週進度：櫃位圖確認中", "下週規劃：Port Mapping 確認"]),
+    ("儲存", ["光纖接線表：待主機端 WWN/LUN"]),
+    ("待辦事項", ["提交完整機櫃櫃位圖 (負責人: 廠商)"]),
+    ("風險管理事項", ["無"]),
+]
+
+
+def render(template) -> bytes:
+    doc, index = open_template(template)
+    index.fill_sections(SECTIONS)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def timed(label: str, template, reports: int) -> float:
+    start = time.perf_counter()
+    for _ in range(reports):
+        render(template)
+    per_report = (time.perf_counter() - start) / reports
+    print(f"{label:<28} {per_report * 1000:8.2f} ms/report")
+    return per_report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="預編譯範本效能測試")
+    parser.add_argument("template", nargs="?", default=DEFAULT_TEMPLATE)
+    parser.add_argument("--reports", type=int, default=50)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    compiled = load_template(args.template)
+    print(f"{'compile (once)':<28} {(time.perf_counter() - start) * 1000:8.2f} ms")
+
+    cold = timed("Document(template_path)", args.template, args.reports)
+    warm = timed("CompiledTemplate.stamp()", compiled, args.reports)
+    print(f"speedup: {cold / warm:.1f}x")
+
+    texts = [
+        [p.text for p in Document(io.BytesIO(render(t))).paragraphs]
+        for t in (args.template, compiled)
+    ]
+    if texts[0] != texts[1]:
+        raise AssertionError("兩種方式輸出內容不一致")
+
+
+if __name__ == "__main__":
+    main()
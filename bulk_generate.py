@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+批次產生會議記錄 Word 檔
+
+輸入可以是：
+- 一個目錄：每個 *.json 檔為一筆 {"meeting_minutes": {...}} 記錄
+- 一個 .jsonl 檔（或 "-" 代表 stdin）：每行一筆記錄
+
+以 process pool 平行輸出 docx，每個檔案先寫入暫存檔再以 os.replace
+原子替換，最後回報處理速度（docs/s）。
+
+用法：
+    python bulk_generate.py minutes_2025/ -o output/ --template 空白會議摘要.docx
+    python bulk_generate.py minutes.jsonl -o output/ --mode word --workers 8
+    python bulk_generate.py minutes.jsonl -o output/ --mode word --backend ooxml
+    python bulk_generate.py minutes.jsonl -o output/ --mode word --profile
+
+--profile 時改在主 process 依序輸出（profiler 看不到 worker process 內部）。
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pipeline_profile import add_profile_argument, profile_output_dir, profiled, stage
+
+MODES = ("template", "word")
+
+# 每個 worker process 各自保留一份已解析的範本
+_worker_template = None
+# word 模式使用的輸出後端（見 convert_json_to_word.BACKENDS）
+_worker_backend = "python-docx"
+
+
+def iter_records(source: str, errors: Optional[List[Tuple[str, str]]] = None
+                 ) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    逐筆讀取會議記錄 JSON
+
+    無法讀取或解析的檔案、JSONL 行，以及不是 JSON 物件的記錄會略過；
+    有傳入 errors 時附加 (位置, 錯誤訊息)。
+
+    Args:
+        source: 目錄、.jsonl 檔路徑，或 "-"（stdin 的 JSONL）
+        errors: 收集略過的記錄
+
+    Yields:
+        (輸出檔名主檔名, 記錄內容)
+    """
+    def skip(location: str, message: str) -> None:
+        print(f"❌ {location}：{message}")
+        if errors is not None:
+            errors.append((location, message))
+
+    def parse(location: str, load) -> Optional[Dict[str, Any]]:
+        try:
+            record = load()
+        except ValueError as e:
+            skip(location, f"{type(e).__name__}: {e}")
+            return None
+        if not isinstance(record, dict):
+            skip(location, f"記錄不是 JSON 物件（{type(record).__name__}）")
+            return None
+        return record
+
+    if os.path.isdir(source):
+        for filename in sorted(os.listdir(source)):
+            if filename.lower().endswith(".json"):
+                path = os.path.join(source, filename)
+                try:
+                    with open(path, encoding="utf-8") as f:
+                        record = parse(path, lambda: json.load(f))
+                except OSError as e:
+                    skip(path, f"{type(e).__name__}: {e}")
+                    continue
+                if record is not None:
+                    yield os.path.splitext(filename)[0], record
+        return
+
+    stream = sys.stdin if source == "-" else open(source, encoding="utf-8")
+    try:
+        seen = set()
+        for lineno, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            record = parse(f"{source}:{lineno}", lambda: json.loads(line))
+            if record is None:
+                continue
+            name = _record_name(record, f"meeting_minutes_{lineno:05d}")
+            if name in seen:
+                name = f"{name}_{lineno:05d}"
+            seen.add(name)
+            yield name, record
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def _record_name(record: Dict[str, Any], fallback: str) -> str:
+    """以會議日期命名（如 meeting_minutes_20251230），沒有日期時使用 fallback"""
+    try:
+        date = str(record["meeting_minutes"]["metadata"]["date"])
+    except (KeyError, TypeError):
+        return fallback
+    digits = re.sub(r"\D", "", date)
+    return f"meeting_minutes_{digits}" if digits else fallback
+
+
+def _init_worker(mode: str, template_path: Optional[str], backend: str) -> None:
+    """Process pool initializer：每個 worker 只解析一次範本"""
+    global _worker_template, _worker_backend
+    _worker_backend = backend
+    if mode == "template":
+        from docx_template import load_template
+        _worker_template = load_template(template_path)
+
+
+def render_record(task: Tuple[str, Dict[str, Any], str, str]) -> Tuple[str, Optional[str]]:
+    """
+    在 worker 中輸出單筆記錄
+
+    Args:
+        task: (檔名主檔名, 記錄, 模式, 輸出目錄)
+
+    Returns:
+        (輸出路徑, 錯誤訊息)；成功時錯誤訊息為 None
+    """
+    name, record, mode, output_dir = task
+    output_path = os.path.join(output_dir, f"{name}.docx")
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}.", suffix=".docx.tmp", dir=output_dir)
+    os.close(fd)
+    try:
+        with stage("render"):
+            if mode == "template":
+                from fill_template_with_json import fill_template_from_json
+                fill_template_from_json(record, _worker_template, tmp_path)
+            else:
+                from convert_json_to_word import create_word_from_json
+                create_word_from_json(record, tmp_path, backend=_worker_backend)
+        os.replace(tmp_path, output_path)
+        return output_path, None
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return output_path, f"{type(e).__name__}: {e}"
+
+
+def generate_bulk(source: str, output_dir: str, mode: str = "template",
+                  template_path: Optional[str] = None,
+                  workers: Optional[int] = None,
+                  backend: str = "python-docx") -> Dict[str, Any]:
+    """
+    批次輸出會議記錄
+
+    Args:
+        source: 目錄、.jsonl 檔或 "-"
+        output_dir: 輸出目錄
+        mode: "template"（填入空白範本）或 "word"（create_word_from_json 版面）
+        template_path: mode 為 "template" 時使用的範本
+        workers: process 數量，預設為 CPU 核心數；0 表示在目前的 process 依序輸出
+        backend: mode 為 "word" 時的輸出後端（"python-docx" 或 "ooxml"）
+
+    Returns:
+        統計資訊（ok、failed、errors、seconds、docs_per_sec）
+    """
+    if mode not in MODES:
+        raise ValueError(f"未知的輸出模式：{mode}")
+    if mode == "template" and not template_path:
+        raise ValueError("template 模式需要指定 --template")
+    os.makedirs(output_dir, exist_ok=True)
+
+    errors = []
+    tasks = ((name, record, mode, output_dir) for name, record in iter_records(source, errors))
+    ok = 0
+
+    start = time.perf_counter()
+    with ExitStack() as stack:
+        if workers == 0:
+            with stage("load_template"):
+                _init_worker(mode, template_path, backend)
+            results = map(render_record, tasks)
+        else:
+            executor = stack.enter_context(ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(mode, template_path, backend),
+            ))
+            results = executor.map(render_record, tasks, chunksize=4)
+        for output_path, error in results:
+            if error:
+                errors.append((output_path, error))
+                print(f"❌ {output_path}：{error}")
+            else:
+                ok += 1
+    elapsed = time.perf_counter() - start
+
+    return {
+        "ok": ok,
+        "failed": len(errors),
+        "errors": errors,
+        "seconds": elapsed,
+        "docs_per_sec": ok / elapsed if elapsed else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="批次產生會議記錄 Word 檔")
+    parser.add_argument("source", help="JSON 目錄、.jsonl 檔，或 - 代表 stdin")
+    parser.add_argument("-o", "--output-dir", required=True, help="輸出目錄")
+    parser.add_argument("--mode", choices=MODES, default="template",
+                        help="template：填入空白範本；word：重新排版（預設：template）")
+    parser.add_argument("--template", default=None, help="空白會議摘要範本 .docx")
+    parser.add_argument("--backend", choices=("python-docx", "ooxml"), default="python-docx",
+                        help="word 模式的輸出後端；ooxml 直接串流 XML，適合長表格")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="process 數量（預設：CPU 核心數；0 表示在目前的 process 依序輸出）")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    profile_dir = profile_output_dir(args)
+    with profiled("bulk_generate", profile_dir):
+        stats = generate_bulk(args.source, args.output_dir, args.mode, args.template,
+                              0 if profile_dir else args.workers, args.backend)
+    print(f"✅ 完成 {stats['ok']} 份，失敗 {stats['failed']} 份，"
+          f"耗時 {stats['seconds']:.2f} 秒（{stats['docs_per_sec']:.1f} docs/s）")
+    sys.exit(1 if stats["failed"] else 0)
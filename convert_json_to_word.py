@@ -1,11 +1,52 @@
 
+import argparse
 import json
 from docx import Document
 from docx.shared import Pt, Inches
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.oxml.ns import qn
 
-def create_word_from_json(json_data, output_path="meeting_minutes.docx"):
+from pipeline_profile import add_profile_argument, profile_output_dir, profiled, stage
+
+# Label -> key mappings shared by both rendering backends
+META_FIELDS = [
+    ("日期 (Date)", "date"),
+    ("時間 (Time)", "time"),
+    ("地點 (Location)", "location"),
+    ("記錄人 (Recorder)", "recorder"),
+    ("散會時間 (Adjournment)", "adjournment_time")
+]
+
+ATTENDEE_GROUPS = [
+    ("南山高層", "nanshan_executives"),
+    ("技術小組", "technical_team_representatives"),
+    ("PM 代表", "pm_representatives"),
+    ("IBM 代表", "ibm_representatives"),
+    ("參與廠商", "participating_vendors")
+]
+
+SUB_SECTIONS = [
+    ("機房搬遷 (Server Room Relocation)", "server_room_relocation"),
+    ("機房服務 (Server Room Services)", "server_room_services"),
+    ("網路與資安 (Network & Security)", "network_and_security"),
+    ("儲存 (Storage)", "storage"),
+    ("SAP (HW)", "sap_hw"),
+    ("文心搬遷 (Wenxin Relocation)", "wenxin_relocation"),
+    ("現代化顧問服務 (Modernization Services)", "modernization_services")
+]
+
+BACKENDS = ("python-docx", "ooxml")
+
+def create_word_from_json(json_data, output_path="meeting_minutes.docx", backend="python-docx"):
+    if backend == "ooxml":
+        # Streams WordprocessingML straight into the zip; same layout, no python-docx objects
+        from ooxml_writer import write_minutes_docx
+        with stage("ooxml"):
+            write_minutes_docx(json_data, output_path)
+        return
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend}")
+
     document = Document()
     
     # Setup styles for Traditional Chinese
@@ -21,22 +62,14 @@ def create_word_from_json(json_data, output_path="meeting_minutes.docx"):
     
     # 2. Metadata Table
     metadata = minutes.get("metadata", {})
-    table = document.add_table(rows=5, cols=2)
+    table = document.add_table(rows=len(META_FIELDS), cols=2)
     table.style = 'Table Grid'
     
     # Map metadata to rows
-    meta_mapping = [
-        ("日期 (Date)", metadata.get("date", "")),
-        ("時間 (Time)", metadata.get("time", "")),
-        ("地點 (Location)", metadata.get("location", "")),
-        ("記錄人 (Recorder)", metadata.get("recorder", "")),
-        ("散會時間 (Adjournment)", metadata.get("adjournment_time", ""))
-    ]
-    
-    for i, (label, value) in enumerate(meta_mapping):
+    for i, (label, key) in enumerate(META_FIELDS):
         row = table.rows[i]
         row.cells[0].text = label
-        row.cells[1].text = value
+        row.cells[1].text = metadata.get(key, "")
         
     document.add_paragraph() # Spacer
 
@@ -44,19 +77,11 @@ def create_word_from_json(json_data, output_path="meeting_minutes.docx"):
     document.add_heading('出席人員 (Attendees)', level=2)
     attendees = minutes.get("attendees", {})
     
-    att_mapping = [
-        ("南山高層", attendees.get("nanshan_executives", [])),
-        ("技術小組", attendees.get("technical_team_representatives", [])),
-        ("PM 代表", attendees.get("pm_representatives", [])),
-        ("IBM 代表", attendees.get("ibm_representatives", [])),
-        ("參與廠商", attendees.get("participating_vendors", []))
-    ]
-    
-    for category, people in att_mapping:
+    for category, key in ATTENDEE_GROUPS:
         p = document.add_paragraph()
         run_label = p.add_run(f"{category}：")
         run_label.bold = True
-        p.add_run(", ".join(people))
+        p.add_run(", ".join(attendees.get(key, [])))
 
     # 4. Discussion Records
     document.add_heading('討論事項 (Discussion Records)', level=2)
@@ -71,17 +96,7 @@ def create_word_from_json(json_data, output_path="meeting_minutes.docx"):
         
     # 4.2 Sub Sections
     sub_sections = section_one.get("sub_sections", {})
-    sub_mapping = [
-        ("機房搬遷 (Server Room Relocation)", "server_room_relocation"),
-        ("機房服務 (Server Room Services)", "server_room_services"),
-        ("網路與資安 (Network & Security)", "network_and_security"),
-        ("儲存 (Storage)", "storage"),
-        ("SAP (HW)", "sap_hw"),
-        ("文心搬遷 (Wenxin Relocation)", "wenxin_relocation"),
-        ("現代化顧問服務 (Modernization Services)", "modernization_services")
-    ]
-    
-    for title, key in sub_mapping:
+    for title, key in SUB_SECTIONS:
         item = sub_sections.get(key, {})
         if item:
             h = document.add_heading(title, level=3)
@@ -127,8 +142,8 @@ def create_word_from_json(json_data, output_path="meeting_minutes.docx"):
     for note in others:
         document.add_paragraph(note, style='List Bullet')
 
-    document.save(output_path)
-    print(f"Word document saved to: {output_path}")
+    with stage("save"):
+        document.save(output_path)
 
 if __name__ == "__main__":
     json_data = {
@@ -288,4 +303,11 @@ if __name__ == "__main__":
         }
       }
     }
-    create_word_from_json(json_data, "c:/Users/hende/Documents/Meeting_update/meeting_minutes_export.docx")
+    parser = argparse.ArgumentParser(description="Render the meeting JSON as a standalone Word document")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    with profiled("convert_json_to_word", profile_output_dir(args)):
+        output_path = "c:/Users/hende/Documents/Meeting_update/meeting_minutes_export.docx"
+        create_word_from_json(json_data, output_path)
+    print(f"Word document saved to: {output_path}")
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+Word 會議摘要範本的標題索引與預編譯範本
+
+範本只掃描一次：每個段落的正規化文字與 XML 元素都記錄在索引中，
+之後所有 section 的標題查找與內容插入都直接使用索引，
+不再為每個 section 重新走訪 doc.paragraphs。
+
+CompiledTemplate 進一步把整份範本只解析一次，之後每份報告只需
+deep copy 已解析的 document.xml，其餘 part 在編譯時壓縮一次後直接沿用。
+"""
+import copy
+import io
+import os
+import re
+import threading
+import zipfile
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from docx import Document
+from docx.enum.style import WD_STYLE_TYPE
+from docx.opc.oxml import serialize_part_xml
+from docx.oxml.ns import qn
+
+# 標題比對時忽略的字元（空白、全形/半形冒號、方括號）
+_HEADER_STRIP_RE = re.compile(r"[\s：:\[\]]")
+
+Section = Tuple[str, List[str]]
+
+
+def normalize_header(text: str) -> str:
+    """將段落文字正規化，作為標題比對用"""
+    return _HEADER_STRIP_RE.sub("", text)
+
+
+class TemplateIndex:
+    """
+    範本段落索引：正規化標題文字 → 段落元素與插入錨點
+
+    插入錨點是標題之後的下一個段落；新內容插在錨點之前，
+    若標題已是最後一個段落則附加在文件結尾。
+    索引只包含建立當下的範本段落，因此已填入的內容不會被誤認為標題。
+    """
+
+    def __init__(self, body, style_id: Optional[str] = None,
+                 texts: Optional[List[str]] = None):
+        """
+        Args:
+            body: 文件的 <w:body> 元素
+            style_id: 新插入段落使用的樣式 ID（None 表示預設樣式）
+            texts: 預先計算好的正規化段落文字（由 CompiledTemplate 提供）
+        """
+        self._body = body
+        self._style_id = style_id
+        self._paragraphs = body.findall(qn("w:p"))
+        if texts is None:
+            texts = [normalize_header(p.text) for p in self._paragraphs]
+        self._texts = texts
+
+    @classmethod
+    def from_document(cls, doc, style: str = "Normal") -> "TemplateIndex":
+        """由 python-docx Document 建立索引"""
+        style_id = doc.part.get_style_id(doc.styles[style], WD_STYLE_TYPE.PARAGRAPH)
+        return cls(doc.element.body, style_id)
+
+    def __len__(self) -> int:
+        return len(self._paragraphs)
+
+    def resolve(self, keywords: Iterable[str]) -> Dict[str, int]:
+        """
+        單次走訪索引，找出每個關鍵字第一個符合的段落位置
+
+        Args:
+            keywords: 標題關鍵字（部分比對，如 "機房搬遷"）
+
+        Returns:
+            關鍵字 → 段落位置；找不到的關鍵字不會出現在結果中
+        """
+        pending = {keyword: normalize_header(keyword) for keyword in keywords}
+        found = {}
+        for i, text in enumerate(self._texts):
+            if not pending:
+                break
+            for keyword, target in list(pending.items()):
+                if target in text:
+                    found[keyword] = i
+                    del pending[keyword]
+        return found
+
+    def find(self, keyword: str) -> int:
+        """回傳符合關鍵字的段落位置，找不到時回傳 -1"""
+        return self.resolve([keyword]).get(keyword, -1)
+
+    def insert_after(self, index: int, lines: Sequence[str]) -> None:
+        """在第 index 個段落之後依序插入 lines"""
+        anchor = None
+        if index + 1 < len(self._paragraphs):
+            anchor = self._paragraphs[index + 1]
+
+        for line in lines:
+            if anchor is not None:
+                new_p = anchor.add_p_before()
+                new_p.style = self._style_id
+            else:
+                new_p = self._body.add_p()
+            if line:
+                new_p.add_r().text = line
+
+    def fill_sections(self, sections: Sequence[Section]) -> List[str]:
+        """
+        一次填入所有 section
+
+        Args:
+            sections: (標題關鍵字, 內容行) 的列表，依序填入
+
+        Returns:
+            範本中找不到的標題關鍵字
+        """
+        found = self.resolve(keyword for keyword, _ in sections)
+        missing = []
+        for keyword, lines in sections:
+            index = found.get(keyword)
+            if index is None:
+                missing.append(keyword)
+                continue
+            self.insert_after(index, lines)
+        return missing
+
+
+class CompiledTemplate:
+    """
+    預編譯範本：解析一次，之後可重複產生多份報告
+
+    保留已解析的 document.xml、段落標題索引與預設樣式 ID；
+    其他 part（styles、numbering、media…）在編譯時先壓縮成一份 zip，
+    存檔時只需複製這份 zip 再附加新的 document.xml。
+    範本本身不會被修改，因此可在長時間執行的程序中跨執行緒共用。
+    """
+
+    def __init__(self, template_path: str, style: str = "Normal"):
+        self.path = template_path
+        doc = Document(template_path)
+        self.style_id = doc.part.get_style_id(doc.styles[style], WD_STYLE_TYPE.PARAGRAPH)
+        self._element = doc.element
+        self._membername = doc.part.partname.membername
+        self._texts = TemplateIndex(doc.element.body, self.style_id)._texts
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(template_path) as source, \
+                zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as static:
+            for info in source.infolist():
+                if info.filename != self._membername:
+                    static.writestr(info, source.read(info))
+        self._static_parts = buffer.getvalue()
+
+    def stamp(self) -> "StampedDocument":
+        """產生一份新的待填文件（deep copy 已解析的 XML）"""
+        return StampedDocument(self, copy.deepcopy(self._element))
+
+
+class StampedDocument:
+    """由 CompiledTemplate 產生的文件，提供 index 與 save()"""
+
+    def __init__(self, template: CompiledTemplate, element):
+        self.template = template
+        self.element = element
+        self.index = TemplateIndex(element.body, template.style_id, template._texts)
+
+    def to_bytes(self) -> bytes:
+        """序列化成 .docx bytes；只有 document.xml 需要重新壓縮"""
+        buffer = io.BytesIO(self.template._static_parts)
+        with zipfile.ZipFile(buffer, "a", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr(self.template._membername, serialize_part_xml(self.element))
+        return buffer.getvalue()
+
+    def save(self, path_or_stream) -> None:
+        """寫出 .docx 至路徑或可寫入的 stream"""
+        data = self.to_bytes()
+        if hasattr(path_or_stream, "write"):
+            path_or_stream.write(data)
+            return
+        with open(path_or_stream, "wb") as f:
+            f.write(data)
+
+
+_template_cache: Dict[str, Tuple[float, CompiledTemplate]] = {}
+_template_cache_lock = threading.Lock()
+
+
+def load_template(template_path: str) -> CompiledTemplate:
+    """
+    取得快取的 CompiledTemplate；範本檔案修改後會自動重新編譯
+
+    Args:
+        template_path: 範本 .docx 路徑
+
+    Returns:
+        CompiledTemplate
+    """
+    key = os.path.abspath(template_path)
+    mtime = os.path.getmtime(key)
+    with _template_cache_lock:
+        cached = _template_cache.get(key)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        template = CompiledTemplate(key)
+        _template_cache[key] = (mtime, template)
+        return template
+
+
+def open_template(template):
+    """
+    開啟範本供填寫
+
+    Args:
+        template: 範本路徑或 CompiledTemplate
+
+    Returns:
+        (文件, TemplateIndex)；文件提供 save()
+    """
+    if isinstance(template, CompiledTemplate):
+        doc = template.stamp()
+        return doc, doc.index
+    doc = Document(template)
+    return doc, TemplateIndex.from_document(doc)
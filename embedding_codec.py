@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+向量嵌入的壓縮儲存：float16、int8（每個向量一個 scale）、product quantization
+
+ETL 原本把 768 維向量以 JSON 浮點數陣列輸出（每維約 20 bytes）。多年的 prompt
+語料累積後，檔案大小主要來自向量。可選的編碼：
+
+    float32  JSON 浮點數陣列（預設，與舊檔相容）
+    float16  半精度，base64                      每維 2 bytes
+    int8     x ≈ q * scale，q ∈ [-127, 127]，base64  每維 1 byte + scale
+    pq       product quantization：切成 m 段，每段以 256 個中心點之一代表，
+             每個向量 m bytes；codebook 另存 .npz，需先以既有語料訓練
+
+非 float32 的編碼輸出為 {"codec": ..., "dim": ..., "data": base64, ...}；
+decode_embedding 兩種格式都接受。搭配 text-embedding-004 的 output_dimensionality
+（較低維度）可再縮小，召回率與大小的取捨見 bench_embedding_codec.py。
+
+訓練 PQ codebook：
+    python embedding_codec.py train-pq twitterhot_prompts_*.json --m 96 -o prompts_pq.npz
+"""
+import argparse
+import base64
+import glob
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from lazy_import import lazy_import
+
+# 第一次編碼時才載入（twitterhot_etl --help 不需要 numpy）
+np = lazy_import("numpy")
+
+CODECS = ("float32", "float16", "int8", "pq")
+
+StoredEmbedding = Union[List[float], Dict[str, Any]]
+
+
+def _b64(array: "np.ndarray") -> str:
+    return base64.b64encode(array.tobytes()).decode("ascii")
+
+
+def _unb64(data: str, dtype) -> "np.ndarray":
+    return np.frombuffer(base64.b64decode(data), dtype=dtype)
+
+
+# ============ Product quantization ============
+
+class ProductQuantizer:
+    """
+    Product quantization codebook
+
+    Args:
+        centroids: shape 為 (m, k, dim // m) 的中心點
+    """
+
+    def __init__(self, centroids: "np.ndarray"):
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.m, self.k, self.dsub = self.centroids.shape
+        self.dim = self.m * self.dsub
+        self.fingerprint = hashlib.sha1(self.centroids.tobytes()).hexdigest()[:12]
+
+    @classmethod
+    def train(cls, vectors: "np.ndarray", m: int, k: int = 256, iterations: int = 20,
+              seed: int = 0) -> "ProductQuantizer":
+        """
+        以 k-means 訓練每一段的中心點
+
+        Args:
+            vectors: shape 為 (n, dim) 的訓練向量，dim 必須能被 m 整除
+            m: 分段數（每個向量編碼為 m bytes）
+            k: 每段中心點數（最多 256；訓練向量較少時自動減少）
+
+        Raises:
+            ValueError: dim 不能被 m 整除或 k 超過 256
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        n, dim = vectors.shape
+        if dim % m:
+            raise ValueError(f"維度 {dim} 不能被分段數 {m} 整除")
+        if k > 256:
+            raise ValueError("每段最多 256 個中心點（以 1 byte 編碼）")
+        k = min(k, n)
+        rng = np.random.default_rng(seed)
+        dsub = dim // m
+        centroids = np.empty((m, k, dsub), dtype=np.float32)
+        for part in range(m):
+            sub = vectors[:, part * dsub:(part + 1) * dsub]
+            center = sub[rng.choice(n, size=k, replace=False)].copy()
+            for _ in range(iterations):
+                assign = _nearest(sub, center)
+                counts = np.bincount(assign, minlength=k)
+                sums = np.zeros_like(center)
+                np.add.at(sums, assign, sub)
+                filled = counts > 0
+                center[filled] = sums[filled] / counts[filled, None]
+                # 空的中心點改放到隨機樣本，避免浪費編碼空間
+                empty = np.flatnonzero(~filled)
+                if len(empty):
+                    center[empty] = sub[rng.choice(n, size=len(empty), replace=False)]
+            centroids[part] = center
+        return cls(centroids)
+
+    def encode(self, vectors: "np.ndarray") -> "np.ndarray":
+        """shape 為 (n, dim) 的向量 → shape 為 (n, m) 的 uint8 編碼"""
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"向量維度 {vectors.shape[1]} 與 codebook 的 {self.dim} 不符")
+        codes = np.empty((len(vectors), self.m), dtype=np.uint8)
+        for part in range(self.m):
+            sub = vectors[:, part * self.dsub:(part + 1) * self.dsub]
+            codes[:, part] = _nearest(sub, self.centroids[part])
+        return codes
+
+    def decode(self, codes: "np.ndarray") -> "np.ndarray":
+        codes = np.atleast_2d(codes)
+        parts = [self.centroids[part][codes[:, part]] for part in range(self.m)]
+        return np.concatenate(parts, axis=1)
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(path, centroids=self.centroids)
+
+    @classmethod
+    def load(cls, path: str) -> "ProductQuantizer":
+        with np.load(path) as data:
+            return cls(data["centroids"])
+
+
+def _nearest(vectors: "np.ndarray", centers: "np.ndarray") -> "np.ndarray":
+    """每個向量最近的中心點索引（平方歐氏距離）"""
+    distances = (
+        (vectors ** 2).sum(axis=1, keepdims=True)
+        - 2 * vectors @ centers.T
+        + (centers ** 2).sum(axis=1)
+    )
+    return distances.argmin(axis=1)
+
+
+# ============ 編碼 / 解碼 ============
+
+def encode_embedding(vector: Sequence[float], codec: str = "float32",
+                     pq: Optional[ProductQuantizer] = None) -> StoredEmbedding:
+    """
+    向量轉為輸出 JSON 的格式
+
+    Args:
+        vector: 向量
+        codec: float32 / float16 / int8 / pq
+        pq: codec 為 pq 時使用的 codebook
+
+    Raises:
+        ValueError: 不支援的 codec，或 pq 沒有 codebook
+    """
+    if codec == "float32":
+        return [float(x) for x in vector]
+    array = np.asarray(vector, dtype=np.float32)
+    stored: Dict[str, Any] = {"codec": codec, "dim": int(array.shape[0])}
+    if codec == "float16":
+        stored["data"] = _b64(array.astype("<f2"))
+    elif codec == "int8":
+        scale = float(np.abs(array).max()) / 127 or 1.0
+        stored["scale"] = scale
+        stored["data"] = _b64(np.clip(np.rint(array / scale), -127, 127).astype(np.int8))
+    elif codec == "pq":
+        if pq is None:
+            raise ValueError("pq 編碼需要 codebook（ProductQuantizer）")
+        stored["codebook"] = pq.fingerprint
+        stored["data"] = _b64(pq.encode(array)[0])
+    else:
+        raise ValueError(f"不支援的向量編碼：{codec}（可用：{', '.join(CODECS)}）")
+    return stored
+
+
+def decode_embedding(stored: StoredEmbedding, pq: Optional[ProductQuantizer] = None) -> "np.ndarray":
+    """
+    輸出 JSON 中的向量（浮點數陣列或編碼後的 dict）轉為 float32 陣列
+
+    Raises:
+        ValueError: pq 編碼但沒有對應的 codebook
+    """
+    if not isinstance(stored, dict):
+        return np.asarray(stored, dtype=np.float32)
+    codec = stored.get("codec")
+    if codec == "float16":
+        return _unb64(stored["data"], "<f2").astype(np.float32)
+    if codec == "int8":
+        return _unb64(stored["data"], np.int8).astype(np.float32) * np.float32(stored["scale"])
+    if codec == "pq":
+        if pq is None or pq.fingerprint != stored.get("codebook"):
+            raise ValueError(f"需要 codebook {stored.get('codebook')} 才能解碼 pq 向量")
+        return pq.decode(_unb64(stored["data"], np.uint8))[0]
+    raise ValueError(f"不支援的向量編碼：{codec}")
+
+
+def load_embeddings(paths: Sequence[str], pq: Optional[ProductQuantizer] = None) -> "np.ndarray":
+    """讀取 ETL 輸出 JSON 中所有非空的向量"""
+    vectors = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for item in json.load(f):
+                if item.get("embedding"):
+                    vectors.append(decode_embedding(item["embedding"], pq))
+    if not vectors:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.stack(vectors)
+
+
+# ============ CLI ============
+
+def main():
+    parser = argparse.ArgumentParser(description="向量嵌入編碼工具")
+    sub = parser.add_subparsers(dest="command", required=True)
+    train = sub.add_parser("train-pq", help="以 ETL 輸出的向量訓練 PQ codebook")
+    train.add_argument("inputs", nargs="+", help="twitterhot_prompts_*.json（可用萬用字元）")
+    train.add_argument("--m", type=int, default=96, help="分段數（每個向量的 bytes）")
+    train.add_argument("--k", type=int, default=256)
+    train.add_argument("--iterations", type=int, default=20)
+    train.add_argument("-o", "--output", default="prompts_pq.npz")
+    args = parser.parse_args()
+
+    paths = sorted({path for pattern in args.inputs for path in glob.glob(pattern)})
+    vectors = load_embeddings(paths)
+    if not len(vectors):
+        parser.error("輸入檔中沒有向量")
+    print(f"📥 {len(paths)} 個檔案，{len(vectors)} 個 {vectors.shape[1]} 維向量")
+    pq = ProductQuantizer.train(vectors, args.m, args.k, args.iterations)
+    pq.save(args.output)
+    print(f"✅ codebook {pq.fingerprint}（m={pq.m}, k={pq.k}）已儲存：{args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+外部端點的尾延遲控制：hedged request 與 circuit breaker
+
+部分 tweet_info 請求會卡到 30 秒逾時才失敗；端點不穩定時，每個項目都要等滿逾時。
+Endpoint 包裝單一端點的呼叫：
+
+- 延遲追蹤：保留最近 WINDOW 次成功呼叫的延遲，計算 p50 / p95 / p99
+- hedged request：超過 p95（樣本不足時為 default_delay）仍未完成，
+  再送出一個相同請求，取先成功者；只用於可重複送出的讀取請求
+- circuit breaker：連續失敗 failure_threshold 次 → open，之後的呼叫直接拋出
+  CircuitOpenError；經過 reset_timeout 秒 → half-open，只放行一個探測請求，
+  成功則恢復（closed），失敗則再 open 一段時間
+
+被 hedge 取代的慢請求無法中途取消，會在背景執行到完成或逾時，延遲仍計入統計。
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+WINDOW = 200
+MIN_SAMPLES = 20
+
+
+class CircuitOpenError(RuntimeError):
+    """端點的 circuit breaker 為 open，未送出請求"""
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CircuitBreaker:
+    """
+    連續失敗計數的 circuit breaker
+
+    Args:
+        failure_threshold: 連續失敗幾次後 open
+        reset_timeout: open 多久後進入 half-open 探測（秒）
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opened = 0
+        self._probing = False
+
+    def allow(self) -> Optional[str]:
+        """
+        是否放行一個請求
+
+        Returns:
+            放行時回傳目前狀態（closed 或 half-open），不放行時回傳 None
+        """
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return CLOSED
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return HALF_OPEN
+            return None
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    self.opened += 1
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+class Endpoint:
+    """
+    單一端點的 hedged 呼叫與 circuit breaker
+
+    Args:
+        name: 端點名稱（報告與錯誤訊息用）
+        hedge: 是否送出 hedged request（只用於可重複送出的請求）
+        default_delay: 延遲樣本不足時的 hedge 等待秒數
+        min_delay: hedge 等待秒數下限
+        failure_threshold: circuit breaker 的連續失敗次數
+        reset_timeout: circuit breaker open 的秒數
+        max_workers: 背景執行請求的執行緒數
+    """
+
+    def __init__(self, name: str, hedge: bool = True, default_delay: float = 3.0, min_delay: float = 0.05,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0, max_workers: int = 16):
+        self.name = name
+        self.hedge = hedge
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"endpoint-{name}")
+        self._lock = threading.Lock()
+        self._latencies: deque = deque(maxlen=WINDOW)
+        self.stats = {"calls": 0, "failures": 0, "hedged": 0, "hedge_wins": 0, "rejected": 0}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def _timed(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        with self._lock:
+            self._latencies.append(time.perf_counter() - start)
+        return result
+
+    def latency(self, q: float) -> Optional[float]:
+        with self._lock:
+            samples = list(self._latencies)
+        return _percentile(samples, q) if samples else None
+
+    def hedge_delay(self) -> float:
+        """送出 hedged request 前的等待秒數：最近延遲的 p95"""
+        with self._lock:
+            samples = list(self._latencies)
+        if len(samples) < MIN_SAMPLES:
+            return self.default_delay
+        return max(self.min_delay, _percentile(samples, 0.95))
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        呼叫端點（端點故障時 func 應拋出例外；單一請求的問題如 HTTP 4xx 應正常回傳，
+        否則會被計為端點失敗而觸發熔斷）
+
+        Raises:
+            CircuitOpenError: circuit breaker 為 open，未送出請求
+            func 的例外：所有請求（含 hedge）都失敗時，拋出第一個請求的例外
+        """
+        state = self.breaker.allow()
+        if state is None:
+            self._count("rejected")
+            raise CircuitOpenError(f"{self.name} 暫時停用（連續失敗，{self.breaker.reset_timeout:.0f} 秒後重新探測）")
+        self._count("calls")
+
+        futures = [self._pool.submit(self._timed, func, *args, **kwargs)]
+        # half-open 的探測請求不 hedge，避免對剛恢復的端點加倍施壓
+        if self.hedge and state == CLOSED:
+            done, _ = wait(futures, timeout=self.hedge_delay())
+            if not done:
+                self._count("hedged")
+                futures.append(self._pool.submit(self._timed, func, *args, **kwargs))
+
+        errors = []
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if len(futures) > 1 and future is futures[1]:
+                        self._count("hedge_wins")
+                    self.breaker.record_success()
+                    return future.result()
+                errors.append((futures.index(future), future.exception()))
+
+        self._count("failures")
+        self.breaker.record_failure()
+        raise min(errors, key=lambda item: item[0])[1]
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        stats.update(
+            state=self.breaker.state,
+            opened=self.breaker.opened,
+            p50_seconds=self.latency(0.5),
+            p95_seconds=self.latency(0.95),
+            p99_seconds=self.latency(0.99),
+        )
+        return stats
+
+    def report(self) -> str:
+        stats = self.summary()
+        line = (f"{self.name}：呼叫 {stats['calls']} 次（失敗 {stats['failures']}），"
+                f"hedge {stats['hedged']} 次（勝出 {stats['hedge_wins']}），"
+                f"熔斷 {stats['opened']} 次、直接拒絕 {stats['rejected']} 次，狀態 {stats['state']}")
+        if stats["p50_seconds"] is not None:
+            line += (f"，延遲 p50 {stats['p50_seconds']:.2f}s / p95 {stats['p95_seconds']:.2f}s"
+                     f" / p99 {stats['p99_seconds']:.2f}s")
+        return line
+
+
+def report(endpoints: Iterable[Endpoint]) -> str:
+    """多個端點的統計"""
+    lines = ["🛡️  端點狀態："]
+    lines.extend(f"  {endpoint.report()}" for endpoint in endpoints)
+    return "\n".join(lines)
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+ETL 排程：依價值排序 tweet，在每次執行的 API 預算內優先處理最有價值的 prompt
+
+原本 main 依列表順序處理 tweets[:limit]，配額用完時花掉的是排在前面的項目，
+不一定是最值得處理的。這裡以列表 API 的 metadata 評分：
+
+- 互動數：likes / retweets / replies / views（對數尺度）
+- 標籤：flat_tags 數量（有分類的 prompt 通常較完整）
+- 作者：追蹤數（有提供時）與作者在本批出現的次數
+- 新鮮度：publish_date 的指數衰減（半衰期 HALF_LIFE_HOURS）
+
+Budget 以請求數與估計 token 數限制每次執行的用量；預算不足時停止，
+已選取但未處理的項目寫入接續檔（carry-over），下次執行時與當天列表合併重新排序，
+超過 MAX_CARRY_DAYS 天的項目捨棄。
+"""
+import json
+import math
+import os
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+# 各項分數的權重
+WEIGHTS = {"engagement": 1.0, "tags": 0.5, "author": 0.3, "freshness": 1.5}
+HALF_LIFE_HOURS = 24.0
+MAX_CARRY_DAYS = 3
+
+# token 估計：英文約 4 字元 / token，中文約 1 字元 / token，取保守值
+CHARS_PER_TOKEN = 2.0
+OUTPUT_TOKENS = 200
+
+ENGAGEMENT_KEYS = {
+    "likes": ("likes", "like_count", "likeCount", "favorite_count", "favorites"),
+    "retweets": ("retweets", "retweet_count", "retweetCount"),
+    "replies": ("replies", "reply_count", "replyCount"),
+    "views": ("views", "view_count", "viewCount", "impressions"),
+}
+# 互動種類的相對價值（views 數量級大得多）
+ENGAGEMENT_WEIGHTS = {"likes": 1.0, "retweets": 2.0, "replies": 1.0, "views": 0.01}
+FOLLOWER_KEYS = ("followers", "followers_count", "followersCount")
+
+
+def _number(value: Any) -> float:
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _first(record: Dict[str, Any], keys: Iterable[str]) -> float:
+    for key in keys:
+        if key in record:
+            return _number(record[key])
+    return 0.0
+
+
+def _author_key(meta: Dict[str, Any]) -> str:
+    author = meta.get("author")
+    if isinstance(author, dict):
+        for key in ("screen_name", "username", "handle", "name", "id"):
+            if author.get(key):
+                return str(author[key])
+        return ""
+    return str(author or "")
+
+
+def parse_time(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    if isinstance(value, (int, float)):
+        # 秒或毫秒的 timestamp
+        return datetime.fromtimestamp(value / 1000 if value > 1e11 else value)
+    try:
+        parsed = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed.astimezone().replace(tzinfo=None) if parsed.tzinfo else parsed
+
+
+# ============ 評分 ============
+
+def engagement_score(meta: Dict[str, Any]) -> float:
+    total = sum(ENGAGEMENT_WEIGHTS[kind] * _first(meta, keys) for kind, keys in ENGAGEMENT_KEYS.items())
+    return math.log1p(total)
+
+
+def freshness_score(meta: Dict[str, Any], now: datetime) -> float:
+    """1.0 為剛發佈，每 HALF_LIFE_HOURS 減半；沒有日期時為 0.5"""
+    published = parse_time(meta.get("publish_date") or meta.get("created_at"))
+    if published is None:
+        return 0.5
+    age_hours = max(0.0, (now - published).total_seconds() / 3600)
+    return 0.5 ** (age_hours / HALF_LIFE_HOURS)
+
+
+def score_items(items: Sequence[Dict[str, Any]], now: Optional[datetime] = None,
+                weights: Optional[Dict[str, float]] = None) -> List[float]:
+    """
+    計算每個 tweet 的優先分數
+
+    Args:
+        items: tweet 列表 API 的項目
+        now: 計算新鮮度的基準時間（預設為現在）
+        weights: 各項權重（預設 WEIGHTS）
+
+    Returns:
+        與 items 對應的分數（越高越優先）
+    """
+    now = now or datetime.now()
+    weights = {**WEIGHTS, **(weights or {})}
+    authors = Counter(_author_key(meta) for meta in items)
+    scores = []
+    for meta in items:
+        author = meta.get("author") if isinstance(meta.get("author"), dict) else {}
+        author_score = math.log1p(_first(author, FOLLOWER_KEYS)) / 10
+        key = _author_key(meta)
+        if key:
+            author_score += math.log1p(authors[key] - 1)
+        tags = meta.get("flat_tags") or []
+        scores.append(
+            weights["engagement"] * engagement_score(meta)
+            + weights["tags"] * min(len(tags), 5) / 5
+            + weights["author"] * author_score
+            + weights["freshness"] * freshness_score(meta, now)
+        )
+    return scores
+
+
+def prioritize(items: Sequence[Dict[str, Any]], now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """依分數由高到低排序（同分維持原順序）"""
+    scores = score_items(items, now)
+    order = sorted(range(len(items)), key=lambda i: -scores[i])
+    return [items[i] for i in order]
+
+
+# ============ 預算 ============
+
+@dataclass
+class Budget:
+    """
+    每次執行的 API 用量上限
+
+    Attributes:
+        max_requests: 模型請求數上限（生成 + 向量嵌入）；None 表示不限
+        max_tokens: 估計 token 數上限；None 表示不限
+    """
+    max_requests: Optional[int] = None
+    max_tokens: Optional[int] = None
+    requests: int = 0
+    tokens: int = 0
+
+    @staticmethod
+    def estimate_tokens(*texts: str, output_tokens: int = OUTPUT_TOKENS) -> int:
+        return int(sum(len(text) for text in texts) / CHARS_PER_TOKEN) + output_tokens
+
+    def can_afford(self, requests: int, tokens: int) -> bool:
+        if self.max_requests is not None and self.requests + requests > self.max_requests:
+            return False
+        if self.max_tokens is not None and self.tokens + tokens > self.max_tokens:
+            return False
+        return True
+
+    def charge(self, requests: int, tokens: int) -> None:
+        self.requests += requests
+        self.tokens += tokens
+
+    def report(self) -> str:
+        def used(value, limit):
+            return f"{value}" if limit is None else f"{value}/{limit}"
+        return (f"💰 預算用量：請求 {used(self.requests, self.max_requests)}，"
+                f"估計 tokens {used(self.tokens, self.max_tokens)}")
+
+
+# ============ 接續檔 ============
+
+@dataclass
+class CarryOver:
+    """
+    未處理項目的接續檔
+
+    Args:
+        path: JSON 檔路徑；內容為 [{"meta": tweet 項目, "carried_at": ISO 時間}]
+    """
+    path: str
+    entries: List[Dict[str, Any]] = field(default_factory=list)
+
+    def load(self, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """讀取仍在有效期限內的項目（tweet metadata）"""
+        now = now or datetime.now()
+        if not os.path.exists(self.path):
+            return []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  接續檔讀取失敗，忽略：{e}")
+            return []
+        self.entries = [
+            entry for entry in entries
+            if isinstance(entry, dict) and isinstance(entry.get("meta"), dict)
+            and (now - (parse_time(entry.get("carried_at")) or now)).days < MAX_CARRY_DAYS
+        ]
+        return [entry["meta"] for entry in self.entries]
+
+    def save(self, items: Sequence[Dict[str, Any]], now: Optional[datetime] = None) -> None:
+        """寫入本次未處理的項目（原本就是接續項目者保留最初的時間）"""
+        now = now or datetime.now()
+        first_seen = {str(entry["meta"].get("id")): entry.get("carried_at") for entry in self.entries}
+        entries = [
+            {"meta": meta, "carried_at": first_seen.get(str(meta.get("id"))) or now.isoformat()}
+            for meta in items
+        ]
+        if not entries:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def merge_items(today: Sequence[Dict[str, Any]], carried: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """合併當天列表與接續項目（同一 ID 以當天列表為準，互動數較新）"""
+    seen = {str(meta.get("id")) for meta in today if meta.get("id")}
+    return list(today) + [meta for meta in carried if meta.get("id") and str(meta["id"]) not in seen]
@@ -1,10 +1,8 @@
-
 import os
-from docx import Document
 import sys
 
-# Reconfigure stdout for utf-8
-sys.stdout.reconfigure(encoding='utf-8')
+from archive_manifest import Manifest
+from docx_extract import iter_blocks
 
 base_dir = r"c:\Users\hende\Desktop\meeting"
 files = {
@@ -13,33 +11,77 @@ files = {
     "Template": "NSL-技術小組進度會議-空白會議摘要.docx"
 }
 
-def read_docx(name, filename):
-    path = os.path.join(base_dir, filename)
-    with open("extracted_content.txt", "a", encoding="utf-8") as f:
-        f.write(f"\n{'='*20} {name} ({filename}) {'='*20}\n")
-        if not os.path.exists(path):
-            f.write("FILE NOT FOUND\n")
-            return
-
-        try:
-            doc = Document(path)
-            f.write(f"Paragraphs: {len(doc.paragraphs)}\n")
-            for i, para in enumerate(doc.paragraphs):
-                if para.text.strip():
-                    f.write(f"[{i}] {para.text}\n")
-            
-            f.write(f"\n--- TABLES ---\n")
-            for i, table in enumerate(doc.tables):
-                f.write(f"Table {i}:\n")
-                for row in table.rows:
-                    row_text = [cell.text.strip() for cell in row.cells]
-                    f.write(str(row_text) + "\n")
-                    
-        except Exception as e:
-            f.write(f"Error reading file: {e}\n")
-
-if os.path.exists("extracted_content.txt"):
-    os.remove("extracted_content.txt")
-
-for name, filename in files.items():
-    read_docx(name, filename)
+OUTPUT_FILE = "extracted_content.txt"
+# Per-file size/mtime/hash plus the rendered text, so unchanged files are not re-read
+MANIFEST_FILE = "extracted_content.manifest.json"
+
+def render_docx(path, blocks=None):
+    """
+    Return (text, ok) for one file; failures are reported but never cached.
+    blocks: already-extracted iter_blocks() output (e.g. from meeting_cli's cache).
+    """
+    try:
+        # Stream paragraphs and table rows; the paragraph count header needs
+        # the whole file, so this file's lines are buffered before writing.
+        paragraphs = []
+        tables = []
+        count = 0
+        for block in (iter_blocks(path) if blocks is None else blocks):
+            if block["type"] == "paragraph":
+                count += 1
+                if block["text"].strip():
+                    paragraphs.append(f"[{block['index']}] {block['text']}\n")
+            else:
+                if block["row"] == 0:
+                    tables.append(f"Table {block['table']}:\n")
+                row_text = [cell.strip() for cell in block["cells"]]
+                tables.append(str(row_text) + "\n")
+
+        return (f"Paragraphs: {count}\n" + "".join(paragraphs)
+                + f"\n--- TABLES ---\n" + "".join(tables)), True
+
+    except Exception as e:
+        return f"Error reading file: {e}\n", False
+
+def read_docx(name, filename, manifest, scan):
+    path = os.path.abspath(os.path.join(base_dir, filename))
+    header = f"\n{'='*20} {name} ({filename}) {'='*20}\n"
+    if not os.path.exists(path):
+        return header + "FILE NOT FOUND\n"
+
+    entry = manifest.entries[path]
+    if path in scan.dirty or "content" not in entry:
+        text, ok = render_docx(path)
+        if ok:
+            entry["content"] = text
+        else:
+            entry.pop("content", None)
+        return header + text
+    return header + entry["content"]
+
+def main():
+    # Reconfigure stdout for utf-8
+    sys.stdout.reconfigure(encoding='utf-8')
+
+    manifest = Manifest(MANIFEST_FILE)
+    existing = [
+        os.path.abspath(os.path.join(base_dir, filename))
+        for filename in files.values()
+        if os.path.exists(os.path.join(base_dir, filename))
+    ]
+    scan = manifest.scan(existing)
+
+    # Build the whole output first and swap it in, instead of deleting and appending
+    sections = [read_docx(name, filename, manifest, scan) for name, filename in files.items()]
+    tmp_output = OUTPUT_FILE + ".tmp"
+    with open(tmp_output, "w", encoding="utf-8") as f:
+        f.writelines(sections)
+    os.replace(tmp_output, OUTPUT_FILE)
+    manifest.save()
+
+    counts = scan.counts()
+    print(f"Extracted {len(scan.dirty)} file(s), reused {counts['unchanged'] + counts['touched']}, "
+          f"dropped {counts['removed']} -> {OUTPUT_FILE}")
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,11 @@
 
+import argparse
 import json
 import os
-from docx import Document
 from docx.shared import Pt
-import re
+
+from docx_template import open_template
+from pipeline_profile import add_profile_argument, profile_output_dir, profiled, stage
 
 # 1. Input Data (Provided by User)
 json_data = {
@@ -166,112 +168,59 @@ json_data = {
 
 class TemplateReportGenerator:
     def __init__(self, template_path):
-        self.doc = Document(template_path)
+        # template_path may also be a pre-parsed docx_template.CompiledTemplate.
+        # Headers are indexed once instead of rescanning paragraphs per section.
+        self.doc, self.index = open_template(template_path)
 
     def fill_section(self, header_keyword, content_list):
         """
         Finds the paragraph containing header_keyword and inserts content_list after it.
         """
-        target_found = False
-        target_idx = -1
-        
-        # 1. Find the header paragraph index
-        for i, para in enumerate(self.doc.paragraphs):
-            # Normalize text for matching (remove spaces, colons)
-            clean_text = re.sub(r"[\s：:\[\]]", "", para.text)
-            clean_target = re.sub(r"[\s：:\[\]]", "", header_keyword)
-            
-            if clean_target in clean_text:
-                target_idx = i
-                target_found = True
-                break
-        
-        if not target_found:
-            print(f"Warning: Header '{header_keyword}' not found in template.")
-            return
-
-        # 2. Insert Content
-        # We need to insert *after* the header.
-        # Since python-docx allows insert_paragraph_before, we target the *next* paragraph.
-        # If header is the last paragraph, we append.
-        
-        if not content_list:
-            content_list = ["無"]
+        self.fill_sections([(header_keyword, content_list)])
 
-        insert_point = None
-        if target_idx + 1 < len(self.doc.paragraphs):
-            insert_point = self.doc.paragraphs[target_idx + 1]
-        
-        # Reverse list to keep order correct when using insert_before repeatedly? 
-        # No, if we iterate normal order and insert_before the SAME 'insert_point', the order will be reversed in doc.
-        # So we should iterate content in REVERSE order if we always insert before the SAME element.
-        # OR we update 'insert_point' to be the newly created paragraph? No, that inserts before the new one, reversing again.
-        
-        # Correct Logic:
-        # P_header
-        # P_next (insert_point)
-        #
-        # Action: Insert "Item 1" before P_next.
-        # Result:
-        # P_header
-        # Item 1
-        # P_next
-        #
-        # Action: Insert "Item 2" before P_next.
-        # Result:
-        # P_header
-        # Item 1
-        # Item 2
-        # P_next
-        
-        # So standard iteration works perfectly!
-        
-        for item in content_list:
-            text = item
-            if insert_point:
-                new_p = insert_point.insert_paragraph_before(text)
-                new_p.style = self.doc.styles['Normal']
-            else:
-                self.doc.add_paragraph(text)
+    def fill_sections(self, sections):
+        """
+        Fills every (header_keyword, content_list) pair in a single pass over the index.
+        """
+        # Content is inserted before the paragraph following the header,
+        # so iterating in normal order keeps the items in order.
+        missing = self.index.fill_sections(
+            [(header, content_list or ["無"]) for header, content_list in sections]
+        )
+        for header_keyword in missing:
+            print(f"Warning: Header '{header_keyword}' not found in template.")
 
     def save(self, path):
         self.doc.save(path)
 
 
-def main():
-    template_path = r"c:\Users\hende\Desktop\meeting\NSL-技術小組進度會議-空白會議摘要.docx"
-    output_path = r"c:\Users\hende\Documents\Meeting_update\Final_Meeting_Minutes_Filled.docx"
-    
-    if not os.path.exists(template_path):
-        print(f"Error: Template not found at {template_path}")
-        return
+# Template header keyword -> key under section_one_key_records.sub_sections
+SUB_SECTION_HEADERS = {
+    "機房搬遷": "server_room_relocation",
+    "機房服務": "server_room_services",
+    "網路、資安": "network_and_security",
+    "儲存": "storage",
+    "SAP": "sap_hw", # Keyword might need check, maybe "SAP(HW)"
+    "文心機房搬遷": "wenxin_relocation",
+    "現代化顧問服務": "modernization_services",
+}
 
-    generator = TemplateReportGenerator(template_path)
-    
-    # --- Prepare Content List from JSON ---
+
+def sections_from_json(json_data):
+    """
+    Converts a meeting_minutes JSON dict into (header_keyword, content_list) pairs.
+    """
     minutes = json_data["meeting_minutes"]
-    discussions = minutes["discussion_records"]
-    section_one = discussions["section_one_key_records"]["sub_sections"]
+    discussions = minutes.get("discussion_records", {})
+    section_one = discussions.get("section_one_key_records", {}).get("sub_sections", {})
     
     # 1. Main Sections (Sub-sections of Key Records)
     # The template probably has headers like "一、重點紀錄" -> "1. 機房搬遷"
-    
-    mapping = {
-        "機房搬遷": section_one["server_room_relocation"]["details"],
-        "機房服務": section_one["server_room_services"]["details"],
-        "網路、資安": section_one["network_and_security"]["details"],
-        "儲存": section_one["storage"]["details"],
-        "SAP": section_one["sap_hw"]["details"], # Keyword might need check, maybe "SAP(HW)"
-        "文心機房搬遷": section_one["wenxin_relocation"]["details"],
-        "現代化顧問服務": section_one["modernization_services"]["details"],
-    }
-    
-    for header, details in mapping.items():
-        # Prepend Owner info to the first detail or as separate line?
-        # The JSON has owner info. Let's add it.
-        # owner = ... (lookup again)
-        # Assuming details is what we want.
-        generator.fill_section(header, details)
+    # The JSON has owner info. Assuming details is what we want.
+    sections = [
+        (header, section_one.get(key, {}).get("details", []))
+        for header, key in SUB_SECTION_HEADERS.items()
+    ]
 
     # 2. Action Items
     todos = discussions.get("section_two_todos", [])
@@ -279,7 +228,7 @@ def main():
     for todo in todos:
         todo_lines.append(f"{todo.get('task')} (負責人: {todo.get('owner')})")
     
-    generator.fill_section("待辦事項", todo_lines) # Keyword "二、待辦事項" or just "待辦事項"
+    sections.append(("待辦事項", todo_lines)) # Keyword "二、待辦事項" or just "待辦事項"
 
     # 3. Risks
     risks = discussions.get("section_three_risks", [])
@@ -287,13 +236,40 @@ def main():
     for risk in risks:
         risk_lines.append(f"[{risk.get('risk_item')}] {risk.get('description')}")
         
-    generator.fill_section("風險管理事項", risk_lines)
+    sections.append(("風險管理事項", risk_lines))
 
     # 4. Others
     others = discussions.get("section_four_others", [])
-    generator.fill_section("其他事項紀錄", others)
+    sections.append(("其他事項紀錄", others))
+    return sections
+
+
+def fill_template_from_json(json_data, template, output_path):
+    """
+    Fills the template (path or CompiledTemplate) with json_data and saves it.
+    """
+    with stage("template"):
+        generator = TemplateReportGenerator(template)
+    with stage("fill"):
+        generator.fill_sections(sections_from_json(json_data))
+    with stage("save"):
+        generator.save(output_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill the blank minutes template with the meeting JSON")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    template_path = r"c:\Users\hende\Desktop\meeting\NSL-技術小組進度會議-空白會議摘要.docx"
+    output_path = r"c:\Users\hende\Documents\Meeting_update\Final_Meeting_Minutes_Filled.docx"
+    
+    if not os.path.exists(template_path):
+        print(f"Error: Template not found at {template_path}")
+        return
 
-    generator.save(output_path)
+    with profiled("fill_template_with_json", profile_output_dir(args)):
+        fill_template_from_json(json_data, template_path, output_path)
     print(f"Document generated at: {output_path}")
 
 if __name__ == "__main__":
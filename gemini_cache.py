@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+Gemini context caching：固定前綴（系統指令、共用參考文件）只上傳並計費一次
+
+以 google.generativeai.caching.CachedContent 建立伺服器端快取，
+本機 registry（JSON 檔）記錄每個前綴的 cache 名稱與到期時間：
+- 未過期 → 直接以 GenerativeModel.from_cached_content 呼叫
+- 即將到期且仍在使用 → 延長 TTL
+- 建立失敗（內容低於模型的最小快取 token 數、模型不支援、權限不足…）
+  → 記錄為暫時無法快取，改走一般呼叫，之後一段時間內不再嘗試
+- 使用快取時伺服器回報找不到 / 已失效 → 移除 registry 記錄，該次改走一般呼叫
+
+每次呼叫記錄 prompt / 快取 token 數與延遲，report() 彙總節省的 token 與時間。
+設定環境變數 GEMINI_CONTEXT_CACHE=0 可完全停用。
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from lazy_import import lazy_import
+
+genai = lazy_import("google.generativeai")
+
+
+def cache_errors() -> tuple:
+    """代表快取本身不可用的錯誤；其他錯誤（如速率限制）照常拋出，不做二次呼叫"""
+    try:
+        from google.api_core import exceptions as api_exceptions
+    except ImportError:
+        return ()
+    return (
+        api_exceptions.NotFound,
+        api_exceptions.PermissionDenied,
+        api_exceptions.InvalidArgument,
+        api_exceptions.FailedPrecondition,
+    )
+
+
+DEFAULT_REGISTRY = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".gemini_context_cache.json")
+DEFAULT_TTL = 3600                # 秒
+REFRESH_WHEN_REMAINING = 0.25     # 剩餘 TTL 低於此比例時延長
+EXPIRY_MARGIN = 60                # 到期前保留的秒數，避免呼叫途中過期
+NEGATIVE_TTL = 6 * 3600           # 建立失敗後多久內不再嘗試
+
+
+def caching_enabled() -> bool:
+    return genai is not None and os.getenv("GEMINI_CONTEXT_CACHE", "1") not in ("0", "false", "off")
+
+
+class ContextCache:
+    """
+    單一模型的 context cache 管理
+
+    Args:
+        model_name: Gemini 模型名稱（如 "gemini-2.5-flash"）
+        ttl: 快取存活秒數
+        registry_path: 本機 registry 檔；None 表示只保存在記憶體
+        label: report() 顯示的名稱
+    """
+
+    def __init__(self, model_name: str, ttl: int = DEFAULT_TTL,
+                 registry_path: Optional[str] = DEFAULT_REGISTRY, label: Optional[str] = None):
+        self.model_name = model_name
+        self.ttl = ttl
+        self.registry_path = registry_path
+        self.label = label or model_name
+        self._lock = threading.Lock()
+        self._registry: Dict[str, Dict[str, Any]] = self._load_registry()
+        self._models: Dict[str, Any] = {}
+        self.calls: List[Dict[str, Any]] = []
+
+    # ---------- registry ----------
+
+    def _load_registry(self) -> Dict[str, Dict[str, Any]]:
+        if not self.registry_path or not os.path.exists(self.registry_path):
+            return {}
+        try:
+            with open(self.registry_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_registry(self) -> None:
+        if not self.registry_path:
+            return
+        now = time.time()
+        # 同一檔案可能由多個 ContextCache 共用：先合併磁碟上的內容，並清掉已過期的記錄
+        merged = {**self._load_registry(), **self._registry}
+        merged = {key: entry for key, entry in merged.items() if entry.get("until", 0) > now}
+        directory = os.path.dirname(os.path.abspath(self.registry_path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".gemini_cache.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(merged, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.registry_path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _key(self, system_instruction: str, contents: Sequence[Any]) -> str:
+        digest = hashlib.sha256()
+        digest.update(self.model_name.encode("utf-8"))
+        digest.update(b"\0" + system_instruction.encode("utf-8"))
+        for item in contents:
+            # 已上傳的檔案以檔名（files/...）識別，文字以內容識別
+            identity = getattr(item, "name", None) or str(item)
+            digest.update(b"\0" + identity.encode("utf-8"))
+        return digest.hexdigest()
+
+    # ---------- 快取 ----------
+
+    def _cached_model(self, key: str, system_instruction: str, contents: Sequence[Any]):
+        """回傳使用快取的 GenerativeModel；無法快取時回傳 None"""
+        now = time.time()
+        with self._lock:
+            entry = self._registry.get(key)
+            if entry and entry.get("uncacheable"):
+                if entry["until"] > now:
+                    return None
+                entry = None
+
+            if entry and entry["until"] - EXPIRY_MARGIN > now:
+                if entry["until"] - now < self.ttl * REFRESH_WHEN_REMAINING:
+                    try:
+                        genai.caching.CachedContent.get(entry["name"]).update(ttl=timedelta(seconds=self.ttl))
+                        entry["until"] = now + self.ttl
+                        self._save_registry()
+                    except cache_errors():
+                        entry = None
+                if entry:
+                    model = self._models.get(key)
+                    if model is None:
+                        model = genai.GenerativeModel.from_cached_content(entry["name"])
+                        self._models[key] = model
+                    return model
+
+            try:
+                cached = genai.caching.CachedContent.create(
+                    model=self.model_name,
+                    display_name=f"{self.label}-{key[:12]}",
+                    system_instruction=system_instruction,
+                    contents=list(contents) or None,
+                    ttl=timedelta(seconds=self.ttl),
+                )
+            except Exception as e:
+                # 最常見的原因是內容低於模型的最小快取 token 數；暫時不再嘗試
+                self._registry[key] = {"uncacheable": True, "until": now + NEGATIVE_TTL,
+                                       "reason": f"{type(e).__name__}: {e}"[:300]}
+                self._save_registry()
+                print(f"ℹ️  [{self.label}] 無法建立 context cache，改用一般呼叫：{type(e).__name__}")
+                return None
+
+            self._registry[key] = {"name": cached.name, "until": now + self.ttl,
+                                   "tokens": getattr(cached.usage_metadata, "total_token_count", None)}
+            self._save_registry()
+            model = genai.GenerativeModel.from_cached_content(cached)
+            self._models[key] = model
+            return model
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._registry.pop(key, None)
+            self._models.pop(key, None)
+            self._save_registry()
+
+    def generate(self, system_instruction: str, parts: Any, fallback: Callable[[], Any],
+                 contents: Sequence[Any] = (), generation_config: Any = None):
+        """
+        以快取的固定前綴呼叫模型
+
+        Args:
+            system_instruction: 固定的系統指令（快取前綴）
+            parts: 每次呼叫不同的內容（不含前綴）
+            fallback: 無法使用快取時的一般呼叫（需包含完整前綴），回傳 response
+            contents: 一併快取的共用參考內容（文字或已上傳的檔案）
+            generation_config: 生成設定
+
+        Returns:
+            模型的 response
+        """
+        model = None
+        key = None
+        if caching_enabled():
+            key = self._key(system_instruction, contents)
+            model = self._cached_model(key, system_instruction, contents)
+
+        if model is not None:
+            start = time.perf_counter()
+            try:
+                response = model.generate_content(parts, generation_config=generation_config)
+            except cache_errors() as e:
+                print(f"⚠️  [{self.label}] context cache 失效，改用一般呼叫：{type(e).__name__}")
+                self.invalidate(key)
+            else:
+                self._record(response, time.perf_counter() - start, cached=True)
+                return response
+
+        start = time.perf_counter()
+        response = fallback()
+        self._record(response, time.perf_counter() - start, cached=False)
+        return response
+
+    # ---------- 統計 ----------
+
+    def _record(self, response: Any, elapsed: float, cached: bool) -> None:
+        usage = getattr(response, "usage_metadata", None)
+        self.calls.append({
+            "cached": cached,
+            "seconds": elapsed,
+            "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+            "cached_tokens": getattr(usage, "cached_content_token_count", 0) or 0,
+        })
+
+    def summary(self) -> Dict[str, Any]:
+        """呼叫次數、prompt / 快取 token 數與平均延遲（快取 vs. 一般）"""
+        cached = [call for call in self.calls if call["cached"]]
+        plain = [call for call in self.calls if not call["cached"]]
+        prompt_tokens = sum(call["prompt_tokens"] for call in self.calls)
+        cached_tokens = sum(call["cached_tokens"] for call in self.calls)
+
+        def mean(calls):
+            return sum(call["seconds"] for call in calls) / len(calls) if calls else None
+
+        return {
+            "calls": len(self.calls),
+            "cached_calls": len(cached),
+            "prompt_tokens": prompt_tokens,
+            "cached_tokens": cached_tokens,
+            "cached_ratio": cached_tokens / prompt_tokens if prompt_tokens else 0.0,
+            "mean_seconds_cached": mean(cached),
+            "mean_seconds_uncached": mean(plain),
+        }
+
+    def report(self) -> str:
+        stats = self.summary()
+        if not stats["calls"]:
+            return f"[{self.label}] 沒有模型呼叫"
+        lines = [
+            f"[{self.label}] 呼叫 {stats['calls']} 次（使用快取 {stats['cached_calls']} 次）",
+            f"  prompt tokens {stats['prompt_tokens']}，其中快取 {stats['cached_tokens']}"
+            f"（{stats['cached_ratio']:.0%} 以快取費率計價）",
+        ]
+        if stats["mean_seconds_cached"] is not None and stats["mean_seconds_uncached"] is not None:
+            saved = stats["mean_seconds_uncached"] - stats["mean_seconds_cached"]
+            lines.append(f"  平均延遲：快取 {stats['mean_seconds_cached']:.2f}s，"
+                         f"一般 {stats['mean_seconds_uncached']:.2f}s（每次節省 {saved:.2f}s）")
+        else:
+            seconds = stats["mean_seconds_cached"] or stats["mean_seconds_uncached"]
+            lines.append(f"  平均延遲 {seconds:.2f}s")
+        return "\n".join(lines)
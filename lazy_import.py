@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+延遲載入大型套件（google-generativeai、requests…）
+
+    genai = lazy_import("google.generativeai")
+
+模組在第一次存取屬性時才真正 import，--help、--test-api 以外的分支、
+模擬模式等用不到 SDK 的路徑不必付出載入成本。套件未安裝時回傳 None，
+與原本 try: import ... except ImportError: X = None 的寫法相容。
+
+注意：google-generativeai 的 import 約需 1 秒，以 python bench_startup.py 追蹤。
+"""
+import importlib.util
+import sys
+from types import ModuleType
+from typing import Optional
+
+
+def lazy_import(name: str) -> Optional[ModuleType]:
+    """
+    延遲載入模組
+
+    Args:
+        name: 模組名稱（可含 .，父套件會立即載入，通常很輕量）
+
+    Returns:
+        延遲載入的模組；已載入時回傳該模組，未安裝時回傳 None
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+    if spec is None or spec.loader is None:
+        return None
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
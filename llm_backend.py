@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+"""
+LLM 後端介面：Gemini 實作與本機 HTTP mock 實作
+
+MeetingPMSummarizer 只透過這個介面呼叫模型：
+- GeminiBackend：google-generativeai，固定前綴走 context cache（gemini_cache）
+- MockHTTPBackend：呼叫 mock_llm_server.py，不需網路與 API Key，
+  用於壓力測試與離線開發
+
+每個後端記錄呼叫次數、延遲、token 數與失敗次數，report() 彙總。
+速率限制、伺服器錯誤與逾時會以指數退避重試（最多 MAX_RETRIES 次）。
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from lazy_import import lazy_import
+
+genai = lazy_import("google.generativeai")
+
+DEFAULT_MOCK_URL = "http://127.0.0.1:8765"
+
+# 值得重試的 HTTP 狀態碼（速率限制、伺服器錯誤、閘道逾時）
+RETRYABLE_STATUS = (429, 500, 503, 504)
+MAX_RETRIES = 2
+RETRY_BACKOFF = 1.0  # 第一次重試前等待的秒數，之後每次加倍
+
+
+class BackendError(RuntimeError):
+    """
+    後端呼叫失敗
+
+    Attributes:
+        status: HTTP 狀態碼（逾時或連線失敗為 None）
+        retryable: 是否值得重試（速率限制、伺服器錯誤、逾時）
+    """
+
+    def __init__(self, message: str, status: Optional[int] = None, retryable: bool = False):
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+
+
+@dataclass
+class UsageMetadata:
+    prompt_token_count: int = 0
+    candidates_token_count: int = 0
+    cached_content_token_count: int = 0
+
+
+@dataclass
+class LLMResponse:
+    """與 google-generativeai 的 response 相容的最小欄位（text、usage_metadata）"""
+    text: str
+    usage_metadata: UsageMetadata
+
+
+@dataclass
+class FileRef:
+    """mock 後端的「已上傳檔案」"""
+    name: str
+    uri: str
+
+
+def is_retryable(error: Exception) -> bool:
+    """BackendError 依 retryable；google-api-core 的錯誤依 HTTP 狀態碼（code）"""
+    if isinstance(error, BackendError):
+        return error.retryable
+    return getattr(error, "code", None) in RETRYABLE_STATUS
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LLMBackend:
+    """
+    後端基底類別
+
+    子類別實作 _generate(parts, generation_config) 與 upload_file(path)。
+    可重試的錯誤（見 is_retryable）最多重試 max_retries 次，等待 retry_backoff 秒起、每次加倍。
+    """
+    name = "base"
+    max_retries = MAX_RETRIES
+    retry_backoff = RETRY_BACKOFF
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls: List[Dict[str, Any]] = []
+        self.retries = 0
+
+    def _generate(self, parts: Sequence[Any], generation_config: Any = None):
+        raise NotImplementedError
+
+    def upload_file(self, path: str):
+        raise NotImplementedError
+
+    def generate(self, parts: Sequence[Any], generation_config: Any = None):
+        """
+        呼叫模型
+
+        Args:
+            parts: prompt 內容（文字或 upload_file() 回傳的檔案）
+            generation_config: 生成設定（dict，如 {"response_mime_type": "application/json"}）
+
+        Returns:
+            具有 text 與 usage_metadata 的 response
+
+        Raises:
+            最後一次嘗試的錯誤（不可重試或已用完重試次數）
+        """
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                response = self._generate(parts, generation_config)
+            except Exception as e:
+                self._record(time.perf_counter() - start, None, error=type(e).__name__)
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                delay = self.retry_backoff * 2 ** attempt
+                print(f"⚠️  [{self.name}] {e}；{delay:.1f}s 後重試（{attempt + 1}/{self.max_retries}）")
+                with self._lock:
+                    self.retries += 1
+                time.sleep(delay)
+            else:
+                self._record(time.perf_counter() - start, response)
+                return response
+
+    def generate_cached(self, system_instruction: str, parts: Sequence[Any],
+                        fallback: Callable[[], Any], contents: Sequence[Any] = (),
+                        generation_config: Any = None):
+        """
+        以固定前綴（system_instruction + contents）呼叫模型；
+        不支援前綴快取的後端直接執行 fallback（需包含完整前綴）
+        """
+        return fallback()
+
+    # ---------- 統計 ----------
+
+    def _record(self, elapsed: float, response: Any, error: Optional[str] = None) -> None:
+        usage = getattr(response, "usage_metadata", None)
+        with self._lock:
+            self.calls.append({
+                "seconds": elapsed,
+                "error": error,
+                "prompt_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+                "output_tokens": getattr(usage, "candidates_token_count", 0) or 0,
+            })
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = list(self.calls)
+        ok = [call["seconds"] for call in calls if not call["error"]]
+        return {
+            "calls": len(calls),
+            "errors": len(calls) - len(ok),
+            "retries": self.retries,
+            "prompt_tokens": sum(call["prompt_tokens"] for call in calls),
+            "output_tokens": sum(call["output_tokens"] for call in calls),
+            "p50_seconds": _percentile(ok, 0.5) if ok else None,
+            "p95_seconds": _percentile(ok, 0.95) if ok else None,
+        }
+
+    def report(self) -> str:
+        stats = self.summary()
+        if not stats["calls"]:
+            return f"[{self.name}] 沒有模型呼叫"
+        line = (f"[{self.name}] 呼叫 {stats['calls']} 次（失敗 {stats['errors']} 次，重試 {stats['retries']} 次），"
+                f"prompt tokens {stats['prompt_tokens']}，輸出 tokens {stats['output_tokens']}")
+        if stats["p50_seconds"] is not None:
+            line += f"，延遲 p50 {stats['p50_seconds']:.2f}s / p95 {stats['p95_seconds']:.2f}s"
+        return line
+
+
+# ============ Gemini ============
+
+class GeminiBackend(LLMBackend):
+    """
+    google-generativeai 後端
+
+    Args:
+        api_key: Gemini API Key
+        model_name: 模型名稱
+        cache_label: context cache 在報告中顯示的名稱
+    """
+    name = "gemini"
+
+    def __init__(self, api_key: str, model_name: str = "gemini-2.5-flash", cache_label: Optional[str] = None):
+        super().__init__()
+        if genai is None:
+            raise ImportError("google-generativeai 未安裝：pip install google-generativeai")
+        if not api_key:
+            raise ValueError("API Key is missing. Please set GEMINI_API_KEY.")
+        from gemini_cache import ContextCache
+
+        genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)
+        self.context_cache = ContextCache(f"models/{model_name}", label=cache_label or model_name)
+
+    def _generate(self, parts, generation_config=None):
+        return self.model.generate_content(list(parts), generation_config=generation_config)
+
+    def generate_cached(self, system_instruction, parts, fallback, contents=(), generation_config=None):
+        start = time.perf_counter()
+        response = self.context_cache.generate(
+            system_instruction, list(parts), fallback,
+            contents=contents, generation_config=generation_config,
+        )
+        if self.context_cache.calls and self.context_cache.calls[-1]["cached"]:
+            # 快取路徑不經過 generate()，在這裡補記錄
+            self._record(time.perf_counter() - start, response)
+        return response
+
+    def upload_file(self, path):
+        print(f"Uploading file: {path}...")
+        video_file = genai.upload_file(path=path)
+        print(f"Completed upload: {video_file.uri}")
+
+        # Wait for processing if it's a video
+        while video_file.state.name == "PROCESSING":
+            print('.', end='', flush=True)
+            time.sleep(10)
+            video_file = genai.get_file(video_file.name)
+
+        if video_file.state.name == "FAILED":
+            raise ValueError(f"Video processing failed: {video_file.state.name}")
+
+        print("Ready.")
+        return video_file
+
+    def report(self):
+        # 呼叫次數 / token / 延遲之外，再附上 context cache 的命中情形
+        if not self.context_cache.calls:
+            return super().report()
+        return f"{super().report()}\n{self.context_cache.report()}"
+
+
+# ============ 本機 mock ============
+
+class MockHTTPBackend(LLMBackend):
+    """
+    mock_llm_server.py 的 HTTP 後端
+
+    Args:
+        base_url: mock 伺服器位址
+        timeout: 單次請求逾時秒數
+        pool_size: 連線池大小（應不小於同時進行的分析數）
+    """
+    name = "mock"
+
+    def __init__(self, base_url: str = DEFAULT_MOCK_URL, timeout: float = 60.0, pool_size: int = 32):
+        super().__init__()
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._requests = requests
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @staticmethod
+    def _serialize(part: Any) -> Dict[str, Any]:
+        if isinstance(part, str):
+            return {"text": part}
+        return {"file": getattr(part, "name", None) or str(part)}
+
+    def _generate(self, parts, generation_config=None):
+        if generation_config is not None and not isinstance(generation_config, dict):
+            generation_config = {"response_mime_type": getattr(generation_config, "response_mime_type", None)}
+        payload = {
+            "parts": [self._serialize(part) for part in parts],
+            "generation_config": generation_config or {},
+        }
+        try:
+            response = self.session.post(f"{self.base_url}/v1/generate", json=payload, timeout=self.timeout)
+        except self._requests.Timeout as e:
+            raise BackendError(f"mock 逾時：{e}", retryable=True) from e
+        except self._requests.ConnectionError as e:
+            raise BackendError(f"無法連線 mock 伺服器 {self.base_url}：{e}", retryable=True) from e
+
+        if response.status_code != 200:
+            raise BackendError(
+                f"mock 回應 HTTP {response.status_code}：{response.text[:200]}",
+                status=response.status_code,
+                retryable=response.status_code in RETRYABLE_STATUS,
+            )
+        body = response.json()
+        usage = body.get("usage", {})
+        return LLMResponse(
+            text=body["text"],
+            usage_metadata=UsageMetadata(
+                prompt_token_count=usage.get("prompt_tokens", 0),
+                candidates_token_count=usage.get("output_tokens", 0),
+            ),
+        )
+
+    def upload_file(self, path):
+        name = f"files/mock-{os.path.basename(path)}"
+        return FileRef(name=name, uri=f"{self.base_url}/{name}")
+
+
+def default_backend(api_key: Optional[str], model_name: str = "gemini-2.5-flash",
+                    cache_label: Optional[str] = None) -> Optional[LLMBackend]:
+    """
+    依環境選擇後端：設定 MOCK_LLM_URL 時使用 mock，否則有 API Key 時使用 Gemini，
+    兩者皆無時回傳 None
+    """
+    mock_url = os.getenv("MOCK_LLM_URL")
+    if mock_url:
+        return MockHTTPBackend(mock_url)
+    if api_key:
+        return GeminiBackend(api_key, model_name, cache_label=cache_label)
+    return None
@@ -0,0 +1,372 @@
+# -*- coding: utf-8 -*-
+"""
+模型 JSON 回應的解碼、修復與 schema 驗證
+
+模型回應常見的小瑕疵（markdown code fence、前後說明文字、結尾多餘逗號、
+輸出被截斷造成的未閉合字串 / 陣列 / 物件）先在本機修復，再依宣告的 schema
+驗證各欄位；只有缺少或型別錯誤的欄位才會重新向模型請求，
+不必為了一個欄位重新產生整份回應。
+
+Schema 以 Python 型別描述：
+    str            → 字串
+    [str]          → 字串陣列
+    {"key": ...}   → 物件（所有 key 皆為必要欄位）
+
+有安裝 orjson 時使用 orjson 解析，否則使用標準函式庫 json。
+"""
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 截斷修復時最多嘗試的截斷點數量
+MAX_REPAIR_ATTEMPTS = 64
+
+_FENCE_RE = re.compile(r"```[a-zA-Z0-9_-]*\s*\n?(.*?)(?:```|$)", re.DOTALL)
+
+Schema = Any
+
+
+# ============ Schema ============
+
+TRANSFORM_SCHEMA: Schema = {
+    "translated_text_zh": str,
+    "tags": [str],
+    "cleaned_text": str,
+}
+
+# 已是繁體中文的 prompt 只需要標籤（見 prompt_language）
+TAGS_SCHEMA: Schema = {
+    "tags": [str],
+}
+
+MINUTES_SCHEMA: Schema = {
+    "meeting_info": {
+        "date_time": str,
+        "location": str,
+        "attendees": str,
+    },
+    "key_records": {
+        "migration": [str],
+        "services": [str],
+        "network_security": [str],
+        "storage": [str],
+        "sap": [str],
+        "wenxin": [str],
+        "modernization": [str],
+    },
+    "action_items": [str],
+    "risk_management": [str],
+    "other_matters": [str],
+}
+
+
+class SchemaError(ValueError):
+    """修復與重新請求後仍有欄位不符合 schema"""
+
+    def __init__(self, invalid: List[str], data: Dict[str, Any]):
+        super().__init__(f"回應缺少或包含無效欄位：{', '.join(invalid)}")
+        self.invalid = invalid
+        self.data = data
+
+
+@dataclass
+class DecodeResult:
+    data: Dict[str, Any]
+    invalid: List[str] = field(default_factory=list)
+    repaired: bool = False
+    refetched: List[str] = field(default_factory=list)
+
+
+# ============ 解析與修復 ============
+
+def _loads(text: str) -> Any:
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def strip_fences(text: str) -> str:
+    """取出 ```json ... ``` 區塊內容（缺少結尾 fence 時取到最後）"""
+    match = _FENCE_RE.search(text)
+    return match.group(1) if match else text
+
+
+def _scan(text: str) -> Tuple[str, List[str], bool, List[Tuple[int, List[str]]]]:
+    """
+    從第一個 { 或 [ 開始掃描，移除結尾多餘的逗號，並在最外層閉合處停止
+
+    Returns:
+        (清理後文字, 未閉合的括號堆疊, 是否停在字串中, 可截斷位置與當時的堆疊)
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    cuts: List[Tuple[int, List[str]]] = []
+    in_string = False
+    escape = False
+    pending_comma = False
+
+    for char in text:
+        if in_string:
+            out.append(char)
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+            continue
+
+        if char.isspace():
+            if stack:
+                out.append(char)
+            continue
+        if not stack and char not in "{[":
+            continue  # 最外層之前的說明文字
+
+        if pending_comma:
+            pending_comma = False
+            if char not in "}]":
+                # 逗號之前是完整的元素：可以在這裡截斷
+                cuts.append((len(out), list(stack)))
+                out.append(",")
+
+        if char == ",":
+            pending_comma = True
+            continue
+        if char in "{[":
+            stack.append("}" if char == "{" else "]")
+            out.append(char)
+            cuts.append((len(out), list(stack)))
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            out.append(char)
+            if not stack:
+                break
+        else:
+            if char == '"':
+                in_string = True
+            out.append(char)
+
+    return "".join(out), stack, in_string, cuts
+
+
+def repair_json(text: str) -> Tuple[Any, bool]:
+    """
+    解析模型輸出的 JSON，必要時修復
+
+    Args:
+        text: 模型回應文字
+
+    Returns:
+        (解析結果, 是否經過修復)
+
+    Raises:
+        ValueError: 無法修復
+    """
+    stripped = text.strip()
+    try:
+        return _loads(stripped), False
+    except ValueError:
+        pass
+
+    cleaned, stack, in_string, cuts = _scan(strip_fences(stripped))
+    if not cleaned:
+        raise ValueError("回應中找不到 JSON 物件")
+
+    candidate = cleaned + ('"' if in_string else "") + "".join(reversed(stack))
+    try:
+        return _loads(candidate), True
+    except ValueError:
+        pass
+
+    # 截斷在元素中間：退回到最近的完整元素，再補上對應的結尾括號
+    for position, cut_stack in reversed(cuts[-MAX_REPAIR_ATTEMPTS:]):
+        candidate = cleaned[:position].rstrip().rstrip(",") + "".join(reversed(cut_stack))
+        try:
+            return _loads(candidate), True
+        except ValueError:
+            continue
+    raise ValueError("無法修復的 JSON 回應")
+
+
+# ============ 驗證 ============
+
+def _coerce(value: Any, schema: Schema, path: str, invalid: List[str]) -> Any:
+    if schema is str:
+        if isinstance(value, str):
+            return value
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+        if isinstance(value, list) and all(isinstance(item, str) for item in value):
+            return ", ".join(value)
+        invalid.append(path)
+        return None
+
+    if isinstance(schema, list):
+        if isinstance(value, str):
+            value = [value]
+        if not isinstance(value, list):
+            invalid.append(path)
+            return None
+        items = []
+        for i, item in enumerate(value):
+            coerced = _coerce(item, schema[0], f"{path}[{i}]", [])
+            if coerced is not None:
+                items.append(coerced)
+        return items
+
+    if isinstance(schema, dict):
+        if not isinstance(value, dict):
+            invalid.append(path)
+            return None
+        result = dict(value)
+        for key, sub_schema in schema.items():
+            sub_path = f"{path}.{key}" if path else key
+            if key not in value or value[key] is None:
+                invalid.append(sub_path)
+                continue
+            coerced = _coerce(value[key], sub_schema, sub_path, invalid)
+            if coerced is not None:
+                result[key] = coerced
+        return result
+
+    raise TypeError(f"不支援的 schema：{schema!r}")
+
+
+def validate(data: Any, schema: Schema) -> Tuple[Any, List[str]]:
+    """
+    依 schema 驗證並做寬鬆的型別轉換（數字 → 字串、單一字串 → 陣列…）
+
+    Returns:
+        (轉換後資料, 缺少或無效的欄位路徑，如 ["key_records.storage"])
+    """
+    invalid: List[str] = []
+    result = _coerce(data, schema, "", invalid)
+    return result, invalid
+
+
+def decode(text: str, schema: Schema) -> DecodeResult:
+    """解析、修復並驗證；無法解析時整份 schema 的頂層欄位都視為無效"""
+    try:
+        data, repaired = repair_json(text)
+    except ValueError:
+        return DecodeResult({}, invalid=list(schema), repaired=False)
+    data, invalid = validate(data, schema)
+    if data is None:
+        return DecodeResult({}, invalid=list(schema), repaired=repaired)
+    return DecodeResult(data, invalid=invalid, repaired=repaired)
+
+
+# ============ 部分重新請求 ============
+
+def _schema_at(schema: Schema, path: str) -> Schema:
+    for key in path.split("."):
+        schema = schema[key]
+    return schema
+
+
+def _example(schema: Schema) -> Any:
+    if schema is str:
+        return "..."
+    if isinstance(schema, list):
+        return [_example(schema[0])]
+    return {key: _example(sub) for key, sub in schema.items()}
+
+
+def sub_schema(schema: Schema, paths: List[str]) -> Dict[str, Any]:
+    """只包含指定欄位的巢狀 schema"""
+    result: Dict[str, Any] = {}
+    for path in paths:
+        keys = path.split(".")
+        node = result
+        for key in keys[:-1]:
+            node = node.setdefault(key, {})
+        node[keys[-1]] = _schema_at(schema, path)
+    return result
+
+
+def field_request(schema: Schema, paths: List[str]) -> str:
+    """重新請求指定欄位的指示文字（附上只含這些欄位的 JSON 結構）"""
+    example = json.dumps(_example(sub_schema(schema, paths)), ensure_ascii=False, indent=2)
+    return (
+        "The previous JSON response was missing or had invalid values for these fields: "
+        f"{', '.join(paths)}.\n"
+        "Return ONLY a JSON object with exactly this structure (no markdown, no extra text):\n"
+        f"{example}"
+    )
+
+
+def _set_path(data: Dict[str, Any], path: str, value: Any) -> None:
+    keys = path.split(".")
+    node = data
+    for key in keys[:-1]:
+        if not isinstance(node.get(key), dict):
+            node[key] = {}
+        node = node[key]
+    node[keys[-1]] = value
+
+
+def _get_path(data: Dict[str, Any], path: str) -> Any:
+    for key in path.split("."):
+        data = data[key]
+    return data
+
+
+def _default(schema: Schema) -> Any:
+    if schema is str:
+        return ""
+    if isinstance(schema, list):
+        return []
+    return {key: _default(sub) for key, sub in schema.items()}
+
+
+def decode_response(text: str, schema: Schema,
+                    refetch: Optional[Callable[[str], str]] = None,
+                    max_rounds: int = 1, fill_defaults: bool = False) -> DecodeResult:
+    """
+    解碼模型回應；無效欄位只重新請求該欄位
+
+    Args:
+        text: 模型回應文字
+        schema: 預期的結構
+        refetch: 接收 field_request() 指示文字、回傳模型新回應文字的函式；None 表示不重新請求
+        max_rounds: 最多重新請求幾輪
+        fill_defaults: 仍無效的欄位以空值填入，而不是拋出 SchemaError
+
+    Returns:
+        DecodeResult（data 為符合 schema 的資料）
+
+    Raises:
+        SchemaError: 仍有無效欄位且 fill_defaults 為 False
+    """
+    result = decode(text, schema)
+    rounds = 0
+    while result.invalid and refetch is not None and rounds < max_rounds:
+        rounds += 1
+        wanted = list(result.invalid)
+        partial = decode(refetch(field_request(schema, wanted)), sub_schema(schema, wanted))
+        still_invalid = set(partial.invalid)
+        for path in wanted:
+            if path in still_invalid:
+                continue
+            try:
+                value = _get_path(partial.data, path)
+            except (KeyError, TypeError):
+                continue
+            _set_path(result.data, path, value)
+            result.refetched.append(path)
+        result.invalid = [path for path in wanted if path not in result.refetched]
+
+    if result.invalid:
+        if not fill_defaults:
+            raise SchemaError(result.invalid, result.data)
+        for path in result.invalid:
+            _set_path(result.data, path, _default(_schema_at(schema, path)))
+    return result
@@ -0,0 +1,412 @@
+# -*- coding: utf-8 -*-
+"""
+會議記錄工具的統一命令列
+
+取代分散的單次腳本（extract_all.py、parse_template.py、read_template.py、
+fill_template_with_json.py、convert_json_to_word.py、meeting_pm_system.py、
+twitterhot_etl.py），所有子命令共用同一份設定與程序內的文件快取。
+以 + 串接多個子命令時在同一個程序內執行，前一步的結果直接交給下一步，
+同一個檔案只讀取一次。
+
+子命令：
+    extract FILE...        擷取段落與表格文字（extract_all 的格式）
+    inspect FILE           文件結構（--text 只列出段落文字）
+    fill [JSON]            以 meeting_minutes JSON 填入範本
+    render [JSON]          由 meeting_minutes JSON 產生獨立的 Word 檔
+    analyze                以 LLM 分析影片 / 文字，產生 meeting_minutes JSON
+    etl                    TwitterHot prompt ETL
+
+用法：
+    python meeting_cli.py inspect 會議摘要.docx
+    python meeting_cli.py analyze --content 簡報.docx --json-out minutes.json \\
+        + fill --template 空白會議摘要.docx -o filled.docx + render -o minutes.docx
+    python meeting_cli.py --config meeting_cli.json fill minutes.json -o out.docx
+    python meeting_cli.py --profile fill minutes.json -o out.docx   # 各子命令的 CPU / 記憶體剖析
+    python meeting_cli.py fill minutes.json -o out.docx --profile-dir profiles/fill
+
+設定檔（JSON，預設讀取目前目錄的 meeting_cli.json；命令列參數優先）：
+    {"base_dir": "...", "template": "...", "output_dir": "...", "history_db": "..."}
+相對路徑以 base_dir 為基準。
+"""
+import argparse
+import json
+import os
+import sys
+from dataclasses import dataclass, fields
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pipeline_profile import add_profile_argument, profile_output_dir, profiled, stage
+
+DEFAULT_CONFIG = "meeting_cli.json"
+CHAIN_SEPARATOR = "+"
+
+# analyze 輸出（key_records）→ meeting_minutes 的 sub_sections
+ANALYSIS_SUB_SECTIONS = {
+    "migration": "server_room_relocation",
+    "services": "server_room_services",
+    "network_security": "network_and_security",
+    "storage": "storage",
+    "sap": "sap_hw",
+    "wenxin": "wenxin_relocation",
+    "modernization": "modernization_services",
+}
+
+
+# ============ 設定 ============
+
+@dataclass
+class CliConfig:
+    base_dir: str = "."
+    template: str = "NSL-技術小組進度會議-空白會議摘要.docx"
+    output_dir: str = "."
+    history_db: str = "minutes_index.sqlite"
+
+    @classmethod
+    def load(cls, path: Optional[str]) -> "CliConfig":
+        """讀取設定檔；未指定時使用目前目錄的 meeting_cli.json（不存在則用預設值）"""
+        if path is None:
+            if not os.path.exists(DEFAULT_CONFIG):
+                return cls()
+            path = DEFAULT_CONFIG
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        known = {field.name for field in fields(cls)}
+        unknown = set(data) - known
+        if unknown:
+            raise ValueError(f"設定檔 {path} 有未知的欄位：{', '.join(sorted(unknown))}")
+        return cls(**data)
+
+    def resolve(self, path: str) -> str:
+        return path if os.path.isabs(path) else os.path.join(self.base_dir, path)
+
+
+# ============ 文件快取 ============
+
+class DocumentCache:
+    """
+    程序內的文件快取：同一個檔案（大小與修改時間不變）只讀取一次
+
+    blocks() 是其他格式的來源：content()（extract_file 格式）與 text()（LLM 輸入）
+    都由同一份 blocks 產生，不會再次開啟檔案。
+    """
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, str], Tuple[Tuple[int, int], Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, kind: str, path: str, load: Callable[[str], Any]) -> Any:
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        cached = self._entries.get((kind, path))
+        if cached and cached[0] == signature:
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        value = load(path)
+        self._entries[(kind, path)] = (signature, value)
+        return value
+
+    def blocks(self, path: str) -> List[Dict[str, Any]]:
+        from docx_extract import iter_blocks
+        return self._get("blocks", path, lambda p: list(iter_blocks(p)))
+
+    def content(self, path: str) -> Dict[str, Any]:
+        """與 docx_extract.extract_file() 相同格式"""
+        def build(p):
+            result = {"path": p, "paragraphs": [], "tables": [], "error": None}
+            for block in self.blocks(p):
+                if block["type"] == "paragraph":
+                    result["paragraphs"].append(block)
+                else:
+                    while len(result["tables"]) <= block["table"]:
+                        result["tables"].append([])
+                    result["tables"][block["table"]].append(block["cells"])
+            return result
+        return self._get("content", path, build)
+
+    def text(self, path: str) -> str:
+        """純文字（.docx 的段落與表格列，或文字檔內容）"""
+        def build(p):
+            if not p.lower().endswith(".docx"):
+                with open(p, encoding="utf-8") as f:
+                    return f.read()
+            lines = []
+            for block in self.blocks(p):
+                if block["type"] == "paragraph":
+                    if block["text"].strip():
+                        lines.append(block["text"])
+                else:
+                    lines.append(" | ".join(cell.strip() for cell in block["cells"]))
+            return "\n".join(lines)
+        return self._get("text", path, build)
+
+    def json(self, path: str) -> Dict[str, Any]:
+        def build(p):
+            with open(p, encoding="utf-8") as f:
+                return json.load(f)
+        return self._get("json", path, build)
+
+    def template(self, path: str):
+        """已編譯的範本（docx_template.CompiledTemplate）"""
+        from docx_template import load_template
+        return self._get("template", path, load_template)
+
+
+@dataclass
+class Session:
+    """一次執行（可能包含多個串接的子命令）共用的狀態"""
+    config: CliConfig
+    cache: DocumentCache
+    minutes: Optional[Dict[str, Any]] = None
+
+
+# ============ analyze 結果轉換 ============
+
+def _items(values: Any) -> List[str]:
+    if isinstance(values, str):
+        values = [values]
+    return [value.strip() for value in values or [] if value and value.strip() and value.strip() != "無"]
+
+
+def minutes_from_analysis(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    MeetingPMSummarizer.analyze_content() 的輸出轉為 meeting_minutes 格式，
+    供 fill / render / bulk_generate 使用
+
+    Args:
+        data: {"meeting_info", "key_records", "action_items", "risk_management", "other_matters"}
+
+    Returns:
+        {"meeting_minutes": {...}}
+    """
+    from action_tracker import parse_action_item
+
+    info = data.get("meeting_info") or {}
+    key_records = data.get("key_records") or {}
+
+    sub_sections = {}
+    for key, section in ANALYSIS_SUB_SECTIONS.items():
+        details = _items(key_records.get(key))
+        if details:
+            sub_sections[section] = {"details": details}
+
+    todos = []
+    for text in _items(data.get("action_items")):
+        item = parse_action_item(text)
+        if item is None:
+            continue
+        task = f"{item.task}（期限：{item.due}）" if item.due else item.task
+        todos.append({"owner": item.owner, "task": task})
+
+    risks = []
+    for text in _items(data.get("risk_management")):
+        title, sep, description = text.replace("：", ":").partition(":")
+        if sep and description.strip():
+            risks.append({"risk_item": title.strip(), "description": description.strip()})
+        else:
+            risks.append({"risk_item": text, "description": ""})
+
+    attendees = info.get("attendees") or ""
+    if isinstance(attendees, str):
+        attendees = [name.strip() for name in attendees.replace("、", ",").split(",") if name.strip()]
+
+    return {
+        "meeting_minutes": {
+            "title": "會議記錄",
+            "metadata": {
+                "date": info.get("date_time", ""),
+                "location": info.get("location", ""),
+            },
+            "attendees": {"technical_team_representatives": attendees},
+            "discussion_records": {
+                "section_one_key_records": {"sub_sections": sub_sections},
+                "section_two_todos": todos,
+                "section_three_risks": risks,
+                "section_four_others": _items(data.get("other_matters")),
+            },
+        }
+    }
+
+
+# ============ 子命令 ============
+
+def _minutes_input(session: Session, path: Optional[str]) -> Dict[str, Any]:
+    if path:
+        return session.cache.json(session.config.resolve(path))
+    if session.minutes is None:
+        raise SystemExit("❌ 需要 JSON 檔，或以 + 串接在 analyze 之後")
+    return session.minutes
+
+
+def _output_path(session: Session, path: str) -> str:
+    return path if os.path.isabs(path) else os.path.join(session.config.output_dir, path)
+
+
+def cmd_extract(args, session: Session) -> None:
+    from extract_all import render_docx
+
+    sections = []
+    for path in args.files:
+        path = session.config.resolve(path)
+        header = f"\n{'='*20} {os.path.basename(path)} {'='*20}\n"
+        if not os.path.exists(path):
+            sections.append(header + "FILE NOT FOUND\n")
+            continue
+        text, _ = render_docx(path, blocks=session.cache.blocks(path))
+        sections.append(header + text)
+
+    if args.output:
+        with open(_output_path(session, args.output), "w", encoding="utf-8") as f:
+            f.writelines(sections)
+        print(f"✅ 已擷取 {len(args.files)} 個檔案 → {args.output}")
+    else:
+        sys.stdout.writelines(sections)
+
+
+def cmd_inspect(args, session: Session) -> None:
+    path = session.config.resolve(args.file)
+    if args.text:
+        from read_template import read_full_content
+        read_full_content(path, blocks=session.cache.blocks(path))
+    else:
+        from parse_template import analyze_document_structure
+        analyze_document_structure(path, content=session.cache.content(path))
+
+
+def cmd_fill(args, session: Session) -> None:
+    from fill_template_with_json import fill_template_from_json
+
+    minutes = _minutes_input(session, args.json)
+    template = session.config.resolve(args.template or session.config.template)
+    output = _output_path(session, args.output)
+    fill_template_from_json(minutes, session.cache.template(template), output)
+    print(f"✅ 已填入範本 → {output}")
+
+
+def cmd_render(args, session: Session) -> None:
+    from convert_json_to_word import create_word_from_json
+
+    minutes = _minutes_input(session, args.json)
+    output = _output_path(session, args.output)
+    create_word_from_json(minutes, output, backend=args.backend)
+    print(f"✅ 已輸出 Word 檔 → {output}")
+
+
+def cmd_analyze(args, session: Session) -> None:
+    from llm_backend import default_backend
+    from meeting_pm_system import API_KEY, MeetingPMSummarizer, load_prior_context
+
+    backend = default_backend(API_KEY, MeetingPMSummarizer.MODEL_NAME, cache_label="Senior PM")
+    if backend is None:
+        raise SystemExit("❌ 請設定 GEMINI_API_KEY 或 MOCK_LLM_URL")
+    if not args.video and not args.content:
+        raise SystemExit("❌ 需要 --video 或 --content")
+
+    agent = MeetingPMSummarizer(backend=backend)
+    video_file = agent.upload_file(session.config.resolve(args.video)) if args.video else None
+    content_text = "\n\n".join(session.cache.text(session.config.resolve(path)) for path in args.content or [])
+    prior_context = None
+    if not args.no_history:
+        prior_context = load_prior_context(session.config.resolve(session.config.history_db),
+                                           query_text=content_text or None,
+                                           source_path=args.video or (args.content or [None])[0])
+
+    analysis = agent.analyze_content(video_file, content_text=content_text or None, prior_context=prior_context)
+    session.minutes = minutes_from_analysis(analysis)
+    print(backend.report())
+
+    if args.json_out:
+        output = _output_path(session, args.json_out)
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(session.minutes, f, ensure_ascii=False, indent=2)
+        print(f"✅ 會議記錄 JSON → {output}")
+
+
+def cmd_etl(args, session: Session) -> None:
+    import twitterhot_etl
+
+    twitterhot_etl.main(limit=args.limit, date_str=args.date, test_mode="api" if args.test_api else None)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="會議記錄工具（子命令可用 + 串接，在同一個程序內執行）"
+    )
+    parser.add_argument("--config", default=None, help=f"設定檔（預設 {DEFAULT_CONFIG}）")
+    add_profile_argument(parser)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("extract", help="擷取段落與表格文字")
+    p.add_argument("files", nargs="+")
+    p.add_argument("-o", "--output", default=None, help="輸出檔（預設印出）")
+    p.set_defaults(handler=cmd_extract)
+
+    p = commands.add_parser("inspect", help="文件結構")
+    p.add_argument("file")
+    p.add_argument("--text", action="store_true", help="只列出段落文字")
+    p.set_defaults(handler=cmd_inspect)
+
+    p = commands.add_parser("fill", help="以 meeting_minutes JSON 填入範本")
+    p.add_argument("json", nargs="?", default=None, help="JSON 檔（串接在 analyze 之後可省略）")
+    p.add_argument("--template", default=None, help="範本（預設取自設定檔）")
+    p.add_argument("-o", "--output", required=True)
+    p.set_defaults(handler=cmd_fill)
+
+    p = commands.add_parser("render", help="由 meeting_minutes JSON 產生 Word 檔")
+    p.add_argument("json", nargs="?", default=None, help="JSON 檔（串接在 analyze 之後可省略）")
+    p.add_argument("-o", "--output", required=True)
+    p.add_argument("--backend", choices=["python-docx", "ooxml"], default="python-docx")
+    p.set_defaults(handler=cmd_render)
+
+    p = commands.add_parser("analyze", help="以 LLM 產生會議記錄")
+    p.add_argument("--video", default=None, help="會議錄影")
+    p.add_argument("--content", nargs="+", default=None, help="簡報 / 文字資料（.docx 或文字檔）")
+    p.add_argument("--json-out", default=None, help="輸出 meeting_minutes JSON")
+    p.add_argument("--no-history", action="store_true", help="不附上過往會議上下文")
+    p.set_defaults(handler=cmd_analyze)
+
+    p = commands.add_parser("etl", help="TwitterHot prompt ETL")
+    p.add_argument("--limit", type=int, default=10)
+    p.add_argument("--date", default=None)
+    p.add_argument("--test-api", action="store_true")
+    p.set_defaults(handler=cmd_etl)
+
+    # --profile 放在子命令前後皆可
+    for subparser in commands.choices.values():
+        add_profile_argument(subparser, suppress_defaults=True)
+    return parser
+
+
+def split_chain(argv: List[str]) -> List[List[str]]:
+    chain, current = [], []
+    for arg in argv:
+        if arg == CHAIN_SEPARATOR:
+            chain.append(current)
+            current = []
+        else:
+            current.append(arg)
+    chain.append(current)
+    return [segment for segment in chain if segment]
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = build_parser()
+    segments = split_chain(sys.argv[1:] if argv is None else argv) or [[]]
+    parsed = [parser.parse_args(segment) for segment in segments]
+
+    config_path = next((args.config for args in parsed if args.config), None)
+    profile_dir = next(filter(None, map(profile_output_dir, parsed)), None)
+    session = Session(CliConfig.load(config_path), DocumentCache())
+    with profiled("meeting_cli", profile_dir):
+        for args in parsed:
+            with stage(args.command):
+                args.handler(args, session)
+
+    if len(parsed) > 1:
+        print(f"📦 文件快取：讀取 {session.cache.misses} 次，重複使用 {session.cache.hits} 次")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,9 @@
+import argparse
 import os
-import time
-import json
-try:
-    import google.generativeai as genai
-except ImportError:
-    genai = None
-    print("Warning: google-generativeai not installed. Running in simulation mode.")
-from docx import Document
-from docx.shared import Pt
-import typing_extensions as typing
+
+from llm_backend import GeminiBackend, default_backend
+from llm_json import MINUTES_SCHEMA, decode_response
+from pipeline_profile import add_profile_argument, profile_output_dir, profiled, stage
 
 # ==========================================
 # CONFIGURATION
@@ -38,36 +33,10 @@ HEADERS_MAP = {
 # ==========================================
 
 class MeetingPMSummarizer:
-    def __init__(self, api_key):
-        if not api_key:
-            raise ValueError("API Key is missing. Please set GEMINI_API_KEY.")
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-flash')
+    MODEL_NAME = 'gemini-2.5-flash'
 
-    def upload_file(self, path):
-        """Uploads a file to Gemini."""
-        print(f"Uploading file: {path}...")
-        video_file = genai.upload_file(path=path)
-        print(f"Completed upload: {video_file.uri}")
-        
-        # Wait for processing if it's a video
-        while video_file.state.name == "PROCESSING":
-            print('.', end='', flush=True)
-            time.sleep(10)
-            video_file = genai.get_file(video_file.name)
-            
-        if video_file.state.name == "FAILED":
-            raise ValueError(f"Video processing failed: {video_file.state.name}")
-            
-        print("Ready.")
-        return video_file
-
-    def analyze_content(self, video_file, content_text=None):
-        """
-        Analyzes the video (and optional text/PPT content) to generate structured minutes.
-        """
-        
-        system_prompt = """
+    # Static instruction block; cached server-side when possible (see gemini_cache)
+    SYSTEM_PROMPT = """
         You are a **Senior Project Manager (Senior PM)**. Your task is to generate strict, professional meeting minutes.
         
         **Rules for Output:**
@@ -101,18 +70,71 @@ class MeetingPMSummarizer:
         If a category has no discussion, return an empty list or ["無"].
         """
 
-        prompt_parts = [video_file, system_prompt]
+    def __init__(self, api_key=None, reference_docs=None, backend=None):
+        """
+        reference_docs: large reference material shared by many meetings
+        (text or uploaded files); cached together with SYSTEM_PROMPT.
+        backend: an llm_backend.LLMBackend (e.g. MockHTTPBackend for load tests);
+        defaults to GeminiBackend with api_key.
+        """
+        self.backend = backend or GeminiBackend(api_key, self.MODEL_NAME, cache_label="Senior PM")
+        self.reference_docs = list(reference_docs or [])
+
+    def upload_file(self, path):
+        """Uploads a file to the backend (Gemini File API, or a reference for the mock)."""
+        return self.backend.upload_file(path)
+
+    def analyze_content(self, video_file, content_text=None, prior_context=None):
+        """
+        Analyzes the video (and optional text/PPT content) to generate structured minutes.
+
+        prior_context: short excerpts of earlier meetings (see
+        minutes_context.MinutesContextRetriever.build_context), attached instead
+        of whole prior minutes so the prompt stays bounded as history grows.
+        """
+        extra_parts = []
         if content_text:
-            prompt_parts.append(f"Additional Reference Text/PPT Content: {content_text}")
+            extra_parts.append(f"Additional Reference Text/PPT Content: {content_text}")
+        if prior_context:
+            extra_parts.append(
+                "Prior Meeting Context (for continuity only; do not copy into this meeting's "
+                f"minutes unless it is discussed again):\n{prior_context}"
+            )
+        generation_config = {"response_mime_type": "application/json"}
+        # video_file may be None when only text/PPT content is available
+        media = [video_file] if video_file is not None else []
 
-        print("Analyzing content with Gemini Senior PM Agent...")
-        response = self.model.generate_content(
-            prompt_parts,
-            generation_config=genai.GenerationConfig(
-                response_mime_type="application/json"
+        def call(parts):
+            def uncached_call():
+                prompt_parts = [*media, self.SYSTEM_PROMPT, *self.reference_docs, *parts]
+                return self.backend.generate(prompt_parts, generation_config=generation_config)
+
+            return self.backend.generate_cached(
+                self.SYSTEM_PROMPT,
+                [*media, *parts],
+                uncached_call,
+                contents=self.reference_docs,
+                generation_config=generation_config,
             )
+
+        print(f"Analyzing content with Senior PM Agent ({self.backend.name})...")
+        response = call(extra_parts)
+
+        # Malformed or truncated JSON is repaired locally; only fields that are still
+        # missing/invalid are asked for again, instead of regenerating the whole minutes.
+        result = decode_response(
+            response.text,
+            MINUTES_SCHEMA,
+            refetch=lambda request: call([*extra_parts, request]).text,
+            fill_defaults=True,
         )
-        return json.loads(response.text)
+        if result.repaired:
+            print("Note: repaired malformed JSON in the model response.")
+        if result.refetched:
+            print(f"Note: re-requested fields: {', '.join(result.refetched)}")
+        if result.invalid:
+            print(f"Warning: fields left empty after re-request: {', '.join(result.invalid)}")
+        return result.data
 
 # ==========================================
 # DOCX GENERATOR
@@ -120,70 +142,17 @@ class MeetingPMSummarizer:
 
 class ReportGenerator:
     def __init__(self, template_path):
-        self.template_path = template_path
-        self.doc = Document(template_path)
+        # template_path may also be a pre-parsed docx_template.CompiledTemplate.
+        from docx_template import open_template  # python-docx loads on first report, not at import
 
-    def _insert_text_after_paragraph(self, target_text, content_lines):
-        """
-        Finds a paragraph containing 'target_text' and inserts content after it.
-        Smartly handles the 'Template' structure.
-        """
-        target_found = False
-        target_index = -1
-        
-        # Find index
-        for i, para in enumerate(self.doc.paragraphs):
-            if target_text in para.text:
-                target_index = i
-                target_found = True
-                break
-        
-        if not target_found:
-            print(f"Warning: Header '{target_text}' not found in template.")
-            return
-
-        # Insert Point
-        # We want to insert *after* the header.
-        # Check if there is already content (placeholder) or empty space.
-        # Strategy: Insert new paragraphs strictly after the header.
-        
-        if not content_lines or (len(content_lines) == 1 and content_lines[0] == "無"):
-             # If empty or "None", just put "1. 無" or leave blank if strict
-             # But Senior PM usually writes "1. 進度正常" or "無"
-             # Let's insert "無" if empty list provided
-             if not content_lines: content_lines = ["無"]
-
-        # Reverse insert so they appear in correct order when inserting at same index + 1
-        for line in reversed(content_lines):
-            # Check if it's a list item needing numbering?
-            # The input 'content_lines' should already be formatted strings? 
-            # Or we format them here. Let's assume input is list of strings.
-            new_para = self.doc.paragraphs[target_index].insert_paragraph_before(line) 
-            # Wait, insert_paragraph_before inserts *before*. 
-            # We need to insert *after*.
-            # python-docx doesn't imply 'insert_after'.
-            # Workaround: Insert before the *next* paragraph.
-            pass
-
-        # Better Strategy: 
-        # Identify the range between headers and REPLACE/FILL content.
-        # But headers might be adjacent.
-        # Let's try appending text to the paragraph strictly if it's empty, or inserting new ones.
-        
-        # Implementation for this specific user template:
-        # The categories are headings (e.g., "機房搬遷：").
-        # We should append content immediately following it.
-        
-        # Note: python-docx structure is linear.
-        # We can find the paragraph `p` of the header.
-        # Then we insert `p.insert_paragraph_before` on the *next* element? No.
-        # We will use a reliable helper:
-        pass
+        self.template_path = template_path
+        # Header index is built once; all sections are filled against it.
+        self.doc, self.index = open_template(template_path)
 
     def fill_report(self, data, output_path):
         """
         Fills the template with structured data.
-        Simple approach: Iterate paragraphs, find keywords, append text.
+        All sections are resolved against the header index in one pass.
         """
         
         # Mapping JSON keys to Template Keywords
@@ -203,6 +172,7 @@ class ReportGenerator:
         }
         
         # Fill Key Records
+        sections = []
         for json_key, header_text in mapping.items():
             content = []
             
@@ -212,7 +182,9 @@ class ReportGenerator:
             elif json_key in data:
                 content = data[json_key]
                 
-            self._fill_section(header_text, content)
+            sections.append((header_text, self._format_lines(content)))
+
+        self.index.fill_sections(sections)
 
         # Fill Basic Info if placeholders exist (Optional extended feature)
         # For now, we assume the user might manually fill date/time or we can try.
@@ -221,48 +193,63 @@ class ReportGenerator:
         self.doc.save(output_path)
         print(f"Report saved to: {output_path}")
 
+    def _format_lines(self, content_list):
+        """
+        Formats section content as numbered lines ("無" stays unnumbered).
+        """
+        if not content_list:
+            content_list = ["無"]
+
+        lines = []
+        for idx, item in enumerate(content_list):
+            text = item
+            if isinstance(content_list, list) and len(content_list) > 1 and item != "無":
+                text = f"{idx+1}. {item}"
+            elif item != "無" and "無" not in item:
+                text = f"{idx+1}. {item}"
+            lines.append(text)
+        return lines
+
     def _fill_section(self, header_keyword, content_list):
         """
         Finds the header paragraph and inserts content paragraphs after it.
         """
-        for i, para in enumerate(self.doc.paragraphs):
-            # Check for partial match of header
-            clean_text = para.text.strip().replace("：", "")
-            target_clean = header_keyword.replace("：", "")
-            
-            if target_clean in clean_text:
-                # Found the header.
-                # Now insert content.
-                # If content_list is empty, add "無"
-                if not content_list:
-                    content_list = ["無"]
-                
-                # We need to insert *after* this paragraph. 
-                # We can access the parent element and insert valid xml, or simply:
-                # Find the *next* paragraph and insert_paragraph_before it.
-                
-                if i + 1 < len(self.doc.paragraphs):
-                    next_para = self.doc.paragraphs[i + 1]
-                    
-                    # Formatting: Numbered list 1. 2. 3.
-                    for idx, item in enumerate(content_list):
-                        text = item
-                        if isinstance(content_list, list) and len(content_list) > 1 and item != "無":
-                            text = f"{idx+1}. {item}"
-                        elif item != "無" and "無" not in item:
-                             # Single item but not 'None', maybe add number or bullet?
-                             # Let's stick to simple text for now or "1."
-                             text = f"{idx+1}. {item}"
-                        
-                        new_p = next_para.insert_paragraph_before(text)
-                        
-                        # Apply style if needed (copying normal style)
-                        new_p.style = self.doc.styles['Normal']
-                else:
-                    # End of doc
-                    for item in content_list:
-                        self.doc.add_paragraph(item)
-                return
+        self.index.fill_sections([(header_keyword, self._format_lines(content_list))])
+
+# ==========================================
+# PRIOR MEETING CONTEXT
+# ==========================================
+
+def load_prior_context(db_path, k=2, query_text=None, source_path=None):
+    """
+    Top-k earlier sections per category from the minutes index, or None
+    when no index has been built (python minutes_index.py build <dir>).
+
+    query_text: this meeting's text/PPT content; sections are ranked by
+    relevance to it. Without it the most recent meetings are used and
+    nothing is sent to the embedding API.
+    source_path: the video or content file; a YYYYMMDD date in its name
+    excludes that meeting (and later ones) from the context.
+
+    Prior context is optional: a stale index or an embedding API error is
+    logged and the summary runs without it.
+    """
+    if not os.path.exists(db_path):
+        return None
+    from minutes_context import MinutesContextRetriever
+    from minutes_index import meeting_date_from_filename
+
+    before = meeting_date_from_filename(source_path) if source_path else None
+    try:
+        with MinutesContextRetriever(db_path) as retriever:
+            context = retriever.build_context(query_text, k=k, before=before)
+    except Exception as e:
+        print(f"WARNING: prior meeting context unavailable ({type(e).__name__}: {e}); continuing without it.")
+        return None
+    print(f"Prior meeting context: {len(context)} chars"
+          f" ({'ranked by content' if query_text else 'most recent meetings'}"
+          f"{f', before {before}' if before else ''}).")
+    return context or None
 
 # ==========================================
 # MAIN EXECUTION
@@ -271,13 +258,24 @@ class ReportGenerator:
 def main():
     # 1. Paths
     base_dir = r"c:\Users\hende\Desktop\meeting"
-    template_path = os.path.join(base_dir, "NSL-技術小組進度會議-空白會議摘要.docx")
-    video_path = os.path.join(base_dir, "[NSL] 新資訊機房搬遷專案 - 技術小組週會-20251210_135241-會議錄製.mp4")
     # If using docx source as proxy for video content for now (since we might not have video upload key)
     # FOR DEMO: modifying to use extracted text logic if video fails or as supplement
-    
-    output_path = os.path.join(r"c:\Users\hende\Desktop\Meeting_update", "Final_Meeting_Minutes_System_Output.docx")
+    parser = argparse.ArgumentParser(description="Meeting Summary System (Senior PM Mode)")
+    parser.add_argument("--template", default=os.path.join(base_dir, "NSL-技術小組進度會議-空白會議摘要.docx"))
+    parser.add_argument("--video", default=os.path.join(
+        base_dir, "[NSL] 新資訊機房搬遷專案 - 技術小組週會-20251210_135241-會議錄製.mp4"))
+    parser.add_argument("--output", default=os.path.join(
+        r"c:\Users\hende\Desktop\Meeting_update", "Final_Meeting_Minutes_System_Output.docx"))
+    # Built with: python minutes_index.py build <minutes folder>
+    parser.add_argument("--history-db", default=os.path.join(base_dir, "minutes_index.sqlite"))
+    add_profile_argument(parser)
+    args = parser.parse_args()
+
+    with profiled("meeting_pm_system", profile_output_dir(args)):
+        generate_minutes(args.template, args.video, args.output, args.history_db)
+
 
+def generate_minutes(template_path, video_path, output_path, history_db):
     print("--- Starting Meeting Summary System (Senior PM Mode) ---")
     
     # Check inputs
@@ -290,7 +288,9 @@ def main():
     # I will assume it's set or this step might fail if run locally without setup.
     # For now, I will construct the object and print instructions if key missing.
     try:
-        if not API_KEY:
+        # MOCK_LLM_URL (see mock_llm_server.py) takes precedence over GEMINI_API_KEY
+        backend = default_backend(API_KEY, MeetingPMSummarizer.MODEL_NAME, cache_label="Senior PM")
+        if backend is None:
             print("WARNING: GEMINI_API_KEY not found in env. Please set it to run actual AI.")
             print("Simulating AI output based on extracted artifacts for demonstration...")
             
@@ -336,9 +336,13 @@ def main():
                 "other_matters": ["無"]
             }
         else:
-            pm_agent = MeetingPMSummarizer(API_KEY)
-            video_file = pm_agent.upload_file(video_path)
-            ai_data = pm_agent.analyze_content(video_file)
+            pm_agent = MeetingPMSummarizer(backend=backend)
+            prior_context = load_prior_context(history_db, source_path=video_path)
+            with stage("upload"):
+                video_file = pm_agent.upload_file(video_path)
+            with stage("analyze"):
+                ai_data = pm_agent.analyze_content(video_file, prior_context=prior_context)
+            print(pm_agent.backend.report())
 
     except Exception as e:
         print(f"AI Processing Error: {e}")
@@ -346,8 +350,10 @@ def main():
 
     # 3. Report Generation
     print("Generating Word Report...")
-    reporter = ReportGenerator(template_path)
-    reporter.fill_report(ai_data, output_path)
+    with stage("template"):
+        reporter = ReportGenerator(template_path)
+    with stage("fill_report"):
+        reporter.fill_report(ai_data, output_path)
     
     print("Success! Report generated.")
 
@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+"""
+歷次會議內容檢索：為 analyze_content 挑選相關的過往 section 作為上下文
+
+以 minutes_index 的索引為資料來源，每次會議的每個 section 合併成一個片段，
+計算向量嵌入後放進記憶體中的向量索引（numpy，cosine 相似度）。
+分析新會議時，每個分類（機房搬遷、儲存、待辦事項…）只取最相關的 top-k
+個過往片段，並限制每段長度，因此不論歷史累積多少次會議，
+附加到 prompt 的內容都有固定上限。
+
+向量嵌入以「模型 + 內容雜湊」為 key 快取在同一個 SQLite 檔，
+只有新增或修改的片段才需要重新呼叫嵌入 API。
+沒有 API 金鑰時改用本機的 hashing 向量（中文二字組 + 英數字詞），不需網路。
+
+用法：
+    python minutes_index.py build 會議記錄資料夾/
+    python minutes_context.py --query "參考資料.txt" --k 2
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from lazy_import import lazy_import
+from minutes_index import DEFAULT_DB, INFO_SECTION, MinutesIndex, tokenize
+
+# 第一次呼叫嵌入 API 時才載入（只取最近會議時不需要）
+genai = lazy_import("google.generativeai")
+
+EMBEDDING_MODEL = "models/text-embedding-004"
+EMBED_BATCH = 100
+
+# 每個片段存入索引與放進 prompt 的最大字數
+MAX_CHUNK_CHARS = 1200
+
+# analyze_content 輸出的分類 → minutes_index 的 section 名稱
+CATEGORY_SECTIONS = {
+    "migration": "機房搬遷",
+    "services": "機房服務",
+    "network_security": "網路資安",
+    "storage": "儲存",
+    "sap": "SAP",
+    "wenxin": "文心機房搬遷",
+    "modernization": "現代化顧問服務",
+    "action_items": "待辦事項",
+    "risk_management": "風險管理",
+    "other_matters": "其他事項",
+}
+
+_EMBEDDING_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunk_embeddings (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    dim INTEGER NOT NULL,
+    vector BLOB NOT NULL
+);
+"""
+
+Chunk = Dict[str, str]
+
+
+# ============ 向量嵌入 ============
+
+class GeminiEmbedder:
+    """Gemini text-embedding API（批次呼叫）"""
+
+    def __init__(self, api_key: Optional[str] = None, model: str = EMBEDDING_MODEL):
+        if genai is None:
+            raise ImportError("google-generativeai 未安裝")
+        if api_key:
+            genai.configure(api_key=api_key)
+        self.model = model
+        self.name = model
+
+    def embed(self, texts: Sequence[str], task_type: str = "retrieval_document") -> np.ndarray:
+        vectors = []
+        for start in range(0, len(texts), EMBED_BATCH):
+            batch = list(texts[start:start + EMBED_BATCH])
+            result = genai.embed_content(model=self.model, content=batch, task_type=task_type)
+            vectors.extend(result["embedding"])
+        return np.asarray(vectors, dtype=np.float32)
+
+
+class HashingEmbedder:
+    """
+    本機 hashing 向量：詞彙（中文二字組 + 英數字詞）以 crc32 映射到固定維度，
+    不需網路，適合沒有 API 金鑰或離線時使用
+    """
+
+    def __init__(self, dim: int = 1024):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts: Sequence[str], task_type: str = "retrieval_document") -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in tokenize(text):
+                bucket = zlib.crc32(token.encode("utf-8"))
+                sign = 1.0 if bucket & 0x80000000 else -1.0
+                vectors[row, bucket % self.dim] += sign
+        return vectors
+
+
+def default_embedder(api_key: Optional[str] = None):
+    """有 API 金鑰時使用 Gemini，否則使用本機 hashing 向量"""
+    api_key = api_key or os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
+    if api_key and genai is not None:
+        return GeminiEmbedder(api_key)
+    return HashingEmbedder()
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+# ============ 向量索引 ============
+
+class VectorIndex:
+    """記憶體內的 cosine 相似度索引；可依 section 篩選候選"""
+
+    def __init__(self, vectors: np.ndarray, chunks: List[Chunk]):
+        self.vectors = _normalize(vectors.astype(np.float32, copy=False))
+        self.chunks = chunks
+        self._by_section: Dict[str, np.ndarray] = {}
+        sections: Dict[str, List[int]] = {}
+        for row, chunk in enumerate(chunks):
+            sections.setdefault(chunk["section"], []).append(row)
+        for section, rows in sections.items():
+            self._by_section[section] = np.asarray(rows, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def search(self, query: np.ndarray, k: int = 3,
+               section: Optional[str] = None) -> List[Tuple[float, Chunk]]:
+        """
+        Args:
+            query: 查詢向量（1 維）
+            k: 回傳筆數
+            section: 只在此 section 的片段中搜尋
+
+        Returns:
+            [(相似度, 片段)...]，依相似度由高到低
+        """
+        rows = self._by_section.get(section) if section else np.arange(len(self.chunks))
+        if rows is None or not len(rows):
+            return []
+        query = _normalize(query.reshape(1, -1).astype(np.float32))[0]
+        scores = self.vectors[rows] @ query
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(float(scores[i]), self.chunks[rows[i]]) for i in top]
+
+
+# ============ 檢索 ============
+
+class MinutesContextRetriever:
+    """
+    從會議記錄索引挑選過往 section 作為 prompt 上下文
+
+    Args:
+        db_path: minutes_index 的 SQLite 檔
+        embedder: 具有 name 屬性與 embed(texts, task_type) 方法的物件；預設依 API 金鑰自動選擇
+        check_same_thread: False 時可跨執行緒使用（呼叫端需自行以鎖保護）
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB, embedder=None, check_same_thread: bool = True):
+        self.index = MinutesIndex(db_path, check_same_thread)
+        self.index.conn.executescript(_EMBEDDING_SCHEMA)
+        self.embedder = embedder or default_embedder()
+        self.vectors: Optional[VectorIndex] = None
+        self.stats = {"chunks": 0, "embedded": 0, "cached": 0}
+
+    def close(self) -> None:
+        self.index.close()
+
+    def __enter__(self) -> "MinutesContextRetriever":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def chunks(self) -> List[Chunk]:
+        """每次會議的每個 section 合併成一個片段（不含會議資訊）"""
+        rows = self.index.conn.execute(
+            "SELECT path, meeting_date, section, text FROM segments "
+            "WHERE section != ? ORDER BY path, position",
+            (INFO_SECTION,),
+        )
+        merged: Dict[Tuple[str, str], Chunk] = {}
+        for row in rows:
+            key = (row["path"], row["section"])
+            chunk = merged.get(key)
+            if chunk is None:
+                merged[key] = {
+                    "path": row["path"],
+                    "meeting_date": row["meeting_date"] or "",
+                    "section": row["section"],
+                    "text": row["text"],
+                }
+            elif len(chunk["text"]) < MAX_CHUNK_CHARS:
+                chunk["text"] += "\n" + row["text"]
+        for chunk in merged.values():
+            chunk["text"] = chunk["text"][:MAX_CHUNK_CHARS]
+        return list(merged.values())
+
+    def _cache_key(self, text: str, task_type: str) -> str:
+        payload = f"{self.embedder.name}\0{task_type}\0{text}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def embed(self, texts: Sequence[str], task_type: str = "retrieval_document") -> np.ndarray:
+        """取得向量嵌入；已快取的內容不會重新呼叫 embedder"""
+        keys = [self._cache_key(text, task_type) for text in texts]
+        found: Dict[str, np.ndarray] = {}
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            for key, dim, blob in self.index.conn.execute(
+                f"SELECT key, dim, vector FROM chunk_embeddings WHERE key IN ({placeholders})", batch
+            ):
+                found[key] = np.frombuffer(blob, dtype=np.float32, count=dim)
+
+        missing = [i for i, key in enumerate(keys) if key not in found]
+        if missing:
+            vectors = self.embedder.embed([texts[i] for i in missing], task_type)
+            with self.index.conn:
+                self.index.conn.executemany(
+                    "INSERT OR REPLACE INTO chunk_embeddings (key, model, dim, vector) VALUES (?, ?, ?, ?)",
+                    [(keys[i], self.embedder.name, vector.shape[0], vector.astype(np.float32).tobytes())
+                     for i, vector in zip(missing, vectors)],
+                )
+            for i, vector in zip(missing, vectors):
+                found[keys[i]] = vector
+        self.stats["embedded"] += len(missing)
+        self.stats["cached"] += len(keys) - len(missing)
+        return np.stack([found[key] for key in keys]) if keys else np.zeros((0, 0), np.float32)
+
+    def refresh(self) -> VectorIndex:
+        """依目前索引內容重建向量索引（只為新片段計算嵌入）"""
+        chunks = self.chunks()
+        vectors = self.embed([chunk["text"] for chunk in chunks])
+        self.vectors = VectorIndex(vectors, chunks)
+        self.stats["chunks"] = len(chunks)
+        return self.vectors
+
+    def retrieve(self, query_text: Optional[str] = None, k: int = 2,
+                 categories: Iterable[str] = CATEGORY_SECTIONS,
+                 before: Optional[str] = None) -> Dict[str, List[Chunk]]:
+        """
+        每個分類挑選 top-k 過往片段
+
+        Args:
+            query_text: 本次會議的參考文字；None 時取最近 k 次會議的內容（不計算向量嵌入）
+            k: 每個分類的片段數
+            categories: 要檢索的分類（CATEGORY_SECTIONS 的 key）
+            before: 只使用此日期（YYYY-MM-DD）之前的會議，避免檢索到本次會議本身
+
+        Returns:
+            分類 → 片段列表（依相關度排序）
+        """
+        query = chunks = None
+        if query_text:
+            if self.vectors is None:
+                self.refresh()
+            query = self.embed([query_text[:MAX_CHUNK_CHARS * 4]], "retrieval_query")[0]
+        else:
+            chunks = self.chunks()
+            self.stats["chunks"] = len(chunks)
+
+        selected = {}
+        for category in categories:
+            section = CATEGORY_SECTIONS[category]
+            if query is None:
+                candidates = [chunk for chunk in chunks if chunk["section"] == section]
+                candidates.sort(key=lambda chunk: chunk["meeting_date"], reverse=True)
+            else:
+                candidates = [chunk for _, chunk in self.vectors.search(query, len(self.vectors), section)]
+            if before:
+                candidates = [chunk for chunk in candidates if chunk["meeting_date"] < before]
+            selected[category] = candidates[:k]
+        return selected
+
+    def build_context(self, query_text: Optional[str] = None, k: int = 2,
+                      before: Optional[str] = None) -> str:
+        """將檢索結果格式化成可附加在 prompt 後的文字"""
+        blocks = []
+        for category, chunks in self.retrieve(query_text, k, before=before).items():
+            for chunk in chunks:
+                date = chunk["meeting_date"] or os.path.basename(chunk["path"])
+                blocks.append(f"[{CATEGORY_SECTIONS[category]} / {date}]\n{chunk['text']}")
+        return "\n\n".join(blocks)
+
+
+# ============ CLI ============
+
+def main():
+    sys.stdout.reconfigure(encoding='utf-8')
+
+    parser = argparse.ArgumentParser(description="挑選歷次會議內容作為 prompt 上下文")
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"minutes_index 索引檔（預設：{DEFAULT_DB}）")
+    parser.add_argument("--query", default=None, help="本次會議的參考文字檔（未指定時取最近的會議）")
+    parser.add_argument("--k", type=int, default=2, help="每個分類的片段數（預設：2）")
+    parser.add_argument("--before", default=None, help="只使用此日期之前的會議 YYYY-MM-DD")
+    parser.add_argument("--local", action="store_true", help="使用本機 hashing 向量，不呼叫嵌入 API")
+    args = parser.parse_args()
+
+    query_text = None
+    if args.query:
+        with open(args.query, encoding="utf-8") as f:
+            query_text = f.read()
+
+    embedder = HashingEmbedder() if args.local else None
+    with MinutesContextRetriever(args.db, embedder) as retriever:
+        start = time.perf_counter()
+        if query_text:
+            retriever.refresh()
+        context = retriever.build_context(query_text, args.k, args.before)
+        elapsed = time.perf_counter() - start
+
+        print(context)
+        chunks = retriever.vectors.chunks if retriever.vectors is not None else retriever.chunks()
+        full = sum(len(chunk["text"]) for chunk in chunks)
+        stats = retriever.stats
+        print(f"\n📎 上下文 {len(context)} 字（完整歷史約 {full} 字），"
+              f"片段 {stats['chunks']}，新嵌入 {stats['embedded']}、快取 {stats['cached']}，"
+              f"嵌入模型 {retriever.embedder.name}，耗時 {elapsed * 1000:.0f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,473 @@
+# -*- coding: utf-8 -*-
+"""
+會議記錄全文檢索索引
+
+將歷次 NSL-技術小組進度會議-YYYYMMDD會議摘要.docx 以 docx_extract 擷取後，
+依段落標題（機房搬遷、儲存、SAP、待辦事項…）切成帶有 section 標記的紀錄，
+存入 SQLite FTS5 倒排索引。
+
+中文以二字組（bigram）斷詞、英數字以單字為單位，查詢字串使用相同規則轉換，
+因此「儲存」「WWN/LUN」這類兩字中文或短英文縮寫都能直接查到
+（FTS5 內建的 trigram tokenizer 無法查詢少於三個字的詞）。
+
+索引以檔案為單位增量更新（見 archive_manifest）：files 表記錄每個檔案的
+大小、修改時間與 SHA-256，只有新增或內容變更的檔案會重新擷取並取代其紀錄，
+已刪除的檔案會從索引移除。
+
+用法：
+    python minutes_index.py build 會議記錄資料夾/
+    python minutes_index.py search "WWN LUN"
+    python minutes_index.py search 光纖接線表 --section 儲存 --since 2025-11-01
+"""
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from archive_manifest import Entry, scan_directory
+from docx_extract import iter_blocks
+from docx_template import normalize_header
+
+DEFAULT_DB = "minutes_index.sqlite"
+
+# 標題之前的段落（會議名稱、時間、出席人員…）
+INFO_SECTION = "會議資訊"
+
+# section 名稱 → 可辨識的標題寫法（比對前會去除編號、括號說明、冒號與空白）
+# 同時涵蓋空白會議摘要範本與 convert_json_to_word 的版面
+SECTIONS = [
+    (INFO_SECTION, ("出席人員",)),
+    ("重點紀錄", ("討論紀錄與重點紀錄", "重點紀錄", "討論事項", "整體進度摘要")),
+    ("機房搬遷", ("機房搬遷",)),
+    ("機房服務", ("機房服務",)),
+    ("網路資安", ("網路、資安", "網路與資安", "網路資安")),
+    ("儲存", ("儲存",)),
+    ("SAP", ("SAP",)),
+    ("文心機房搬遷", ("文心機房搬遷", "文心搬遷")),
+    ("現代化顧問服務", ("現代化顧問服務",)),
+    ("待辦事項", ("待辦事項",)),
+    ("風險管理", ("風險管理事項", "風險項目")),
+    ("其他事項", ("其他事項紀錄", "其他事項", "其他備註")),
+]
+
+_HEADER_LOOKUP = {
+    normalize_header(alias): section
+    for section, aliases in SECTIONS
+    for alias in aliases
+}
+
+# 標題前的編號（「一 」「二、」「1. 」）與括號說明（「（HW）」「(Storage)」）
+_ENUMERATOR_RE = re.compile(r"^(?:[一二三四五六七八九十]+[\s、.．]|\d+[.、．])\s*")
+_PAREN_RE = re.compile(r"\s*[（(][^）)]*[）)]")
+
+_FILENAME_DATE_RE = re.compile(r"(20\d{2})(\d{2})(\d{2})")
+_ROC_DATE_RE = re.compile(r"民國\s*(\d{2,3})\s*年\s*(\d{1,2})\s*月\s*(\d{1,2})\s*日")
+_DATE_RE = re.compile(r"(20\d{2})\s*[-/.年]\s*(\d{1,2})\s*[-/.月]\s*(\d{1,2})")
+
+# CJK 統一漢字（含擴充 A 與相容字）以二字組斷詞，英數字以連續字元為一詞
+_TOKEN_RE = re.compile(r"[㐀-䶿一-鿿豈-﫿]+|[0-9a-z]+")
+
+Record = Dict[str, Any]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    sha256 TEXT,
+    meeting_date TEXT,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    meeting_date TEXT,
+    section TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS segments_path ON segments(path);
+CREATE INDEX IF NOT EXISTS segments_date ON segments(meeting_date);
+CREATE VIRTUAL TABLE IF NOT EXISTS segments_fts USING fts5(
+    tokens, tokenize = 'unicode61 remove_diacritics 0'
+);
+"""
+
+
+# ============ 斷詞 ============
+
+def _is_cjk(word: str) -> bool:
+    return not word.isascii()
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    CJK 感知斷詞：全形轉半形並轉小寫，中文連續字串切成二字組，英數字保留整個詞
+
+    Args:
+        text: 原始文字
+
+    Returns:
+        詞彙列表（依出現順序）
+    """
+    tokens = []
+    for word in _TOKEN_RE.findall(unicodedata.normalize("NFKC", text).lower()):
+        if _is_cjk(word) and len(word) > 1:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def build_match_query(query: str) -> Optional[str]:
+    """
+    將使用者查詢轉成 FTS5 MATCH 語法
+
+    每段中文轉成二字組片語（必須相鄰出現），英數字各自成為一個條件，
+    所有條件以 AND 結合；單一中文字以前綴查詢比對。
+
+    Returns:
+        MATCH 字串；查詢中沒有可檢索的字元時回傳 None
+    """
+    terms = []
+    for word in _TOKEN_RE.findall(unicodedata.normalize("NFKC", query).lower()):
+        if _is_cjk(word):
+            if len(word) == 1:
+                terms.append(f'"{word}"*')
+            else:
+                bigrams = " ".join(word[i:i + 2] for i in range(len(word) - 1))
+                terms.append(f'"{bigrams}"')
+        else:
+            terms.append(f'"{word}"')
+    return " AND ".join(terms) if terms else None
+
+
+# ============ 擷取 ============
+
+def match_section(text: str) -> Optional[str]:
+    """若段落為 section 標題則回傳 section 名稱，否則回傳 None"""
+    first_line = text.strip().split("\n", 1)[0]
+    candidate = _PAREN_RE.sub("", _ENUMERATOR_RE.sub("", first_line.strip()))
+    return _HEADER_LOOKUP.get(normalize_header(candidate))
+
+
+def meeting_date_from_filename(path: str) -> Optional[str]:
+    """由檔名中的 YYYYMMDD 取得會議日期（YYYY-MM-DD）"""
+    match = _FILENAME_DATE_RE.search(os.path.basename(path))
+    if not match:
+        return None
+    return "-".join(match.groups())
+
+
+def parse_meeting_date(text: str) -> Optional[str]:
+    """「民國114年12月3日」「2025/12/30」「2025-12-30」→ YYYY-MM-DD；無法辨識時回傳 None"""
+    match = _ROC_DATE_RE.search(text)
+    if match:
+        year, month, day = (int(value) for value in match.groups())
+        year += 1911
+    else:
+        match = _DATE_RE.search(text)
+        if not match:
+            return None
+        year, month, day = (int(value) for value in match.groups())
+    return f"{year:04d}-{month:02d}-{day:02d}"
+
+
+def iter_records(blocks: Iterable[Dict[str, Any]]) -> Iterator[Record]:
+    """
+    將 docx_extract.iter_blocks 的輸出切成帶 section 標記的紀錄
+
+    標題段落本身不輸出；表格列的儲存格以「 | 」串接，歸屬於所在的 section。
+
+    Yields:
+        {"section", "position", "text"}；position 為段落 / 表格列在文件中的順序
+    """
+    section = INFO_SECTION
+    for position, block in enumerate(blocks):
+        if block["type"] == "paragraph":
+            text = block["text"].strip()
+            if not text:
+                continue
+            header = match_section(text)
+            if header:
+                section = header
+                continue
+        else:
+            text = " | ".join(cell.strip() for cell in block["cells"] if cell.strip())
+            if not text:
+                continue
+        yield {"section": section, "position": position, "text": text}
+
+
+def extract_records(path: str) -> Tuple[str, Optional[str], List[Record], Optional[str]]:
+    """
+    擷取單一會議記錄（在 worker process 中執行）
+
+    Returns:
+        (路徑, 會議日期, 紀錄列表, 錯誤訊息)
+    """
+    try:
+        records = list(iter_records(iter_blocks(path)))
+    except Exception as e:
+        return path, None, [], f"{type(e).__name__}: {e}"
+
+    meeting_date = meeting_date_from_filename(path)
+    if meeting_date is None:
+        for record in records:
+            if record["section"] != INFO_SECTION:
+                break
+            meeting_date = parse_meeting_date(record["text"])
+            if meeting_date:
+                break
+    return path, meeting_date, records, None
+
+
+# ============ 索引 ============
+
+class MinutesIndex:
+    """
+    會議記錄全文索引（SQLite FTS5）
+
+    segments 保存原文與 section / 日期等欄位，segments_fts 以相同 rowid
+    保存斷詞結果；更新單一檔案只需刪除並重新寫入該檔案的紀錄。
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB, check_same_thread: bool = True):
+        self.db_path = db_path
+        # check_same_thread=False 時由呼叫端以鎖保護（如 minutes_service 的共用檢索器）
+        self.conn = sqlite3.connect(db_path, check_same_thread=check_same_thread)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(_SCHEMA)
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(files)")}
+        if "sha256" not in columns:
+            # 舊版索引沒有內容雜湊；補上欄位後，下次更新會為每個檔案計算一次
+            with self.conn:
+                self.conn.execute("ALTER TABLE files ADD COLUMN sha256 TEXT")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "MinutesIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ---------- 寫入 ----------
+
+    def _delete_segments(self, path: str) -> None:
+        self.conn.execute(
+            "DELETE FROM segments_fts WHERE rowid IN (SELECT id FROM segments WHERE path = ?)",
+            (path,),
+        )
+        self.conn.execute("DELETE FROM segments WHERE path = ?", (path,))
+
+    def replace_file(self, path: str, meeting_date: Optional[str], records: List[Record],
+                     size: int, mtime: float, sha256: Optional[str] = None) -> None:
+        """以新的紀錄取代某個檔案在索引中的所有內容"""
+        with self.conn:
+            self._delete_segments(path)
+            for record in records:
+                cursor = self.conn.execute(
+                    "INSERT INTO segments (path, meeting_date, section, position, text) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (path, meeting_date, record["section"], record["position"], record["text"]),
+                )
+                self.conn.execute(
+                    "INSERT INTO segments_fts (rowid, tokens) VALUES (?, ?)",
+                    (cursor.lastrowid, " ".join(tokenize(record["text"]))),
+                )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime, sha256, meeting_date, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (path, size, mtime, sha256, meeting_date, time.time()),
+            )
+
+    def remove_file(self, path: str) -> None:
+        """從索引移除某個檔案"""
+        with self.conn:
+            self._delete_segments(path)
+            self.conn.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def entries(self) -> Dict[str, Entry]:
+        """目前已索引檔案的 manifest entries（路徑 → size / mtime / sha256）"""
+        return {
+            row["path"]: {"size": row["size"], "mtime": row["mtime"], "sha256": row["sha256"]}
+            for row in self.conn.execute("SELECT path, size, mtime, sha256 FROM files")
+        }
+
+    def update(self, directory: str, pattern: str = "*.docx",
+               workers: Optional[int] = None) -> Dict[str, Any]:
+        """
+        增量更新資料夾內的會議記錄
+
+        只重新擷取新增或內容變更的檔案；修改時間變了但內容相同的檔案
+        只更新 files 表的 metadata。
+
+        Args:
+            directory: 會議記錄資料夾
+            pattern: 檔名篩選（fnmatch）
+            workers: 擷取用的 process 數量，預設為 CPU 核心數；1 表示不使用 process pool
+
+        Returns:
+            統計資訊（added、changed、touched、removed、unchanged、failed、errors、seconds）
+        """
+        start = time.perf_counter()
+        scan = scan_directory(directory, self.entries(), pattern)
+        stats = {**scan.counts(), "failed": 0, "errors": []}
+
+        for path, meeting_date, records, error in self._extract(scan.dirty, workers):
+            if error:
+                # 不寫入 files 表，下次更新會再重試
+                stats["failed"] += 1
+                stats["errors"].append((path, error))
+                continue
+            entry = scan.entries[path]
+            self.replace_file(path, meeting_date, records,
+                              entry["size"], entry["mtime"], entry["sha256"])
+
+        with self.conn:
+            self.conn.executemany(
+                "UPDATE files SET size = ?, mtime = ?, sha256 = ? WHERE path = ?",
+                [(scan.entries[path]["size"], scan.entries[path]["mtime"],
+                  scan.entries[path]["sha256"], path) for path in scan.touched],
+            )
+        for path in scan.removed:
+            self.remove_file(path)
+
+        if scan.dirty or scan.removed:
+            with self.conn:
+                self.conn.execute("INSERT INTO segments_fts (segments_fts) VALUES ('optimize')")
+        stats["seconds"] = time.perf_counter() - start
+        return stats
+
+    @staticmethod
+    def _extract(paths: List[str], workers: Optional[int]):
+        if len(paths) < 2 or workers == 1:
+            yield from map(extract_records, paths)
+            return
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(extract_records, paths, chunksize=4)
+
+    # ---------- 查詢 ----------
+
+    def search(self, query: str, section: Optional[str] = None,
+               since: Optional[str] = None, until: Optional[str] = None,
+               limit: int = 20, rank: bool = False) -> List[Dict[str, Any]]:
+        """
+        全文檢索
+
+        Args:
+            query: 查詢字串（空白分隔的多個詞需同時出現）
+            section: 只查詢特定 section（如 "儲存"）
+            since / until: 會議日期範圍（YYYY-MM-DD，含邊界）
+            limit: 最多回傳筆數
+            rank: True 時依 BM25 相關度排序，否則依會議日期由新到舊
+
+        Returns:
+            [{"meeting_date", "section", "text", "path", "position"}...]
+        """
+        match = build_match_query(query)
+        if match is None:
+            return []
+
+        sql = [
+            "SELECT s.meeting_date, s.section, s.text, s.path, s.position",
+            "FROM segments_fts JOIN segments s ON s.id = segments_fts.rowid",
+            "WHERE segments_fts MATCH ?",
+        ]
+        params: List[Any] = [match]
+        if section:
+            sql.append("AND s.section = ?")
+            params.append(section)
+        if since:
+            sql.append("AND s.meeting_date >= ?")
+            params.append(since)
+        if until:
+            sql.append("AND s.meeting_date <= ?")
+            params.append(until)
+        if rank:
+            sql.append("ORDER BY bm25(segments_fts)")
+        else:
+            sql.append("ORDER BY s.meeting_date DESC, s.path, s.position")
+        sql.append("LIMIT ?")
+        params.append(limit)
+
+        return [dict(row) for row in self.conn.execute(" ".join(sql), params)]
+
+    def summary(self) -> Dict[str, Any]:
+        """索引概況：檔案數、紀錄數、日期範圍、各 section 紀錄數"""
+        files, first, last = self.conn.execute(
+            "SELECT count(*), min(meeting_date), max(meeting_date) FROM files"
+        ).fetchone()
+        sections = dict(self.conn.execute(
+            "SELECT section, count(*) FROM segments GROUP BY section ORDER BY count(*) DESC"
+        ).fetchall())
+        return {
+            "files": files,
+            "segments": sum(sections.values()),
+            "first_meeting": first,
+            "last_meeting": last,
+            "sections": sections,
+        }
+
+
+# ============ CLI ============
+
+def main():
+    sys.stdout.reconfigure(encoding='utf-8')
+
+    parser = argparse.ArgumentParser(description="會議記錄全文檢索")
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"索引檔（預設：{DEFAULT_DB}）")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="建立 / 增量更新索引")
+    build.add_argument("directory", help="會議記錄資料夾")
+    build.add_argument("--pattern", default="*.docx", help="檔名篩選（預設：*.docx）")
+    build.add_argument("--workers", type=int, default=None, help="process 數量（預設：CPU 核心數）")
+
+    search = subparsers.add_parser("search", help="查詢索引")
+    search.add_argument("query", help="查詢字串，多個詞以空白分隔")
+    search.add_argument("--section", choices=[name for name, _ in SECTIONS], default=None)
+    search.add_argument("--since", default=None, help="起始會議日期 YYYY-MM-DD")
+    search.add_argument("--until", default=None, help="結束會議日期 YYYY-MM-DD")
+    search.add_argument("--limit", type=int, default=20)
+    search.add_argument("--rank", action="store_true", help="依相關度排序（預設依日期由新到舊）")
+
+    subparsers.add_parser("stats", help="顯示索引概況")
+    args = parser.parse_args()
+
+    with MinutesIndex(args.db) as index:
+        if args.command == "build":
+            stats = index.update(args.directory, args.pattern, args.workers)
+            for path, error in stats["errors"]:
+                print(f"❌ {path}：{error}")
+            print(f"✅ 新增 {stats['added']}、更新 {stats['changed']}、移除 {stats['removed']}、"
+                  f"僅時間變更 {stats['touched']}、未變更 {stats['unchanged']}、"
+                  f"失敗 {stats['failed']}，耗時 {stats['seconds']:.2f} 秒")
+
+        elif args.command == "search":
+            start = time.perf_counter()
+            results = index.search(args.query, args.section, args.since, args.until,
+                                   args.limit, args.rank)
+            elapsed = (time.perf_counter() - start) * 1000
+            for row in results:
+                print(f"{row['meeting_date'] or '????-??-??'}  [{row['section']}]  {row['text']}")
+                print(f"    {os.path.basename(row['path'])}")
+            print(f"🔍 {len(results)} 筆結果，查詢耗時 {elapsed:.1f} ms")
+
+        else:
+            summary = index.summary()
+            print(f"檔案：{summary['files']}　紀錄：{summary['segments']}　"
+                  f"期間：{summary['first_meeting']} ~ {summary['last_meeting']}")
+            for section, count in summary["sections"].items():
+                print(f"  {section:<10} {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,425 @@
+# -*- coding: utf-8 -*-
+"""
+常駐的會議摘要服務：模型用戶端、已編譯範本與快取保持暖機，工作排入持久化佇列
+
+每次執行 python meeting_pm_system.py 都要重新載入 SDK、設定用戶端與解析範本；
+本服務啟動時只做一次，之後每個會議只剩模型本身的時間。
+
+- 佇列存在 SQLite（jobs 資料表），服務重啟後未完成的工作會重新排入（至多 MAX_ATTEMPTS 次）
+- 固定數量的 worker 執行緒（--workers）限制同時進行的分析數
+- 本機 HTTP API 提交工作與查詢狀態
+
+用法：
+    python minutes_service.py --template 範本.docx --output-dir out --workers 2
+    MOCK_LLM_URL=http://127.0.0.1:8765 python minutes_service.py ...   # 使用 mock 後端
+
+API：
+    POST   /jobs          {"video_path": ..., "content_text": ..., "output_path": ..., "template": ...}
+                          → 202 {"id": ...}
+    GET    /jobs/<id>     工作狀態、各階段耗時、輸出路徑或錯誤訊息
+    GET    /jobs?status=queued&limit=50
+    DELETE /jobs/<id>     取消尚未開始的工作
+    GET    /health        佇列統計與 worker 數
+"""
+import argparse
+import json
+import os
+import signal
+import sqlite3
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from lazy_import import lazy_import
+from llm_backend import default_backend
+from meeting_pm_system import API_KEY, MeetingPMSummarizer, ReportGenerator
+
+# python-docx 只在服務真正啟動時載入（--help 不需要）
+docx_template = lazy_import("docx_template")
+
+DEFAULT_DB = "minutes_jobs.sqlite"
+DEFAULT_PORT = 8770
+# 服務中斷時執行到一半的工作最多重試幾次（避免讓程序崩潰的工作無限重排）
+MAX_ATTEMPTS = 3
+STATUSES = ("queued", "running", "done", "failed", "cancelled")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT PRIMARY KEY,
+    status      TEXT NOT NULL,
+    request     TEXT NOT NULL,
+    result      TEXT,
+    error       TEXT,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    created_at  REAL NOT NULL,
+    started_at  REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, created_at);
+"""
+
+
+# ============ 持久化佇列 ============
+
+class JobStore:
+    """
+    SQLite 工作佇列（多執行緒共用一個連線，以鎖保護）
+
+    Args:
+        db_path: 資料庫路徑
+    """
+
+    def __init__(self, db_path: str = DEFAULT_DB):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        # 上次服務中斷時執行到一半的工作重新排入；已嘗試 MAX_ATTEMPTS 次的標記為失敗
+        self.conn.execute(
+            "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? "
+            "WHERE status = 'running' AND attempts >= ?",
+            (f"服務在執行中中斷 {MAX_ATTEMPTS} 次，不再重試", time.time(), MAX_ATTEMPTS),
+        )
+        self.conn.execute("UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'")
+        self.conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
+
+    @staticmethod
+    def _row(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["request"] = json.loads(job["request"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def submit(self, request: Dict[str, Any]) -> str:
+        job_id = uuid.uuid4().hex[:12]
+        with self._available:
+            self.conn.execute(
+                "INSERT INTO jobs (id, status, request, created_at) VALUES (?, 'queued', ?, ?)",
+                (job_id, json.dumps(request, ensure_ascii=False), time.time()),
+            )
+            self.conn.commit()
+            self._available.notify()
+        return job_id
+
+    def claim(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """取出最早排入的工作並標記為 running；佇列為空時等待至多 timeout 秒"""
+        with self._available:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while True:
+                row = self.conn.execute(
+                    "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is not None:
+                    now = time.time()
+                    self.conn.execute(
+                        "UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                        (now, row["id"]),
+                    )
+                    self.conn.commit()
+                    job = self._row(row)
+                    job.update(status="running", started_at=now, attempts=row["attempts"] + 1)
+                    return job
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._available.wait(remaining)
+
+    def finish(self, job_id: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        with self._lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                ("failed" if error else "done",
+                 json.dumps(result, ensure_ascii=False) if result is not None else None,
+                 error, time.time(), job_id),
+            )
+            self.conn.commit()
+
+    def cancel(self, job_id: str) -> bool:
+        """取消尚未開始的工作；已開始或不存在時回傳 False"""
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id),
+            )
+            self.conn.commit()
+            return cursor.rowcount > 0
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row) if row else None
+
+    def list_jobs(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        sql = "SELECT * FROM jobs"
+        params: List[Any] = []
+        if status:
+            sql += " WHERE status = ?"
+            params.append(status)
+        sql += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [self._row(row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in STATUSES}
+        counts.update({status: count for status, count in rows})
+        return counts
+
+    def wake_all(self) -> None:
+        with self._available:
+            self._available.notify_all()
+
+
+# ============ 服務 ============
+
+class MinutesService:
+    """
+    暖機的會議摘要服務
+
+    Args:
+        store: 工作佇列
+        template_path: 預設範本
+        output_dir: 未指定 output_path 時的輸出資料夾
+        agent: MeetingPMSummarizer（整個服務共用同一個後端與 context cache）
+        workers: 同時執行的工作數
+        history_db: minutes_index 資料庫；存在時附上過往會議上下文（檢索器整個服務共用）
+    """
+
+    def __init__(self, store: JobStore, template_path: str, output_dir: str,
+                 agent: MeetingPMSummarizer, workers: int = 2, history_db: Optional[str] = None):
+        self.store = store
+        self.template_path = template_path
+        self.output_dir = output_dir
+        self.agent = agent
+        self.workers = workers
+        self.history_db = history_db
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        os.makedirs(output_dir, exist_ok=True)
+        # 啟動時先編譯範本，第一個工作不必等待
+        docx_template.load_template(template_path)
+        # 檢索器（SQLite 連線、embedder、向量索引）只建立一次，worker 之間以鎖共用
+        self._retriever = None
+        self._retriever_lock = threading.Lock()
+        self._history_version = None
+        if history_db and os.path.exists(history_db):
+            from minutes_context import MinutesContextRetriever
+            self._retriever = MinutesContextRetriever(history_db, check_same_thread=False)
+
+    def start(self) -> None:
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"minutes-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.store.wake_all()
+        for thread in self._threads:
+            thread.join()
+        if self._retriever is not None:
+            self._retriever.close()
+
+    def prior_context(self, k: int = 2, query_text: Optional[str] = None,
+                      before: Optional[str] = None) -> Optional[str]:
+        """
+        過往會議上下文
+
+        Args:
+            k: 每個分類的片段數
+            query_text: 本次會議的文字內容；依相關度挑選，None 時取最近的會議（不呼叫嵌入 API）
+            before: 只使用此日期（YYYY-MM-DD）之前的會議
+
+        索引被其他程序更新（minutes_index.py build）時重建向量索引。
+        """
+        if self._retriever is None:
+            return None
+        with self._retriever_lock:
+            if query_text:
+                version = self._retriever.index.conn.execute("PRAGMA data_version").fetchone()[0]
+                if version != self._history_version:
+                    self._retriever.refresh()
+                    self._history_version = version
+            context = self._retriever.build_context(query_text, k=k, before=before)
+        return context or None
+
+    def _worker(self) -> None:
+        while not self._stop.is_set():
+            job = self.store.claim(timeout=1.0)
+            if job is None:
+                continue
+            try:
+                result = self.run_job(job["id"], job["request"])
+            except Exception as e:
+                print(f"❌ 工作 {job['id']} 失敗：{type(e).__name__}: {e}")
+                self.store.finish(job["id"], error=f"{type(e).__name__}: {e}")
+            else:
+                print(f"✅ 工作 {job['id']} 完成：{result['output_path']}（{result['timings']['total']:.1f}s）")
+                self.store.finish(job["id"], result=result)
+
+    def run_job(self, job_id: str, request: Dict[str, Any]) -> Dict[str, Any]:
+        """執行一個工作：upload → analyze → 填入範本；回傳輸出路徑與各階段耗時"""
+        video_path = request.get("video_path")
+        content_text = request.get("content_text")
+        if not video_path and not content_text:
+            raise ValueError("需要 video_path 或 content_text")
+        template = docx_template.load_template(request.get("template") or self.template_path)
+        output_path = request.get("output_path") or os.path.join(self.output_dir, f"minutes-{job_id}.docx")
+
+        timings: Dict[str, float] = {}
+        start = time.perf_counter()
+        video_file = self.agent.upload_file(video_path) if video_path else None
+        timings["upload"] = time.perf_counter() - start
+
+        mark = time.perf_counter()
+        prior_context = None
+        if request.get("prior_context", True):
+            try:
+                from minutes_index import meeting_date_from_filename
+
+                # 依本次內容挑選相關的過往片段，並排除本次會議（檔名中的日期）本身
+                before = meeting_date_from_filename(video_path) if video_path else None
+                prior_context = self.prior_context(query_text=content_text, before=before)
+            except Exception as e:
+                # 過往上下文是選用的；索引或嵌入 API 出錯時照常分析
+                print(f"⚠️  工作 {job_id} 略過過往會議上下文：{type(e).__name__}: {e}")
+        data = self.agent.analyze_content(video_file, content_text=content_text, prior_context=prior_context)
+        timings["analyze"] = time.perf_counter() - mark
+
+        mark = time.perf_counter()
+        ReportGenerator(template).fill_report(data, output_path)
+        timings["render"] = time.perf_counter() - mark
+        timings["total"] = time.perf_counter() - start
+        return {"output_path": output_path, "timings": timings}
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            "status": "ok",
+            "workers": self.workers,
+            "backend": self.agent.backend.name,
+            "jobs": self.store.counts(),
+        }
+
+
+# ============ HTTP API ============
+
+def make_handler(service: MinutesService):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, body: Any) -> None:
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _job_id(self) -> Optional[str]:
+            parts = urlparse(self.path).path.strip("/").split("/")
+            return parts[1] if len(parts) == 2 and parts[0] == "jobs" else None
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/health":
+                self._send(200, service.health())
+            elif url.path == "/jobs":
+                query = parse_qs(url.query)
+                status = query.get("status", [None])[0]
+                try:
+                    limit = int(query.get("limit", ["50"])[0])
+                except ValueError:
+                    limit = 0
+                if limit <= 0:
+                    self._send(400, {"error": "limit must be a positive integer"})
+                    return
+                self._send(200, service.store.list_jobs(status, limit))
+            elif self._job_id():
+                job = service.store.get(self._job_id())
+                if job:
+                    self._send(200, job)
+                else:
+                    self._send(404, {"error": "job not found"})
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/jobs":
+                self._send(404, {"error": "not found"})
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                request = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._send(400, {"error": "invalid JSON"})
+                return
+            if not isinstance(request, dict) or not (request.get("video_path") or request.get("content_text")):
+                self._send(400, {"error": "video_path or content_text is required"})
+                return
+            self._send(202, {"id": service.store.submit(request)})
+
+        def do_DELETE(self):
+            job_id = self._job_id()
+            if job_id and service.store.cancel(job_id):
+                self._send(200, {"id": job_id, "status": "cancelled"})
+            else:
+                self._send(409, {"error": "job not found or already started"})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="常駐的會議摘要服務")
+    parser.add_argument("--template", required=True, help="預設範本 docx")
+    parser.add_argument("--output-dir", default="minutes_output")
+    parser.add_argument("--db", default=DEFAULT_DB, help="工作佇列資料庫")
+    parser.add_argument("--history-db", default=None, help="minutes_index 資料庫（附上過往會議上下文）")
+    parser.add_argument("--workers", type=int, default=2, help="同時執行的工作數")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    backend = default_backend(API_KEY, MeetingPMSummarizer.MODEL_NAME, cache_label="Senior PM")
+    if backend is None:
+        raise SystemExit("❌ 請設定 GEMINI_API_KEY 或 MOCK_LLM_URL")
+
+    store = JobStore(args.db)
+    service = MinutesService(store, args.template, args.output_dir, MeetingPMSummarizer(backend=backend),
+                             workers=args.workers, history_db=args.history_db)
+    service.start()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    server.daemon_threads = True
+    counts = store.counts()
+    print(f"🚀 會議摘要服務：http://{args.host}:{args.port}（{backend.name}，{args.workers} 個 worker，"
+          f"待處理 {counts['queued']} 個工作）")
+    # SIGTERM（服務管理程式停止服務）與 Ctrl+C 相同：不再接受請求，等待執行中的工作完成
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+        print(backend.report())
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
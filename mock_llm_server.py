@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""
+本機 mock LLM 伺服器：模擬 Gemini 的延遲、輸出速度與失敗，用於壓力測試
+
+回應內容為固定的會議摘要 JSON（MINUTES_SCHEMA 結構）；收到 llm_json 的
+「只重新請求部分欄位」指示時，只回傳被要求的欄位。
+
+延遲模型：總延遲 = 首 token 延遲（依分布抽樣）+ 輸出 token 數 / 每秒 token 數
+失敗注入（依機率）：
+    error_rate      HTTP 500
+    rate_limit_rate HTTP 429
+    timeout_rate    延遲 timeout_seconds 後才回應（觸發用戶端逾時）
+    malformed_rate  回傳被截斷的 JSON（測試 llm_json 的修復）
+max_concurrency 超過時回傳 429，模擬配額上限。
+
+用法：
+    python mock_llm_server.py --port 8765 --latency lognormal --latency-median 2 --tokens-per-sec 80
+    MOCK_LLM_URL=http://127.0.0.1:8765 python meeting_pm_system.py
+
+端點：
+    POST /v1/generate   {"parts": [{"text": ...} | {"file": ...}], "generation_config": {...}}
+    GET  /health
+    GET  /stats
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+# 大約每 4 個字元 1 個 token（中英混合的粗估值）
+CHARS_PER_TOKEN = 4
+FILE_TOKENS = 20000  # 上傳的影片 / 檔案以固定 token 數計
+
+REFETCH_MARKER = "Return ONLY a JSON object with exactly this structure"
+
+SAMPLE_MINUTES = {
+    "meeting_info": {
+        "date_time": "2025/12/10 (三) 13:30-15:00",
+        "location": "是方機房會議室 / Teams",
+        "attendees": "NSL 技術小組、機房搬遷組、網路組、儲存組、SAP 組",
+    },
+    "key_records": {
+        "migration": [
+            "階段三搬遷前置規劃：動線計畫已提交初版，12/13 報告。",
+            "資源盤點協調中，預計下週確認機櫃櫃位。",
+        ],
+        "services": ["子任務整體進度 95%，DCIM 驗收進行中。"],
+        "network_security": ["網路整合測試 38%，Internet 區域測試進行中。"],
+        "storage": ["光纖接線表已填寫，待主機端 WWN/LUN。"],
+        "sap": ["NPRD HANA 設備 12/9 到貨上架，優先安裝 D+Q OS。"],
+        "wenxin": ["12/19、12/20 執行 NPRD 第二次搬遷。"],
+        "modernization": ["D 環境腳本完成度 80%。"],
+    },
+    "action_items": [
+        "提交完整機櫃櫃位圖 (負責：廠商 / 期限：本週)",
+        "報告動線計畫 (負責：搬遷團隊 / 期限：12/13)",
+        "報告網路切換計畫 (負責：網路團隊 / 期限：本週)",
+    ],
+    "risk_management": ["無"],
+    "other_matters": ["無"],
+}
+
+
+@dataclass
+class MockConfig:
+    latency: str = "lognormal"        # fixed / uniform / lognormal
+    latency_median: float = 2.0       # 首 token 延遲中位數（秒）
+    latency_sigma: float = 0.5        # lognormal 的 sigma；uniform 時為 ±比例
+    tokens_per_sec: float = 80.0      # 輸出速度；0 表示不模擬
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    timeout_rate: float = 0.0
+    timeout_seconds: float = 120.0
+    malformed_rate: float = 0.0
+    max_concurrency: int = 0          # 0 表示不限制
+    seed: Optional[int] = None
+
+
+@dataclass
+class MockStats:
+    requests: int = 0
+    ok: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+    timeouts: int = 0
+    malformed: int = 0
+    in_flight: int = 0
+    max_in_flight: int = 0
+    latencies: List[float] = field(default_factory=list)
+
+
+def _fill_example(node: Any, source: Any) -> Any:
+    """依重新請求的結構，從樣本中取出對應欄位（樣本沒有的欄位填入 mock 值）"""
+    if isinstance(node, dict):
+        source = source if isinstance(source, dict) else {}
+        return {key: _fill_example(value, source.get(key)) for key, value in node.items()}
+    if source is not None:
+        return source
+    if isinstance(node, list):
+        return ["mock"]
+    return "mock"
+
+
+class MockLLM:
+    """mock 的回應產生、延遲與失敗注入（與 HTTP 無關，可直接在測試中使用）"""
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.stats = MockStats()
+        self._rng = random.Random(config.seed)
+        self._lock = threading.Lock()
+
+    def _sample_latency(self) -> float:
+        config = self.config
+        with self._lock:
+            if config.latency == "fixed":
+                return config.latency_median
+            if config.latency == "uniform":
+                spread = config.latency_median * config.latency_sigma
+                return max(0.0, self._rng.uniform(config.latency_median - spread, config.latency_median + spread))
+            return config.latency_median * math.exp(self._rng.gauss(0.0, config.latency_sigma))
+
+    def _roll(self, rate: float) -> bool:
+        if rate <= 0:
+            return False
+        with self._lock:
+            return self._rng.random() < rate
+
+    @staticmethod
+    def _prompt_tokens(parts: List[Dict[str, Any]]) -> int:
+        tokens = 0
+        for part in parts:
+            if "file" in part:
+                tokens += FILE_TOKENS
+            else:
+                tokens += len(part.get("text", "")) // CHARS_PER_TOKEN
+        return tokens
+
+    @staticmethod
+    def _response_text(parts: List[Dict[str, Any]]) -> str:
+        last_text = next((part["text"] for part in reversed(parts) if "text" in part), "")
+        if REFETCH_MARKER in last_text:
+            match = re.search(r"\{.*\}", last_text[last_text.index(REFETCH_MARKER):], re.DOTALL)
+            if match:
+                try:
+                    wanted = json.loads(match.group(0))
+                    return json.dumps(_fill_example(wanted, SAMPLE_MINUTES), ensure_ascii=False)
+                except ValueError:
+                    pass
+        return json.dumps(SAMPLE_MINUTES, ensure_ascii=False, indent=2)
+
+    def handle(self, payload: Dict[str, Any]):
+        """
+        處理一次 generate 請求
+
+        Returns:
+            (HTTP 狀態碼, 回應 dict)
+        """
+        config = self.config
+        start = time.perf_counter()
+        with self._lock:
+            self.stats.requests += 1
+            if config.max_concurrency and self.stats.in_flight >= config.max_concurrency:
+                self.stats.rate_limited += 1
+                return 429, {"error": "RESOURCE_EXHAUSTED: concurrency limit"}
+            self.stats.in_flight += 1
+            self.stats.max_in_flight = max(self.stats.max_in_flight, self.stats.in_flight)
+
+        try:
+            parts = payload.get("parts", [])
+            if self._roll(config.rate_limit_rate):
+                with self._lock:
+                    self.stats.rate_limited += 1
+                return 429, {"error": "RESOURCE_EXHAUSTED: injected rate limit"}
+
+            time.sleep(self._sample_latency())
+
+            if self._roll(config.error_rate):
+                with self._lock:
+                    self.stats.errors += 1
+                return 500, {"error": "INTERNAL: injected failure"}
+            if self._roll(config.timeout_rate):
+                with self._lock:
+                    self.stats.timeouts += 1
+                time.sleep(config.timeout_seconds)
+                return 504, {"error": "DEADLINE_EXCEEDED: injected timeout"}
+
+            text = self._response_text(parts)
+            output_tokens = max(1, len(text) // CHARS_PER_TOKEN)
+            if config.tokens_per_sec > 0:
+                time.sleep(output_tokens / config.tokens_per_sec)
+
+            if self._roll(config.malformed_rate):
+                with self._lock:
+                    self.stats.malformed += 1
+                text = text[: int(len(text) * 0.8)]
+
+            with self._lock:
+                self.stats.ok += 1
+                self.stats.latencies.append(time.perf_counter() - start)
+            return 200, {
+                "text": text,
+                "usage": {"prompt_tokens": self._prompt_tokens(parts), "output_tokens": output_tokens},
+            }
+        finally:
+            with self._lock:
+                self.stats.in_flight -= 1
+
+    def stats_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = self.stats
+            latencies = sorted(stats.latencies)
+            result = {key: value for key, value in vars(stats).items() if key != "latencies"}
+        if latencies:
+            result["p50_seconds"] = latencies[len(latencies) // 2]
+            result["p95_seconds"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        return result
+
+
+def make_handler(mock: MockLLM):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status: int, body: Dict[str, Any]) -> None:
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, {"status": "ok"})
+            elif self.path == "/stats":
+                self._send(200, mock.stats_dict())
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._send(400, {"error": "invalid JSON"})
+                return
+            if self.path != "/v1/generate":
+                self._send(404, {"error": "not found"})
+                return
+            status, body = mock.handle(payload)
+            try:
+                self._send(status, body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # 用戶端已逾時斷線
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_server(config: MockConfig, host: str = "127.0.0.1", port: int = 0):
+    """
+    在背景執行緒啟動 mock 伺服器
+
+    Returns:
+        (server, mock, base_url)；結束時呼叫 server.shutdown()
+    """
+    mock = MockLLM(config)
+    server = ThreadingHTTPServer((host, port), make_handler(mock))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, mock, f"http://{host}:{server.server_address[1]}"
+
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = MockConfig()
+    parser.add_argument("--latency", choices=["fixed", "uniform", "lognormal"], default=defaults.latency)
+    parser.add_argument("--latency-median", type=float, default=defaults.latency_median, help="首 token 延遲中位數（秒）")
+    parser.add_argument("--latency-sigma", type=float, default=defaults.latency_sigma)
+    parser.add_argument("--tokens-per-sec", type=float, default=defaults.tokens_per_sec)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-seconds", type=float, default=defaults.timeout_seconds)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--max-concurrency", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def config_from_args(args: argparse.Namespace) -> MockConfig:
+    return MockConfig(**{name: getattr(args, name) for name in MockConfig.__dataclass_fields__})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本機 mock LLM 伺服器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    mock = MockLLM(config_from_args(args))
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(mock))
+    server.daemon_threads = True
+    print(f"🧪 mock LLM 伺服器：http://{args.host}:{args.port}（Ctrl+C 結束）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(mock.stats_dict(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+直接輸出 WordprocessingML 的會議記錄產生器
+
+與 convert_json_to_word.create_word_from_json 使用相同的 JSON 結構與版面
+（標題、metadata / 出席人員、List Bullet 項目、待辦事項表格、風險與備註），
+但不建立任何 python-docx 物件：document.xml 以字串片段直接串流寫入 zip，
+記憶體用量不隨待辦 / 風險列數成長。
+
+styles、numbering 等其他 part 取自 python-docx 預設範本（Normal 樣式同樣
+設為 Times New Roman / 標楷體），只在第一次使用時建立並壓縮一次。
+"""
+import io
+import itertools
+import re
+import threading
+import zipfile
+from typing import Iterable, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+from docx import Document
+from docx.oxml.ns import qn
+
+from convert_json_to_word import ATTENDEE_GROUPS, META_FIELDS, SUB_SECTIONS
+
+DOCUMENT_PART = "word/document.xml"
+
+# python-docx 預設範本的內文寬度（twips），表格欄寬依此平均分配
+BLOCK_WIDTH = 8640
+
+# 每累積多少個片段寫入一次 zip stream
+FLUSH_EVERY = 512
+
+# XML 1.0 不允許的控制字元
+_INVALID_XML_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_RUN_SPLIT_RE = re.compile(r"([\t\n\r])")
+
+_TABLE_PROPS = (
+    '<w:tblPr><w:tblStyle w:val="TableGrid"/><w:tblW w:type="auto" w:w="0"/>'
+    '<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0" '
+    'w:noHBand="0" w:noVBand="1" w:val="04A0"/></w:tblPr>'
+)
+
+Run = Tuple[str, bool]
+
+_base = None
+_base_lock = threading.Lock()
+
+
+def _base_package() -> Tuple[bytes, str, str]:
+    """
+    建立（並快取）基底套件
+
+    Returns:
+        (不含 document.xml 的 zip bytes, document.xml 中 <w:body> 之前的片段,
+         <w:sectPr> 起到結尾的片段)
+    """
+    global _base
+    with _base_lock:
+        if _base is None:
+            document = Document()
+            style = document.styles['Normal']
+            style.font.name = 'Times New Roman'
+            style.element.rPr.rFonts.set(qn('w:eastAsia'), '標楷體')
+
+            saved = io.BytesIO()
+            document.save(saved)
+
+            static = io.BytesIO()
+            with zipfile.ZipFile(saved) as source, \
+                    zipfile.ZipFile(static, "w", zipfile.ZIP_DEFLATED) as target:
+                for info in source.infolist():
+                    if info.filename == DOCUMENT_PART:
+                        document_xml = source.read(info).decode("utf-8")
+                    else:
+                        target.writestr(info, source.read(info))
+
+            body_start = document_xml.index("<w:body>") + len("<w:body>")
+            sect_start = document_xml.index("<w:sectPr", body_start)
+            _base = (static.getvalue(), document_xml[:body_start], document_xml[sect_start:])
+        return _base
+
+
+def _run(text: str, bold: bool = False) -> str:
+    """對應 python-docx 的 Run.text：\\t → <w:tab/>，換行 → <w:br/>"""
+    props = "<w:rPr><w:b/></w:rPr>" if bold else ""
+    if not text:
+        return f"<w:r>{props}</w:r>" if props else "<w:r/>"
+
+    content = []
+    for chunk in _RUN_SPLIT_RE.split(_INVALID_XML_RE.sub("", text)):
+        if not chunk:
+            continue
+        if chunk == "\t":
+            content.append("<w:tab/>")
+        elif chunk in ("\n", "\r"):
+            content.append("<w:br/>")
+        elif chunk != chunk.strip():
+            content.append(f'<w:t xml:space="preserve">{escape(chunk)}</w:t>')
+        else:
+            content.append(f"<w:t>{escape(chunk)}</w:t>")
+    return f"<w:r>{props}{''.join(content)}</w:r>"
+
+
+def _paragraph(runs: Iterable[Run] = (), style: Optional[str] = None, center: bool = False) -> str:
+    props = ""
+    if style or center:
+        props = "<w:pPr>"
+        if style:
+            props += f'<w:pStyle w:val="{style}"/>'
+        if center:
+            props += '<w:jc w:val="center"/>'
+        props += "</w:pPr>"
+    body = "".join(_run(text, bold) for text, bold in runs)
+    if not props and not body:
+        return "<w:p/>"
+    return f"<w:p>{props}{body}</w:p>"
+
+
+def _table(rows: Iterable[List[str]], cols: int = 2) -> Iterable[str]:
+    """Table Grid 樣式的表格，逐列產生 XML 片段"""
+    width = BLOCK_WIDTH // cols
+    cell_props = f'<w:tcPr><w:tcW w:type="dxa" w:w="{width}"/></w:tcPr>'
+    yield "<w:tbl>" + _TABLE_PROPS + "<w:tblGrid>" + f'<w:gridCol w:w="{width}"/>' * cols + "</w:tblGrid>"
+    for row in rows:
+        yield "<w:tr>" + "".join(
+            f"<w:tc>{cell_props}<w:p>{_run(text)}</w:p></w:tc>" for text in row
+        ) + "</w:tr>"
+    yield "</w:tbl>"
+
+
+def iter_body_xml(json_data) -> Iterable[str]:
+    """
+    依 create_word_from_json 的版面產生 <w:body> 內的 XML 片段
+
+    Args:
+        json_data: {"meeting_minutes": {...}} 格式的會議記錄
+
+    Yields:
+        段落 / 表格的 XML 字串
+    """
+    minutes = json_data.get("meeting_minutes", {})
+
+    # 1. Title
+    yield _paragraph([(minutes.get("title", "會議記錄"), False)], "Heading1", center=True)
+
+    # 2. Metadata Table
+    metadata = minutes.get("metadata", {})
+    yield from _table([label, metadata.get(key, "")] for label, key in META_FIELDS)
+    yield _paragraph()
+
+    # 3. Attendees
+    yield _paragraph([("出席人員 (Attendees)", False)], "Heading2")
+    attendees = minutes.get("attendees", {})
+    for category, key in ATTENDEE_GROUPS:
+        yield _paragraph([(f"{category}：", True), (", ".join(attendees.get(key, [])), False)])
+
+    # 4. Discussion Records
+    yield _paragraph([("討論事項 (Discussion Records)", False)], "Heading2")
+    discussions = minutes.get("discussion_records", {})
+    section_one = discussions.get("section_one_key_records", {})
+    overall = section_one.get("overall_progress_summary", "")
+    if overall:
+        yield _paragraph([("整體進度摘要", False)], "Heading3")
+        yield _paragraph([(overall, False)])
+
+    sub_sections = section_one.get("sub_sections", {})
+    for title, key in SUB_SECTIONS:
+        item = sub_sections.get(key, {})
+        if item:
+            yield _paragraph([(title, False)], "Heading3")
+            if "owner" in item:
+                yield _paragraph([("負責人: ", True), (item["owner"], False)])
+            for detail in item.get("details", []):
+                yield _paragraph([(detail, False)], "ListBullet")
+
+    # 5. Action Items
+    yield _paragraph([("待辦事項 (Action Items)", False)], "Heading2")
+    todos = discussions.get("section_two_todos", [])
+    if todos:
+        header = [["負責人 (Owner)", "任務內容 (Task)"]]
+        rows = ([todo.get("owner", ""), todo.get("task", "")] for todo in todos)
+        yield from _table(itertools.chain(header, rows))
+    yield _paragraph()
+
+    # 6. Risks
+    yield _paragraph([("風險項目 (Risks)", False)], "Heading2")
+    for risk in discussions.get("section_three_risks", []):
+        yield _paragraph(
+            [(f"[{risk.get('risk_item', '')}] ", True), (risk.get("description", ""), False)],
+            "ListNumber",
+        )
+
+    # 7. Other Notes
+    yield _paragraph([("其他備註 (Other Notes)", False)], "Heading2")
+    for note in discussions.get("section_four_others", []):
+        yield _paragraph([(note, False)], "ListBullet")
+
+
+def write_minutes_docx(json_data, output) -> None:
+    """
+    將會議記錄 JSON 直接寫成 .docx
+
+    Args:
+        json_data: {"meeting_minutes": {...}} 格式的會議記錄
+        output: 輸出路徑，或可讀寫、可 seek 的二進位 stream
+    """
+    static_parts, prefix, suffix = _base_package()
+
+    stream = open(output, "w+b") if isinstance(output, str) else output
+    try:
+        stream.write(static_parts)
+        stream.seek(0)
+        with zipfile.ZipFile(stream, "a", zipfile.ZIP_DEFLATED) as archive:
+            with archive.open(DOCUMENT_PART, "w", force_zip64=True) as part:
+                part.write(prefix.encode("utf-8"))
+                pending = []
+                for fragment in iter_body_xml(json_data):
+                    pending.append(fragment)
+                    if len(pending) >= FLUSH_EVERY:
+                        part.write("".join(pending).encode("utf-8"))
+                        pending = []
+                pending.append(suffix)
+                part.write("".join(pending).encode("utf-8"))
+    finally:
+        if stream is not output:
+            stream.close()
@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+"""
+管線效能剖析：--profile 時記錄每個階段的 CPU 與記憶體用量
+
+    with profiled("twitterhot_etl", profile_output_dir(args)):
+        main(...)
+
+    # 管線內部（未啟用剖析時不做任何事）
+    with stage("fill"):
+        generator.fill_sections(sections)
+
+每個階段記錄：
+- cProfile：函式層級的 CPU 時間（只涵蓋主執行緒）
+- tracemalloc：階段內的記憶體峰值與增量，以及增量最大那次結束時佔用最多的配置位置
+- 取樣：每 interval 秒擷取所有執行緒的呼叫堆疊（含 worker 執行緒），
+  以階段路徑為根節點，輸出 collapsed stacks
+
+輸出到 output_dir（預設 profiles/），檔名為 <名稱>-<時間>：
+- .folded：flamegraph.pl、inferno、speedscope 可直接讀取
+- .prof：pstats 格式（python -m pstats、snakeviz）
+- .txt：與畫面相同的摘要，外加各階段的前 N 個函式
+
+注意：cProfile 與 tracemalloc 會讓程式變慢數倍，剖析結果用來比較相對比例，
+絕對耗時以 bench_*.py 為準。
+"""
+import argparse
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_DIR = "profiles"
+TOP_N = 15
+INTERVAL = 0.005
+ALLOCATION_SITES = 3
+# 峰值增量超過此值（且比之前的最大值多 25%）時才擷取配置位置；snapshot 很慢
+SNAPSHOT_MIN_GROWTH = 2 ** 20
+
+# 目前啟用的 profiler（同一時間只有一個）
+_active: Optional["PipelineProfiler"] = None
+
+
+@dataclass
+class StageStats:
+    """
+    一個階段（依路徑彙總，重複進入時累加）
+
+    Attributes:
+        calls: 進入次數
+        wall: 累計時間（秒，含子階段）
+        peak: 記憶體峰值（bytes，tracemalloc 追蹤的總量）
+        growth: 單次進入的最大峰值增量（峰值 - 進入時的用量）
+        allocations: 峰值增量最大那次結束時，佔用記憶體最多的配置位置（位置, bytes）
+    """
+    calls: int = 0
+    wall: float = 0.0
+    peak: int = 0
+    growth: int = 0
+    allocations: List[Tuple[str, int]] = field(default_factory=list)
+    profile: cProfile.Profile = field(default_factory=cProfile.Profile, repr=False)
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _megabytes(size: int) -> str:
+    return f"{size / 2 ** 20:.1f} MB"
+
+
+class PipelineProfiler:
+    """
+    剖析一次執行
+
+    Args:
+        name: 輸出檔名的前綴與堆疊的根節點
+        output_dir: 輸出目錄
+        top: 摘要列出的函式數
+        interval: 堆疊取樣間隔（秒）
+    """
+
+    def __init__(self, name: str, output_dir: str = DEFAULT_DIR, top: int = TOP_N,
+                 interval: float = INTERVAL):
+        self.name = name
+        self.output_dir = output_dir
+        self.top = top
+        self.interval = interval
+        self.stages: Dict[Tuple[str, ...], StageStats] = {}
+        self.samples: Counter = Counter()
+        self._path: Tuple[str, ...] = ()
+        # 進入中的階段：[統計, 開始時間, 進入時的記憶體用量, 本次的峰值, 進入時的 overhead]
+        self._stack: List[list] = []
+        # 擷取 snapshot 花費的時間（不計入階段時間，也不取樣）
+        self._overhead = 0.0
+        self._paused = False
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._started_tracemalloc = False
+
+    # ============ 階段 ============
+
+    def _stats(self, path: Tuple[str, ...]) -> StageStats:
+        if path not in self.stages:
+            self.stages[path] = StageStats()
+        return self.stages[path]
+
+    def _push(self, path: Tuple[str, ...]) -> None:
+        if self._stack:
+            self._stack[-1][0].profile.disable()
+            self._stack[-1][3] = max(self._stack[-1][3], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        stats = self._stats(path)
+        stats.calls += 1
+        current = tracemalloc.get_traced_memory()[0]
+        self._stack.append([stats, time.perf_counter(), current, current, self._overhead])
+        self._path = path
+        stats.profile.enable()
+
+    def _pop(self) -> None:
+        stats, started, baseline, peak, overhead = self._stack.pop()
+        stats.profile.disable()
+        stats.wall += time.perf_counter() - started - (self._overhead - overhead)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        stats.peak = max(stats.peak, peak)
+        if peak - baseline > stats.growth:
+            if peak - baseline >= max(SNAPSHOT_MIN_GROWTH, stats.growth * 1.25):
+                stats.allocations = self._allocation_sites()
+            stats.growth = peak - baseline
+        tracemalloc.reset_peak()
+        self._path = self._path[:-1]
+        if self._stack:
+            self._stack[-1][3] = max(self._stack[-1][3], peak)
+            self._stack[-1][0].profile.enable()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if threading.current_thread() is not threading.main_thread():
+            # cProfile 與階段路徑只追蹤主執行緒
+            yield
+            return
+        self._push(self._path + (name,))
+        try:
+            yield
+        finally:
+            self._pop()
+
+    def _allocation_sites(self) -> List[Tuple[str, int]]:
+        started = time.perf_counter()
+        self._paused = True
+        try:
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            ])
+            return [(f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}", stat.size)
+                    for stat in snapshot.statistics("lineno")[:ALLOCATION_SITES]]
+        finally:
+            self._paused = False
+            self._overhead += time.perf_counter() - started
+
+    # ============ 取樣 ============
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            if self._paused:
+                continue
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            root = ";".join((self.name,) + self._path)
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                if ident != threading.main_thread().ident:
+                    stack.append(f"[{names.get(ident, ident)}]")
+                self.samples[root + ";" + ";".join(reversed(stack))] += 1
+
+    # ============ 開始 / 結束 ============
+
+    def start(self) -> None:
+        global _active
+        if _active is not None:
+            raise RuntimeError(f"已有啟用中的 profiler：{_active.name}")
+        _active = self
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._sampler = threading.Thread(target=self._sample, name="pipeline-profile", daemon=True)
+        self._sampler.start()
+        self._push(())
+
+    def stop(self) -> Dict[str, str]:
+        """
+        結束剖析並寫出結果
+
+        Returns:
+            {"folded": 路徑, "prof": 路徑, "txt": 路徑}
+        """
+        global _active
+        while self._stack:
+            self._pop()
+        self._stop.set()
+        self._sampler.join()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+        _active = None
+        return self.write()
+
+    # ============ 輸出 ============
+
+    def _function_stats(self, stats: StageStats) -> Optional[pstats.Stats]:
+        try:
+            return pstats.Stats(stats.profile)
+        except TypeError:
+            # 階段內沒有任何函式呼叫
+            return None
+
+    def _combined_stats(self) -> Optional[pstats.Stats]:
+        combined = [stats for stats in map(self._function_stats, self.stages.values()) if stats]
+        for stats in combined[1:]:
+            combined[0].add(stats)
+        return combined[0] if combined else None
+
+    def _top_functions(self, stats: Optional[pstats.Stats], limit: int) -> List[str]:
+        if stats is None:
+            return []
+        rows = sorted(stats.stats.items(), key=lambda item: -item[1][2])[:limit]
+        lines = []
+        for (filename, lineno, func), (_, calls, tottime, cumtime, _) in rows:
+            label = f"{func} ({os.path.basename(filename)}:{lineno})" if lineno else func
+            lines.append(f"  {tottime:>8.3f}s {cumtime:>8.3f}s {calls:>9}  {label}")
+        return lines
+
+    def summary(self, per_stage: int = 0) -> str:
+        """
+        摘要：各階段的時間與記憶體，以及整體 self time 最高的函式
+
+        Args:
+            per_stage: 各階段另外列出的函式數（0 表示不列）
+        """
+        lines = [f"⏱️  效能剖析：{self.name}",
+                 f"  {'階段':<28} {'次數':>6} {'時間':>9} {'峰值':>10} {'增量':>10}  主要配置"]
+        for path, stats in self.stages.items():
+            label = "  " * len(path) + (path[-1] if path else "(全部)")
+            site = f"{stats.allocations[0][0]} {_megabytes(stats.allocations[0][1])}" if stats.allocations else ""
+            lines.append(f"  {label:<28} {stats.calls:>6} {stats.wall:>8.2f}s "
+                         f"{_megabytes(stats.peak):>10} {_megabytes(stats.growth):>10}  {site}")
+
+        total = self._combined_stats()
+        if total is not None:
+            lines.append(f"  前 {self.top} 個函式（self time，僅主執行緒）：")
+            lines.append(f"  {'self':>9} {'cumulative':>9} {'calls':>9}  function")
+            lines.extend(self._top_functions(total, self.top))
+
+        if per_stage:
+            for path, stats in self.stages.items():
+                lines.append(f"\n[{'/'.join(path) or '(階段外)'}]")
+                lines.extend(self._top_functions(self._function_stats(stats), per_stage))
+                for site, size in stats.allocations:
+                    lines.append(f"  配置 {site} {_megabytes(size)}")
+        return "\n".join(lines)
+
+    def write(self) -> Dict[str, str]:
+        os.makedirs(self.output_dir, exist_ok=True)
+        prefix = os.path.join(self.output_dir, f"{self.name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+        paths = {"folded": prefix + ".folded", "prof": prefix + ".prof", "txt": prefix + ".txt"}
+
+        with open(paths["folded"], "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+        total = self._combined_stats()
+        if total is not None:
+            total.dump_stats(paths["prof"])
+        else:
+            del paths["prof"]
+
+        with open(paths["txt"], "w", encoding="utf-8") as f:
+            f.write(self.summary(per_stage=self.top) + "\n")
+        return paths
+
+
+# ============ 入口點使用 ============
+
+def add_profile_argument(parser, suppress_defaults: bool = False) -> None:
+    """
+    加入 --profile 與 --profile-dir 參數（以 profile_output_dir 取得輸出目錄）
+
+    Args:
+        parser: argparse parser
+        suppress_defaults: 不設定預設值（加在子命令上時使用，避免覆蓋上層 parser 的值）
+    """
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        default=argparse.SUPPRESS if suppress_defaults else False,
+        help=f"記錄各階段的 CPU / 記憶體用量，輸出 flamegraph 堆疊與摘要（預設到 {DEFAULT_DIR}/）"
+    )
+    parser.add_argument(
+        "--profile-dir",
+        default=argparse.SUPPRESS if suppress_defaults else None,
+        metavar="DIR",
+        help="剖析結果的輸出目錄（指定時即啟用 --profile）"
+    )
+
+
+def profile_output_dir(args) -> Optional[str]:
+    """--profile / --profile-dir 的輸出目錄；未啟用剖析時為 None"""
+    if getattr(args, "profile_dir", None):
+        return args.profile_dir
+    return DEFAULT_DIR if getattr(args, "profile", False) else None
+
+
+@contextmanager
+def profiled(name: str, output_dir: Optional[str], top: int = TOP_N) -> Iterator[Optional[PipelineProfiler]]:
+    """
+    output_dir 有值時剖析區塊內的執行，結束時印出摘要
+
+    Args:
+        name: 輸出檔名的前綴
+        output_dir: 輸出目錄（None 表示不剖析）
+        top: 摘要列出的函式數
+    """
+    if not output_dir:
+        yield None
+        return
+    profiler = PipelineProfiler(name, output_dir, top)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        paths = profiler.stop()
+        print(profiler.summary())
+        print(f"  📁 {', '.join(paths.values())}")
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """標記管線階段；未啟用剖析時不做任何事"""
+    profiler = _active
+    if profiler is None:
+        yield
+        return
+    with profiler.stage(name):
+        yield
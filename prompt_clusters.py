@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+"""
+每日 prompt 分群：以向量嵌入將當天的 prompt 分群，並挑出每群的代表
+
+分群模型（centroid、各群累計數量、群 ID）存成 .npz，每天增量更新，不重新分群歷史資料：
+
+1. 當天向量與既有 centroid 的 cosine 相似度 ≥ threshold → 歸入該群，
+   centroid 以 mini-batch k-means 的方式往新成員移動（學習率 1 / 累計數量）
+2. 其餘向量以 mini-batch k-means 分成新群（約 target_size 個一群），附加到模型
+
+相似度以固定大小的區塊計算（區塊大小由 memory_mb 決定），
+mini-batch k-means 每次只取 batch_size 個樣本，一天數萬個 prompt 時記憶體用量仍固定。
+模型最多保留 max_clusters 個群（768 維時約 60 MB）；超過時移除累計數量最少、
+當天沒有成員的群，長期執行時模型大小與 assign 的成本都有上限。
+每群的代表為當天成員中最接近 centroid 者。
+
+用法：
+    python twitterhot_etl.py --cluster-model twitterhot_clusters.npz
+    python prompt_clusters.py twitterhot_prompts_*.json --model twitterhot_clusters.npz [--write]
+"""
+import argparse
+import glob
+import json
+import math
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from embedding_codec import ProductQuantizer, decode_embedding
+from lazy_import import lazy_import
+
+# 第一次分群時才載入（twitterhot_etl --help 不需要 numpy）
+np = lazy_import("numpy")
+
+THRESHOLD = 0.75
+TARGET_SIZE = 20
+MAX_NEW_CLUSTERS = 200
+MAX_CLUSTERS = 20000
+BATCH_SIZE = 1024
+ITERATIONS = 100
+MEMORY_MB = 256
+
+
+def normalize(vectors: "np.ndarray") -> "np.ndarray":
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def assign(vectors: "np.ndarray", centroids: "np.ndarray",
+           memory_mb: float = MEMORY_MB) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    每個向量最相似的 centroid（兩者皆為單位向量）
+
+    Returns:
+        (centroid 索引, cosine 相似度)
+    """
+    chunk = max(1, int(memory_mb * 2 ** 20 // (4 * max(len(centroids), 1))))
+    labels = np.empty(len(vectors), dtype=np.int64)
+    sims = np.empty(len(vectors), dtype=np.float32)
+    for begin in range(0, len(vectors), chunk):
+        scores = vectors[begin:begin + chunk] @ centroids.T
+        labels[begin:begin + chunk] = scores.argmax(axis=1)
+        sims[begin:begin + chunk] = scores[np.arange(len(scores)), labels[begin:begin + chunk]]
+    return labels, sims
+
+
+def _init_centers(vectors: "np.ndarray", k: int, rng) -> "np.ndarray":
+    """k-means++ 初始化（以 cosine 距離抽樣）"""
+    centers = [vectors[rng.integers(len(vectors))]]
+    distance = 1 - vectors @ centers[0]
+    for _ in range(1, k):
+        weights = np.maximum(distance, 0) ** 2
+        total = weights.sum()
+        index = rng.choice(len(vectors), p=weights / total) if total > 0 else rng.integers(len(vectors))
+        centers.append(vectors[index])
+        distance = np.minimum(distance, 1 - vectors @ vectors[index])
+    return np.stack(centers)
+
+
+def minibatch_kmeans(vectors: "np.ndarray", k: int, batch_size: int = BATCH_SIZE,
+                     iterations: int = ITERATIONS, seed: int = 0) -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    Spherical mini-batch k-means
+
+    Args:
+        vectors: 單位向量
+        k: 群數（超過向量數時自動減少）
+
+    Returns:
+        (centroids, 各群被分配的樣本數)
+    """
+    rng = np.random.default_rng(seed)
+    k = min(k, len(vectors))
+    sample = vectors[rng.choice(len(vectors), size=min(len(vectors), max(20 * k, 2000)), replace=False)]
+    centers = _init_centers(sample, k, rng)
+    counts = np.zeros(k, dtype=np.float64)
+    for _ in range(iterations if len(vectors) > batch_size else max(10, iterations // 10)):
+        batch = vectors[rng.integers(len(vectors), size=min(batch_size, len(vectors)))]
+        labels = (batch @ centers.T).argmax(axis=1)
+        batch_counts = np.bincount(labels, minlength=k)
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, batch)
+        counts += batch_counts
+        moved = batch_counts > 0
+        rate = (batch_counts[moved] / counts[moved])[:, None]
+        centers[moved] = (1 - rate) * centers[moved] + rate * sums[moved] / batch_counts[moved, None]
+        centers = normalize(centers)
+    return centers, counts
+
+
+@dataclass
+class DayClusters:
+    """
+    一天的分群結果
+
+    Attributes:
+        cluster_ids: 每個向量的群 ID
+        similarities: 與所屬 centroid 的 cosine 相似度
+        representatives: 群 ID → 代表向量的索引
+        new_clusters: 當天新增的群數
+        evicted: 因超過 max_clusters 而移除的群數
+    """
+    cluster_ids: "np.ndarray"
+    similarities: "np.ndarray"
+    representatives: Dict[int, int]
+    new_clusters: int
+    evicted: int = 0
+
+
+class ClusterModel:
+    """
+    增量分群模型
+
+    Args:
+        dim: 向量維度
+    """
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.centroids = np.empty((0, dim), dtype=np.float32)
+        self.counts = np.empty(0, dtype=np.float64)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.next_id = 0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def load(cls, path: str) -> "ClusterModel":
+        with np.load(path) as data:
+            model = cls(int(data["centroids"].shape[1]))
+            model.centroids = data["centroids"].astype(np.float32)
+            model.counts = data["counts"].astype(np.float64)
+            model.ids = data["ids"].astype(np.int64)
+            model.next_id = int(data["next_id"])
+        return model
+
+    def save(self, path: str) -> None:
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, centroids=self.centroids, counts=self.counts, ids=self.ids, next_id=self.next_id)
+        os.replace(tmp_path, path)
+
+    def update(self, vectors: Sequence[Sequence[float]], threshold: float = THRESHOLD,
+               target_size: int = TARGET_SIZE, max_new: int = MAX_NEW_CLUSTERS,
+               max_clusters: int = MAX_CLUSTERS, memory_mb: float = MEMORY_MB,
+               seed: int = 0) -> DayClusters:
+        """
+        分群一天的向量並更新模型
+
+        群數超過 max_clusters 時移除累計數量最少的群（當天有成員的群一律保留）
+
+        Raises:
+            ValueError: 向量維度與模型不符
+        """
+        vectors = normalize(vectors)
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"向量維度 {vectors.shape[1]} 與分群模型的 {self.dim} 不符")
+        rows = np.full(len(vectors), -1, dtype=np.int64)
+
+        # 1. 歸入既有的群，centroid 往新成員移動
+        if len(self):
+            labels, sims = assign(vectors, self.centroids, memory_mb)
+            matched = sims >= threshold
+            rows[matched] = labels[matched]
+            batch_counts = np.bincount(labels[matched], minlength=len(self))
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, labels[matched], vectors[matched])
+            moved = batch_counts > 0
+            self.counts[moved] += batch_counts[moved]
+            rate = (batch_counts[moved] / self.counts[moved])[:, None]
+            self.centroids[moved] = normalize(
+                (1 - rate) * self.centroids[moved] + rate * sums[moved] / batch_counts[moved, None])
+
+        # 2. 其餘的向量分成新群
+        unmatched = np.flatnonzero(rows < 0)
+        new_clusters = 0
+        if len(unmatched):
+            k = min(max_new, max(1, math.ceil(len(unmatched) / target_size)))
+            centers, _ = minibatch_kmeans(vectors[unmatched], k, seed=seed)
+            labels, _ = assign(vectors[unmatched], centers, memory_mb)
+            used = np.unique(labels)
+            offset = len(self)
+            remap = np.full(len(centers), -1, dtype=np.int64)
+            remap[used] = offset + np.arange(len(used))
+            rows[unmatched] = remap[labels]
+            self.centroids = np.concatenate([self.centroids, centers[used]])
+            self.counts = np.concatenate([self.counts, np.bincount(labels, minlength=len(centers))[used]])
+            self.ids = np.concatenate([self.ids, self.next_id + np.arange(len(used))])
+            self.next_id += len(used)
+            new_clusters = len(used)
+
+        # 3. 超過上限時移除累計數量最少、當天沒有成員的群
+        evicted = 0
+        if len(self) > max_clusters:
+            today = np.zeros(len(self), dtype=bool)
+            today[rows] = True
+            priority = np.where(today, np.inf, self.counts)
+            keep = np.sort(np.argsort(-priority, kind="stable")[:max(max_clusters, int(today.sum()))])
+            evicted = len(self) - len(keep)
+            remap = np.full(len(self), -1, dtype=np.int64)
+            remap[keep] = np.arange(len(keep))
+            rows = remap[rows]
+            self.centroids, self.counts, self.ids = self.centroids[keep], self.counts[keep], self.ids[keep]
+
+        # 代表：每群中與 centroid 最相似的成員
+        similarities = np.einsum("ij,ij->i", vectors, self.centroids[rows])
+        order = np.lexsort((-similarities, rows))
+        first = order[np.concatenate(([True], rows[order][1:] != rows[order][:-1]))]
+        representatives = {int(self.ids[rows[index]]): int(index) for index in first}
+        return DayClusters(self.ids[rows], similarities, representatives, new_clusters, evicted)
+
+
+# ============ ETL 輸出 ============
+
+def cluster_items(items: List[Dict[str, Any]], model_path: str,
+                  pq: Optional[ProductQuantizer] = None, **options) -> Optional[DayClusters]:
+    """
+    分群 ETL 輸出的項目：寫入 cluster_id / cluster_representative 並儲存模型
+
+    Args:
+        items: ETL 輸出的項目（embedding 可為任一 embedding_codec 編碼）
+        model_path: 分群模型檔（不存在時建立）
+        pq: 項目以 pq 編碼時的 codebook
+        **options: ClusterModel.update 的參數
+
+    Returns:
+        DayClusters；沒有任何向量時為 None
+
+    Raises:
+        ValueError: 向量維度與模型不符
+    """
+    indexed = [(index, decode_embedding(item["embedding"], pq))
+               for index, item in enumerate(items) if item.get("embedding")]
+    if not indexed:
+        return None
+    vectors = np.stack([vector for _, vector in indexed])
+    model = ClusterModel.load(model_path) if os.path.exists(model_path) else ClusterModel(vectors.shape[1])
+    result = model.update(vectors, **options)
+    representatives = set(result.representatives.values())
+    for position, (index, _) in enumerate(indexed):
+        items[index]["cluster_id"] = int(result.cluster_ids[position])
+        items[index]["cluster_representative"] = position in representatives
+    model.save(model_path)
+    return result
+
+
+def report(items: Sequence[Dict[str, Any]], result: DayClusters, top: int = 5) -> str:
+    """分群摘要：群數與最大幾群的代表 prompt"""
+    clustered = [item for item in items if "cluster_id" in item]
+    sizes: Dict[int, int] = {}
+    for item in clustered:
+        sizes[item["cluster_id"]] = sizes.get(item["cluster_id"], 0) + 1
+    lines = [f"🧩 分群：{len(clustered)} 個 prompt → {len(sizes)} 群（新增 {result.new_clusters} 群"
+             + (f"，移除 {result.evicted} 個少用的群）" if result.evicted else "）")]
+    representative = {item["cluster_id"]: item for item in clustered if item.get("cluster_representative")}
+    for cluster_id, size in sorted(sizes.items(), key=lambda pair: -pair[1])[:top]:
+        text = (representative.get(cluster_id) or {}).get("original_prompt", "")
+        lines.append(f"  #{cluster_id:<5} {size:>4} 個｜{text[:60]}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="依日期順序分群 ETL 輸出（增量更新分群模型）")
+    parser.add_argument("inputs", nargs="+", help="twitterhot_prompts_*.json（可用萬用字元）")
+    parser.add_argument("--model", default="twitterhot_clusters.npz")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--target-size", type=int, default=TARGET_SIZE)
+    parser.add_argument("--max-clusters", type=int, default=MAX_CLUSTERS, help="模型保留的群數上限")
+    parser.add_argument("--pq-codebook", default=None)
+    parser.add_argument("--write", action="store_true", help="將 cluster_id 寫回 JSON 檔")
+    args = parser.parse_args()
+
+    pq = ProductQuantizer.load(args.pq_codebook) if args.pq_codebook else None
+    for path in sorted({path for pattern in args.inputs for path in glob.glob(pattern)}):
+        with open(path, "r", encoding="utf-8") as f:
+            items = json.load(f)
+        result = cluster_items(items, args.model, pq, threshold=args.threshold,
+                               target_size=args.target_size, max_clusters=args.max_clusters)
+        if result is None:
+            print(f"⚠️  {path}：沒有向量")
+            continue
+        print(f"📄 {path}")
+        print(report(items, result))
+        if args.write:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(items, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
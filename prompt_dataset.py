@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+"""
+處理後 prompt 的 Parquet 資料集：依日期分區，供跨日分析使用
+
+每天的 ETL 輸出是一個 JSON 檔，跨日分析必須讀取並解析所有檔案。
+這裡把每次執行的結果附加到 hive 分區的 Parquet 資料集：
+
+    prompt_dataset/
+        date=2026-10-19/part-20261019T083000-1a2b3c4d.parquet
+        date=2026-10-20/...
+
+欄位有明確型別：tags / api_tags 為 list<string>、author 為 struct、
+publish_date / processed_at 為 timestamp（UTC）、embedding 為 fixed_size_list<float32>
+（壓縮編碼的向量寫入前先解碼）。讀取時可只取需要的欄位（projection），
+日期條件直接略過不相關的分區，其他條件以 row group 統計值過濾（pushdown）。
+
+每次執行寫一個小檔，compact 把同一分區的小檔合併為一個（同 ID 保留最後處理者）。
+檔案先寫入 . 開頭的暫存檔再改名，讀取端不會看到寫到一半的檔案。
+
+需要 pyarrow（選用）：pip install pyarrow
+
+用法：
+    python prompt_dataset.py export twitterhot_prompts_*.json --root prompt_dataset
+    python prompt_dataset.py compact --root prompt_dataset
+    python prompt_dataset.py info --root prompt_dataset
+    python prompt_dataset.py query --root prompt_dataset --start 2026-10-01 --columns id tags
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import uuid
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+from embedding_codec import ProductQuantizer, decode_embedding
+from etl_scheduler import parse_time
+
+DEFAULT_ROOT = "prompt_dataset"
+DEFAULT_DIM = 768
+ROW_GROUP_SIZE = 10000
+
+_FILENAME_DATE_RE = re.compile(r"(\d{4})(\d{2})(\d{2})")
+
+
+def _arrow():
+    """載入 pyarrow（未安裝時拋出 ImportError 並提示安裝方式）"""
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("pyarrow 未安裝，無法使用 Parquet 匯出：pip install pyarrow") from e
+    return pa, pc, ds, pq
+
+
+# ============ Schema ============
+
+def prompt_schema(dim: int = DEFAULT_DIM):
+    pa = _arrow()[0]
+    return pa.schema([
+        ("id", pa.string()),
+        ("original_prompt", pa.string()),
+        ("translated_prompt_zh", pa.string()),
+        ("cleaned_prompt", pa.string()),
+        ("language", pa.string()),
+        ("tags", pa.list_(pa.string())),
+        ("api_tags", pa.list_(pa.string())),
+        ("author", pa.struct([("id", pa.string()), ("name", pa.string()), ("username", pa.string())])),
+        ("publish_date", pa.timestamp("s")),
+        ("processed_at", pa.timestamp("s")),
+        ("embedding", pa.list_(pa.float32(), dim)),
+    ])
+
+
+def _partitioning():
+    pa, _, ds, _ = _arrow()
+    return ds.partitioning(pa.schema([("date", pa.date32())]), flavor="hive")
+
+
+def _author(value: Any) -> Dict[str, Optional[str]]:
+    if isinstance(value, dict):
+        def pick(*keys):
+            for key in keys:
+                if value.get(key) not in (None, ""):
+                    return str(value[key])
+            return None
+        return {"id": pick("id", "rest_id", "id_str"), "name": pick("name"),
+                "username": pick("screen_name", "username", "handle")}
+    return {"id": None, "name": str(value) if value else None, "username": None}
+
+
+def _string_list(value: Any) -> List[str]:
+    if isinstance(value, (list, tuple)):
+        return [str(item) for item in value]
+    return [str(value)] if value else []
+
+
+def _utc_time(value: Any) -> Optional[datetime]:
+    """時間欄位一律存成 UTC（parse_time 回傳本機時間，沒有時區的值也視為本機時間）"""
+    parsed = parse_time(value)
+    return parsed.astimezone(timezone.utc).replace(tzinfo=None) if parsed else None
+
+
+def to_table(items: Sequence[Dict[str, Any]], dim: int = DEFAULT_DIM,
+             pq_codebook: Optional[ProductQuantizer] = None):
+    """
+    ETL 輸出的項目轉為 Arrow table
+
+    Raises:
+        ValueError: 向量維度與 dim 不符
+    """
+    pa = _arrow()[0]
+    embeddings = []
+    for item in items:
+        stored = item.get("embedding")
+        if not stored:
+            embeddings.append(None)
+            continue
+        vector = decode_embedding(stored, pq_codebook)
+        if len(vector) != dim:
+            raise ValueError(f"向量維度 {len(vector)} 與資料集的 {dim} 不符（ID: {item.get('id')}）")
+        embeddings.append(vector)
+    columns = {
+        "id": [str(item.get("id", "")) for item in items],
+        "original_prompt": [item.get("original_prompt") for item in items],
+        "translated_prompt_zh": [item.get("translated_prompt_zh") for item in items],
+        "cleaned_prompt": [item.get("cleaned_prompt") for item in items],
+        "language": [item.get("language") for item in items],
+        "tags": [_string_list(item.get("tags")) for item in items],
+        "api_tags": [_string_list(item.get("api_tags")) for item in items],
+        "author": [_author(item.get("author")) for item in items],
+        "publish_date": [_utc_time(item.get("publish_date")) for item in items],
+        "processed_at": [_utc_time(item.get("processed_at")) for item in items],
+        "embedding": embeddings,
+    }
+    return pa.table(columns, schema=prompt_schema(dim))
+
+
+# ============ 寫入 ============
+
+def _partition_dir(root: str, day: str) -> str:
+    return os.path.join(root, f"date={day}")
+
+
+def _part_path(directory: str, suffix: str = "") -> str:
+    stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+    name = f"part-{stamp}-{uuid.uuid4().hex[:8]}{'-' + suffix if suffix else ''}.parquet"
+    return os.path.join(directory, name)
+
+
+def _write_atomic(table, path: str) -> None:
+    pq = _arrow()[3]
+    tmp_path = os.path.join(os.path.dirname(path), "." + os.path.basename(path) + ".tmp")
+    pq.write_table(table, tmp_path, compression="zstd", row_group_size=ROW_GROUP_SIZE)
+    os.replace(tmp_path, path)
+
+
+def dataset_dim(root: str) -> Optional[int]:
+    """資料集已有檔案的向量維度（尚無檔案時為 None）"""
+    pq = _arrow()[3]
+    for path in glob.glob(os.path.join(root, "date=*", "*.parquet")):
+        return pq.read_schema(path).field("embedding").type.list_size
+    return None
+
+
+def append_run(items: Sequence[Dict[str, Any]], root: str, day: str, dim: int = DEFAULT_DIM,
+               pq_codebook: Optional[ProductQuantizer] = None) -> Optional[str]:
+    """
+    將一次執行的結果附加到資料集
+
+    Args:
+        items: ETL 輸出的項目
+        root: 資料集根目錄
+        day: 分區日期（YYYY-MM-DD）
+        dim: 向量維度
+        pq_codebook: 項目以 pq 編碼時的 codebook
+
+    Returns:
+        寫入的檔案路徑；沒有項目時為 None
+
+    Raises:
+        ValueError: 向量維度與資料集既有的不同
+    """
+    if not items:
+        return None
+    existing = dataset_dim(root)
+    if existing is not None and existing != dim:
+        raise ValueError(f"資料集向量為 {existing} 維，本次為 {dim} 維；請使用另一個 --parquet-dir")
+    table = to_table(items, dim, pq_codebook)
+    directory = _partition_dir(root, day)
+    os.makedirs(directory, exist_ok=True)
+    path = _part_path(directory)
+    _write_atomic(table, path)
+    return path
+
+
+def compact(root: str, min_files: int = 2) -> List[Dict[str, Any]]:
+    """
+    合併每個分區的小檔（同 ID 保留 processed_at 最新者）
+
+    新檔寫入完成後才刪除舊檔；中途中斷最多留下重複資料，下次 compact 會再去除。
+
+    Returns:
+        每個被合併分區的 {"partition", "files", "rows"}
+    """
+    pa, pc, _, pq = _arrow()
+    results = []
+    for directory in sorted(glob.glob(os.path.join(root, "date=*"))):
+        files = sorted(glob.glob(os.path.join(directory, "*.parquet")))
+        if len(files) < min_files:
+            continue
+        table = pa.concat_tables([pq.read_table(path) for path in files])
+        # 依處理時間排序後，每個 ID 取最後一筆
+        # （沒有處理時間的列視為最舊，不會蓋掉有時間的較新資料）
+        processed_at = pc.fill_null(table.column("processed_at"), pa.scalar(datetime.min, pa.timestamp("s")))
+        table = table.take(pc.sort_indices(processed_at))
+        last = {key: index for index, key in enumerate(table.column("id").to_pylist())}
+        table = table.take(pa.array(sorted(last.values()), type=pa.int64()))
+        _write_atomic(table, _part_path(directory, "compacted"))
+        for path in files:
+            os.remove(path)
+        results.append({"partition": os.path.basename(directory), "files": len(files), "rows": table.num_rows})
+    return results
+
+
+# ============ 讀取 ============
+
+def open_dataset(root: str):
+    ds = _arrow()[2]
+    return ds.dataset(root, format="parquet", partitioning=_partitioning())
+
+
+def _as_date(value) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+
+def read_prompts(root: str, columns: Optional[Sequence[str]] = None,
+                 start: Optional[Any] = None, end: Optional[Any] = None, where=None):
+    """
+    讀取資料集
+
+    Args:
+        root: 資料集根目錄
+        columns: 只讀取這些欄位（None 為全部，含分區欄位 date）
+        start / end: 日期範圍（含），以分區略過範圍外的檔案
+        where: 其他 pyarrow.dataset 條件，如 ds.field("language") == "en"
+
+    Returns:
+        pyarrow.Table
+    """
+    ds = _arrow()[2]
+    condition = where
+    for bound, op in ((start, "__ge__"), (end, "__le__")):
+        if bound is not None:
+            expr = getattr(ds.field("date"), op)(_as_date(bound))
+            condition = expr if condition is None else condition & expr
+    return open_dataset(root).to_table(columns=list(columns) if columns else None, filter=condition)
+
+
+def partition_info(root: str) -> List[Dict[str, Any]]:
+    """每個分區的檔案數與列數（只讀 Parquet metadata）"""
+    pq = _arrow()[3]
+    info = []
+    for directory in sorted(glob.glob(os.path.join(root, "date=*"))):
+        files = sorted(glob.glob(os.path.join(directory, "*.parquet")))
+        rows = sum(pq.ParquetFile(path).metadata.num_rows for path in files)
+        size = sum(os.path.getsize(path) for path in files)
+        info.append({"partition": os.path.basename(directory), "files": len(files), "rows": rows, "bytes": size})
+    return info
+
+
+# ============ CLI ============
+
+def day_from_filename(path: str) -> Optional[str]:
+    match = _FILENAME_DATE_RE.search(os.path.basename(path))
+    return f"{match.group(1)}-{match.group(2)}-{match.group(3)}" if match else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="處理後 prompt 的 Parquet 資料集")
+    parser.add_argument("--root", default=DEFAULT_ROOT, help=f"資料集根目錄（預設：{DEFAULT_ROOT}）")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    export = sub.add_parser("export", help="匯入既有的 twitterhot_prompts_YYYYMMDD.json")
+    export.add_argument("inputs", nargs="+", help="ETL 輸出的 JSON（可用萬用字元）")
+    export.add_argument("--dim", type=int, default=DEFAULT_DIM)
+    export.add_argument("--pq-codebook", default=None)
+
+    compact_parser = sub.add_parser("compact", help="合併每個分區的小檔")
+    compact_parser.add_argument("--min-files", type=int, default=2)
+
+    sub.add_parser("info", help="列出分區的檔案數與列數")
+
+    query = sub.add_parser("query", help="讀取資料集（輸出 JSON lines）")
+    query.add_argument("--start")
+    query.add_argument("--end")
+    query.add_argument("--columns", nargs="+")
+    query.add_argument("--language")
+    query.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    try:
+        _arrow()
+    except ImportError as e:
+        parser.error(str(e))
+
+    if args.command == "export":
+        pq_codebook = ProductQuantizer.load(args.pq_codebook) if args.pq_codebook else None
+        for path in sorted({path for pattern in args.inputs for path in glob.glob(pattern)}):
+            day = day_from_filename(path)
+            if not day:
+                print(f"⚠️  略過 {path}（檔名沒有日期）")
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                items = json.load(f)
+            written = append_run(items, args.root, day, args.dim, pq_codebook)
+            print(f"✅ {path} → {written or '（沒有項目）'}")
+    elif args.command == "compact":
+        results = compact(args.root, args.min_files)
+        for result in results:
+            print(f"🗜️  {result['partition']}：{result['files']} 個檔案 → 1（{result['rows']} 列）")
+        if not results:
+            print("沒有需要合併的分區")
+    elif args.command == "info":
+        for item in partition_info(args.root):
+            print(f"{item['partition']:<18} {item['files']:>4} 檔 {item['rows']:>8} 列 {item['bytes'] / 1024:>10.1f} KB")
+    else:
+        ds = _arrow()[2]
+        where = ds.field("language") == args.language if args.language else None
+        table = read_prompts(args.root, args.columns, args.start, args.end, where)
+        print(f"共 {table.num_rows} 列")
+        for row in table.slice(0, args.limit).to_pylist():
+            print(json.dumps(row, ensure_ascii=False, default=str))
+
+
+if __name__ == "__main__":
+    main()
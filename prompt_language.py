@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Prompt 語言分流：本機判斷語言，決定是否需要呼叫 Gemini 翻譯
+
+transform_prompt_with_gemini 每次都請模型翻譯成繁體中文並清理英文，
+但有些 prompt 原本就是繁體中文。這裡以字元範圍統計（整批一次以 numpy 計算）
+加上簡繁常用字表，把每個 prompt 分到三條路徑之一：
+
+- full：英文、簡體中文、日文等 → 完整轉換（翻譯 + 標籤 + 清理）
+- tags：已是繁體中文 → 只請模型提取標籤，翻譯與清理直接使用原文
+- none：繁體中文短句、幾乎沒有文字（emoji、網址、符號）→ 不呼叫模型
+
+簡繁判斷只看「兩者字形不同」的常用字（这/這、风/風…），
+兩邊都沒出現時（光、背景、少女…）視為繁體，原文即可直接使用。
+"""
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+from lazy_import import lazy_import
+
+# 第一次分流時才載入（twitterhot_etl --help 不需要 numpy）
+np = lazy_import("numpy")
+
+ROUTE_FULL = "full"
+ROUTE_TAGS = "tags"
+ROUTE_NONE = "none"
+ROUTES = (ROUTE_FULL, ROUTE_TAGS, ROUTE_NONE)
+
+# 字元分類（script_counts 的欄位順序）
+LATIN, HAN, KANA, HANGUL, OTHER = range(5)
+SCRIPT_NAMES = ("latin", "han", "kana", "hangul", "other")
+
+# 文字字元少於此數 → 沒有可翻譯的內容
+MIN_LETTERS = 4
+# 漢字佔文字字元的比例達到此值 → 視為中文 prompt
+CHINESE_SHARE = 0.6
+# 繁體中文的漢字數少於此值 → 短句，不呼叫模型
+SHORT_HAN = 16
+
+# 網址、@帳號、#hashtag 不算文字（不需翻譯）
+_URL_RE = re.compile(r"https?://\S+|www\.\S+|[@#]\w+")
+
+# (起, 迄, 分類)，迄為包含
+_RANGES = (
+    (0x41, 0x5A, LATIN), (0x61, 0x7A, LATIN), (0xC0, 0x24F, LATIN),
+    (0x3400, 0x4DBF, HAN), (0x4E00, 0x9FFF, HAN), (0xF900, 0xFAFF, HAN),
+    (0x3040, 0x30FF, KANA), (0x31F0, 0x31FF, KANA),
+    (0x1100, 0x11FF, HANGUL), (0xAC00, 0xD7AF, HANGUL),
+)
+
+# 簡繁字形不同的常用字（簡、繁成對），偏重 AI 繪圖 prompt 常見用字
+_PAIRS = (
+    "这這个個为為国國说說时時们們来來会會发發对對后後与與风風画畫图圖质質"
+    "镜鏡细細节節写寫实實颜顏电電动動灯燈脸臉战戰兽獸龙龍鸟鳥马馬鱼魚乐樂"
+    "处處变變开開关關门門间間问問题題样樣应應该該学學习習经經过過现現还還"
+    "进進运運远遠选選钟鐘银銀铁鐵饰飾装裝纹紋丝絲线線织織红紅绿綠蓝藍黄黃"
+    "满滿梦夢灵靈气氣云雲阳陽阴陰树樹叶葉汉漢东東丽麗轻輕单單视視觉覺广廣"
+    "场場体體头頭帅帥宝寶圣聖让讓没沒从從将將层層虚虛机機术術艺藝华華极極"
+    "级級烟煙雾霧鲜鮮张張农農剑劍猫貓狮獅"
+)
+SIMPLIFIED = [ord(ch) for ch in _PAIRS[0::2]]
+TRADITIONAL = [ord(ch) for ch in _PAIRS[1::2]]
+
+
+@dataclass
+class LanguageRoute:
+    """
+    單一 prompt 的分流結果
+
+    Attributes:
+        route: full / tags / none
+        language: en、zh-Hant、zh-Hans、ja、ko、other
+        reason: 分流原因（顯示用）
+    """
+    route: str
+    language: str
+    reason: str
+
+
+# ============ 統計 ============
+
+def _codepoints(texts: Sequence[str]):
+    """整批文字的 code point 陣列，以及每個 code point 所屬的 prompt 索引"""
+    lengths = np.array([len(text) for text in texts], dtype=np.int64)
+    codepoints = np.frombuffer("".join(texts).encode("utf-32-le"), dtype="<u4")
+    owner = np.repeat(np.arange(len(texts)), lengths)
+    return codepoints, owner
+
+
+def script_counts(texts: Sequence[str]) -> "np.ndarray":
+    """
+    每個 prompt 各分類的字元數
+
+    Returns:
+        shape 為 (len(texts), 5) 的陣列，欄位依 LATIN、HAN、KANA、HANGUL、OTHER
+    """
+    codepoints, owner = _codepoints(texts)
+    category = np.full(codepoints.shape, OTHER, dtype=np.int64)
+    for start, end, script in _RANGES:
+        category[(codepoints >= start) & (codepoints <= end)] = script
+    # 0xD7、0xF7（×、÷）落在 Latin-1 字母範圍內，但不是字母
+    category[(codepoints == 0xD7) | (codepoints == 0xF7)] = OTHER
+    flat = np.bincount(owner * len(SCRIPT_NAMES) + category,
+                       minlength=len(texts) * len(SCRIPT_NAMES))
+    return flat.reshape(len(texts), len(SCRIPT_NAMES))
+
+
+def variant_counts(texts: Sequence[str]) -> "np.ndarray":
+    """
+    每個 prompt 的簡體、繁體專用字數
+
+    Returns:
+        shape 為 (len(texts), 2) 的陣列，欄位依序為簡體、繁體
+    """
+    codepoints, owner = _codepoints(texts)
+    simplified = np.bincount(owner, weights=np.isin(codepoints, SIMPLIFIED), minlength=len(texts))
+    traditional = np.bincount(owner, weights=np.isin(codepoints, TRADITIONAL), minlength=len(texts))
+    return np.stack([simplified, traditional], axis=1).astype(np.int64)
+
+
+# ============ 分流 ============
+
+def route_prompts(texts: Sequence[str]) -> List[LanguageRoute]:
+    """
+    整批判斷 prompt 語言與處理路徑
+
+    Args:
+        texts: prompt 文字
+
+    Returns:
+        與 texts 對應的 LanguageRoute
+    """
+    texts = [_URL_RE.sub(" ", text or "") for text in texts]
+    if not texts:
+        return []
+    counts = script_counts(texts)
+    variants = variant_counts(texts)
+    letters = counts[:, :OTHER].sum(axis=1)
+
+    routes = []
+    for row, (simplified, traditional), total in zip(counts, variants, letters):
+        if total < MIN_LETTERS:
+            routes.append(LanguageRoute(ROUTE_NONE, "other", "幾乎沒有文字"))
+        elif row[KANA]:
+            routes.append(LanguageRoute(ROUTE_FULL, "ja", "日文"))
+        elif row[HANGUL] * 2 >= total:
+            routes.append(LanguageRoute(ROUTE_FULL, "ko", "韓文"))
+        elif row[HAN] < CHINESE_SHARE * total:
+            routes.append(LanguageRoute(ROUTE_FULL, "en", "英文"))
+        elif simplified > traditional:
+            routes.append(LanguageRoute(ROUTE_FULL, "zh-Hans", "簡體中文，需轉為繁體"))
+        elif row[HAN] < SHORT_HAN:
+            routes.append(LanguageRoute(ROUTE_NONE, "zh-Hant", "繁體中文短句"))
+        else:
+            routes.append(LanguageRoute(ROUTE_TAGS, "zh-Hant", "繁體中文"))
+    return routes
+
+
+def route_summary(routes: Sequence[LanguageRoute]) -> Dict[str, int]:
+    summary = {route: 0 for route in ROUTES}
+    for item in routes:
+        summary[item.route] += 1
+    return summary
+
+
+def report(routes: Sequence[LanguageRoute]) -> str:
+    """分流統計與省下的 API 呼叫數"""
+    summary = route_summary(routes)
+    avoided = summary[ROUTE_TAGS] + summary[ROUTE_NONE]
+    return (f"🈶 語言分流：完整轉換 {summary[ROUTE_FULL]}、僅標籤 {summary[ROUTE_TAGS]}、"
+            f"不呼叫模型 {summary[ROUTE_NONE]}（省下翻譯呼叫 {avoided} 次，"
+            f"其中 {summary[ROUTE_NONE]} 次完全不呼叫 Gemini）")
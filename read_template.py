@@ -2,29 +2,38 @@
 """
 讀取 Word 範本的完整內容
 """
-from docx import Document
 import os
 import sys
 
-sys.stdout.reconfigure(encoding='utf-8')
+from docx_extract import iter_blocks
 
-def read_full_content(file_path):
-    """讀取 Word 文件完整內容"""
-    doc = Document(file_path)
-    
+def read_full_content(file_path, blocks=None):
+    """
+    讀取 Word 文件完整內容
+
+    Args:
+        file_path: .docx 路徑
+        blocks: 已擷取的 iter_blocks() 結果，None 時讀取檔案
+    """
     print(f"\n{'='*80}")
     print(f"檔案: {os.path.basename(file_path)}")
     print(f"{'='*80}\n")
     
-    for para in doc.paragraphs:
-        if para.text.strip():
-            print(para.text)
+    for block in (iter_blocks(file_path) if blocks is None else blocks):
+        if block["type"] == "paragraph" and block["text"].strip():
+            print(block["text"])
     
     print("\n")
 
-# 只讀取第一個範本來比對內容風格
-template_path = "NSL-技術小組進度會議-20251210會議摘要.docx"
-if not os.path.exists(template_path):
-    print(f"檔案不存在: {template_path}")
-else:
-    read_full_content(template_path)
+def main():
+    sys.stdout.reconfigure(encoding='utf-8')
+
+    # 只讀取第一個範本來比對內容風格
+    template_path = "NSL-技術小組進度會議-20251210會議摘要.docx"
+    if not os.path.exists(template_path):
+        print(f"檔案不存在: {template_path}")
+    else:
+        read_full_content(template_path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+請求合併（single-flight）：相同的請求同時只執行一次，其他呼叫者共用結果
+
+tweet 列表中重複的 ID、共用同一段 qrt.text 的引用推文，會讓
+fetch_tweet_detail / transform_prompt_with_gemini / generate_embedding
+以相同參數被呼叫多次。SingleFlight 以請求內容為 key：
+
+- 同一個 key 正在執行 → 等待並共用該次結果（或例外）
+- remember=True 時，本次執行期間已成功的結果直接重用（None 視為失敗，不保存）
+
+每個階段一個 SingleFlight，report() 列出實際執行與合併的次數。
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    以 key 合併相同請求
+
+    Args:
+        name: 階段名稱（報告用）
+        remember: 保留成功的結果，之後相同 key 的呼叫直接回傳
+    """
+
+    def __init__(self, name: str, remember: bool = True):
+        self.name = name
+        self.remember = remember
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._results: Dict[Hashable, Any] = {}
+        self.requests = 0
+        self.executed = 0
+        self.coalesced = 0
+        self.reused = 0
+
+    def do(self, key: Hashable, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        執行 func(*args, **kwargs)；相同 key 已在執行或已有結果時共用
+
+        Raises:
+            func 拋出的例外（等待中的呼叫者收到同一個例外）
+        """
+        with self._lock:
+            self.requests += 1
+            if self.remember and key in self._results:
+                self.reused += 1
+                return self._results[key]
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if self.remember and call.error is None and call.result is not None:
+                    self._results[key] = call.result
+            call.done.set()
+        return call.result
+
+    def summary(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "executed": self.executed,
+                "coalesced": self.coalesced,
+                "reused": self.reused,
+            }
+
+    def report(self) -> str:
+        stats = self.summary()
+        saved = stats["coalesced"] + stats["reused"]
+        return (f"{self.name}：呼叫 {stats['requests']} 次，實際執行 {stats['executed']} 次"
+                f"（合併進行中 {stats['coalesced']}、重用結果 {stats['reused']}，省下 {saved} 次）")
+
+
+def report(flights: Iterable[SingleFlight]) -> str:
+    """多個階段的合併統計"""
+    lines = ["🔗 請求合併："]
+    lines.extend(f"  {flight.report()}" for flight in flights)
+    return "\n".join(lines)
@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+"""
+Prompt 標籤分析：標籤頻率、共現與趨勢（numpy 向量化）
+
+每個項目的 tags（Gemini）與 api_tags（flat_tags）整理成：
+
+- 標籤字彙表：正規化（小寫、去空白與 #）後依出現次數編號，ID 越小越常見
+- 項目 × 標籤的稀疏矩陣：以 (rows, cols) 兩個整數陣列表示，同一項目的重複標籤只算一次
+
+之後的統計都是整數陣列運算，不走訪 JSON dict：
+- daily_counts：每天每個標籤的項目數（np.bincount；標籤多時只取前 top 個）
+- window_counts：一段期間內每個標籤的項目數（長度為字彙表大小，不隨天數增加）
+- cooccurrence：前 N 個常見標籤的共現次數（XᵀX；有 scipy 時用稀疏矩陣，
+  否則依項目分段以 numpy 相乘，記憶體固定）
+- trending：最近 window 天相對於之前 baseline 天的標準化增幅（兩次 window_counts）
+
+資料來源為 prompt_dataset 的 Parquet 資料集（只讀 date / tags / api_tags 三欄，
+list 欄位以 Arrow compute 攤平）或 ETL 輸出的 JSON 檔。
+
+用法：
+    python tag_analytics.py --dataset prompt_dataset --top 20
+    python tag_analytics.py --json "twitterhot_prompts_*.json" --source api_tags --pair cyberpunk
+    python tag_analytics.py --dataset prompt_dataset --min-count 5 --max-vocab 50000
+"""
+import argparse
+import glob
+import json
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from scipy import sparse
+except ImportError:
+    sparse = None
+
+SOURCES = ("tags", "api_tags", "both")
+
+# 無 scipy 時共現矩陣每段處理的項目數
+COOC_CHUNK = 50000
+
+
+@dataclass
+class TagCorpus:
+    """
+    項目 × 標籤的稀疏表示
+
+    Attributes:
+        vocabulary: 標籤字串，索引即標籤 ID（依出現項目數由多到少）
+        rows: 每個 (項目, 標籤) 配對的項目索引（遞增）
+        cols: 每個配對的標籤 ID
+        item_day: 每個項目的日期索引（相對於 start）
+        start: 第一天
+        n_days: 天數（含沒有項目的日子）
+    """
+    vocabulary: np.ndarray
+    rows: np.ndarray
+    cols: np.ndarray
+    item_day: np.ndarray
+    start: np.datetime64
+    n_days: int
+
+    @property
+    def n_items(self) -> int:
+        return len(self.item_day)
+
+    @property
+    def n_tags(self) -> int:
+        return len(self.vocabulary)
+
+    def days(self) -> np.ndarray:
+        return self.start + np.arange(self.n_days)
+
+    def tag_id(self, tag: str) -> Optional[int]:
+        matches = np.flatnonzero(self.vocabulary == normalize_tags(np.array([tag]))[0])
+        return int(matches[0]) if len(matches) else None
+
+    def matrix(self):
+        """scipy.sparse CSR 矩陣（需要 scipy）"""
+        if sparse is None:
+            raise ImportError("scipy 未安裝：pip install scipy")
+        data = np.ones(len(self.rows), dtype=np.int32)
+        return sparse.csr_matrix((data, (self.rows, self.cols)), shape=(self.n_items, self.n_tags))
+
+
+# ============ 建立 ============
+
+def normalize_tags(tags: np.ndarray) -> np.ndarray:
+    """小寫、去除前後空白與開頭的 #"""
+    tags = np.char.strip(np.char.lower(tags.astype(str)))
+    return np.char.strip(np.char.lstrip(tags, "#"))
+
+
+def build_corpus(item_dates: np.ndarray, parents: np.ndarray, tags: np.ndarray,
+                 min_count: int = 1, max_vocab: Optional[int] = None) -> TagCorpus:
+    """
+    由攤平的標籤建立 TagCorpus
+
+    Args:
+        item_dates: 每個項目的日期（datetime64[D]）
+        parents: 每個標籤所屬的項目索引
+        tags: 標籤字串（與 parents 等長）
+        min_count: 出現項目數少於此值的標籤不列入字彙表
+        max_vocab: 字彙表大小上限（保留最常見者）
+    """
+    names, codes = np.unique(np.asarray(tags, dtype=str), return_inverse=True)
+    return build_corpus_encoded(item_dates, parents, codes, names, min_count, max_vocab)
+
+
+def build_corpus_encoded(item_dates: np.ndarray, parents: np.ndarray, codes: np.ndarray,
+                         names: np.ndarray, min_count: int = 1,
+                         max_vocab: Optional[int] = None) -> TagCorpus:
+    """
+    由已編碼的標籤建立 TagCorpus（Arrow dictionary_encode 的結果可直接使用）
+
+    Args:
+        codes: 每個標籤在 names 中的索引
+        names: 原始標籤字串（只有這些不重複的字串需要正規化）
+    """
+    item_dates = np.asarray(item_dates, dtype="datetime64[D]")
+    parents = np.asarray(parents, dtype=np.int64)
+    vocabulary, remap = np.unique(normalize_tags(np.asarray(names)), return_inverse=True)
+    ids = remap[np.asarray(codes, dtype=np.int64)]
+    keep = (vocabulary != "")[ids]
+    n_vocab = max(len(vocabulary), 1)
+
+    # 同一項目的重複標籤只算一次（parents 通常已排序，stable sort 近乎線性）
+    pairs = np.sort(parents[keep] * n_vocab + ids[keep], kind="stable")
+    pairs = pairs[np.concatenate(([True], pairs[1:] != pairs[:-1]))] if len(pairs) else pairs
+    rows, cols = pairs // n_vocab, pairs % n_vocab
+
+    # 依出現項目數重新編號（ID 0 為最常見），並套用 min_count / max_vocab
+    counts = np.bincount(cols, minlength=len(vocabulary))
+    order = np.argsort(-counts, kind="stable")
+    order = order[counts[order] >= min_count][:max_vocab]
+    new_id = np.full(len(vocabulary), -1, dtype=np.int64)
+    new_id[order] = np.arange(len(order))
+    cols = new_id[cols]
+    kept = cols >= 0
+
+    if len(item_dates):
+        start = item_dates.min()
+        item_day = (item_dates - start).astype(np.int64)
+        n_days = int(item_day.max()) + 1
+    else:
+        start, item_day, n_days = np.datetime64("today", "D"), np.empty(0, dtype=np.int64), 0
+    return TagCorpus(vocabulary[order], rows[kept], cols[kept].astype(np.int32), item_day, start, n_days)
+
+
+def load_dataset(root: str, source: str = "both", start=None, end=None,
+                 min_count: int = 1, max_vocab: Optional[int] = None) -> TagCorpus:
+    """從 Parquet 資料集載入（只讀取 date 與標籤欄位；min_count / max_vocab 見 build_corpus）"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    from prompt_dataset import read_prompts
+
+    columns = ["tags", "api_tags"] if source == "both" else [source]
+    table = read_prompts(root, columns=["date"] + columns, start=start, end=end)
+    parents, flat = [], []
+    for column in columns:
+        values = table.column(column)
+        parents.append(pc.list_parent_indices(values).to_numpy())
+        flat.extend(pc.list_flatten(values).chunks)
+    # 以 Arrow 的 hash 編碼取得不重複的標籤，只有字典本身轉為 Python 字串
+    encoded = pc.dictionary_encode(pa.chunked_array(flat, type=pa.string())).combine_chunks()
+    item_dates = table.column("date").to_numpy().astype("datetime64[D]")
+    return build_corpus_encoded(item_dates, np.concatenate(parents), encoded.indices.to_numpy(),
+                                np.array(encoded.dictionary.to_pylist(), dtype=str), min_count, max_vocab)
+
+
+def load_json(paths: Sequence[str], source: str = "both",
+              min_count: int = 1, max_vocab: Optional[int] = None) -> TagCorpus:
+    """從 ETL 輸出的 JSON 檔載入（日期取自檔名，沒有時取 processed_at）"""
+    from prompt_dataset import day_from_filename
+
+    columns = ["tags", "api_tags"] if source == "both" else [source]
+    item_dates, parents, tags = [], [], []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            items = json.load(f)
+        day = day_from_filename(path)
+        for item in items:
+            index = len(item_dates)
+            item_dates.append(day or str(item.get("processed_at", ""))[:10])
+            for column in columns:
+                values = item.get(column) or []
+                tags.extend(str(value) for value in values)
+                parents.extend([index] * len(values))
+    return build_corpus(np.array(item_dates, dtype="datetime64[D]"),
+                        np.array(parents, dtype=np.int64), np.array(tags, dtype=str), min_count, max_vocab)
+
+
+# ============ 統計 ============
+
+def tag_totals(corpus: TagCorpus) -> np.ndarray:
+    """每個標籤出現的項目數"""
+    return np.bincount(corpus.cols, minlength=corpus.n_tags)
+
+
+def items_per_day(corpus: TagCorpus) -> np.ndarray:
+    return np.bincount(corpus.item_day, minlength=corpus.n_days)
+
+
+def daily_counts(corpus: TagCorpus, top: Optional[int] = None) -> np.ndarray:
+    """
+    每天每個標籤的項目數
+
+    Args:
+        top: 只計算前 top 個標籤（None 為全部）
+
+    Returns:
+        shape 為 (n_days, 標籤數) 的陣列；長尾字彙表跨多年時非常大，整體統計請用 window_counts
+    """
+    n_tags = corpus.n_tags if top is None else min(top, corpus.n_tags)
+    mask = corpus.cols < n_tags
+    flat = corpus.item_day[corpus.rows[mask]] * n_tags + corpus.cols[mask]
+    return np.bincount(flat, minlength=corpus.n_days * n_tags).reshape(corpus.n_days, n_tags)
+
+
+def window_counts(corpus: TagCorpus, begin: int, end: int) -> np.ndarray:
+    """
+    日期索引 [begin, end) 期間每個標籤的項目數
+
+    Returns:
+        長度為 n_tags 的陣列
+    """
+    pair_day = corpus.item_day[corpus.rows]
+    in_window = (pair_day >= begin) & (pair_day < end)
+    return np.bincount(corpus.cols[in_window], minlength=corpus.n_tags)
+
+
+def cooccurrence(corpus: TagCorpus, top: int = 200) -> np.ndarray:
+    """
+    前 top 個標籤的共現次數（對角線為各標籤的項目數）
+
+    Returns:
+        shape 為 (top, top) 的對稱陣列
+    """
+    top = min(top, corpus.n_tags)
+    mask = corpus.cols < top
+    rows, cols = corpus.rows[mask], corpus.cols[mask]
+    if sparse is not None:
+        matrix = sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)),
+                                   shape=(corpus.n_items, top))
+        return (matrix.T @ matrix).toarray()
+
+    # rows 為遞增，依項目範圍分段，每段建立密集的 0/1 矩陣相乘
+    result = np.zeros((top, top), dtype=np.int64)
+    bounds = np.searchsorted(rows, np.arange(0, corpus.n_items + COOC_CHUNK, COOC_CHUNK))
+    for begin, end in zip(bounds[:-1], bounds[1:]):
+        if begin == end:
+            continue
+        chunk_rows = rows[begin:end] - rows[begin]
+        dense = np.zeros((int(chunk_rows[-1]) + 1, top), dtype=np.float32)
+        dense[chunk_rows, cols[begin:end]] = 1
+        result += (dense.T @ dense).astype(np.int64)
+    return result
+
+
+def top_pairs(cooc: np.ndarray, n_items: int, k: int = 20, min_count: int = 2) -> List[Tuple[int, int, int, float]]:
+    """
+    共現次數最多的標籤組合
+
+    Returns:
+        [(標籤 ID a, 標籤 ID b, 共現次數, lift)]；lift = P(a,b) / (P(a)P(b))
+    """
+    totals = np.diag(cooc).astype(np.float64)
+    upper_a, upper_b = np.triu_indices(len(cooc), k=1)
+    counts = cooc[upper_a, upper_b]
+    order = np.argsort(-counts, kind="stable")
+    order = order[counts[order] >= min_count][:k]
+    lift = counts[order] * n_items / np.maximum(totals[upper_a[order]] * totals[upper_b[order]], 1)
+    return [(int(a), int(b), int(c), float(l))
+            for a, b, c, l in zip(upper_a[order], upper_b[order], counts[order], lift)]
+
+
+def trending(corpus: TagCorpus, window: int = 7, baseline: int = 28, prior: float = 1.0) -> np.ndarray:
+    """
+    趨勢分數：最近 window 天的出現次數相對於 baseline 期間比例的標準化差
+
+        expected = (baseline 次數 + prior) / (baseline 項目數 + prior) × 最近項目數
+        score = (最近次數 − expected) / sqrt(expected)
+
+    只計算兩段期間的標籤總數（window_counts），不建立每天 × 標籤的矩陣。
+
+    Returns:
+        每個標籤的分數（越高越突然變熱門）
+    """
+    split = max(corpus.n_days - window, 0)
+    recent = window_counts(corpus, split, corpus.n_days)
+    base = window_counts(corpus, max(split - baseline, 0), split)
+    per_day = items_per_day(corpus)
+    n_recent = per_day[split:].sum()
+    n_base = per_day[max(split - baseline, 0):split].sum()
+    expected = (base + prior) / (n_base + prior) * n_recent
+    return (recent - expected) / np.sqrt(np.maximum(expected, 1e-9))
+
+
+# ============ CLI ============
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt 標籤分析")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--dataset", help="prompt_dataset 的 Parquet 資料集目錄")
+    source.add_argument("--json", nargs="+", help="ETL 輸出的 JSON（可用萬用字元）")
+    parser.add_argument("--source", choices=SOURCES, default="both", help="使用的標籤欄位")
+    parser.add_argument("--start")
+    parser.add_argument("--end")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--window", type=int, default=7, help="趨勢的近期天數")
+    parser.add_argument("--baseline", type=int, default=28, help="趨勢的比較天數")
+    parser.add_argument("--pair", help="列出與此標籤最常共現的標籤")
+    parser.add_argument("--min-count", type=int, default=1, help="出現項目數少於此值的標籤不列入統計")
+    parser.add_argument("--max-vocab", type=int, default=None, help="字彙表大小上限（保留最常見者）")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.dataset:
+        corpus = load_dataset(args.dataset, args.source, args.start, args.end, args.min_count, args.max_vocab)
+    else:
+        paths = sorted({path for pattern in args.json for path in glob.glob(pattern)})
+        corpus = load_json(paths, args.source, args.min_count, args.max_vocab)
+    loaded = time.perf_counter()
+    if not corpus.n_items:
+        parser.error("沒有任何項目")
+
+    totals = tag_totals(corpus)
+    scores = trending(corpus, args.window, args.baseline)
+    recent = window_counts(corpus, corpus.n_days - args.window, corpus.n_days)
+    cooc = cooccurrence(corpus, max(200, args.top))
+    done = time.perf_counter()
+
+    print(f"📊 {corpus.n_items} 個項目、{corpus.n_tags} 個標籤、{corpus.n_days} 天"
+          f"（{corpus.start} 起），載入 {loaded - started:.2f}s，統計 {done - loaded:.2f}s\n")
+    print(f"🏷️  最常見的 {args.top} 個標籤：")
+    for tag_id in range(min(args.top, corpus.n_tags)):
+        print(f"  {corpus.vocabulary[tag_id]:<24} {totals[tag_id]:>7}")
+
+    print(f"\n📈 趨勢（最近 {args.window} 天 vs 之前 {args.baseline} 天）：")
+    for tag_id in np.argsort(-scores)[:args.top]:
+        print(f"  {corpus.vocabulary[tag_id]:<24} {scores[tag_id]:>7.2f}（近期 {recent[tag_id]}）")
+
+    if args.pair:
+        tag_id = corpus.tag_id(args.pair)
+        if tag_id is None or tag_id >= len(cooc):
+            print(f"\n⚠️  {args.pair} 不在前 {len(cooc)} 個標籤中")
+        else:
+            print(f"\n🔗 與 {corpus.vocabulary[tag_id]} 共現：")
+            row = cooc[tag_id].copy()
+            row[tag_id] = 0
+            for other in np.argsort(-row)[:args.top]:
+                if row[other]:
+                    print(f"  {corpus.vocabulary[other]:<24} {row[other]:>7}")
+    else:
+        print("\n🔗 最常共現的組合：")
+        for a, b, count, lift in top_pairs(cooc, corpus.n_items, args.top):
+            print(f"  {corpus.vocabulary[a]} + {corpus.vocabulary[b]:<20} {count:>7}（lift {lift:.2f}）")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,31 +9,56 @@ import json
 import sys
 import time
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Any
-import requests
-import google.generativeai as genai
+from embedding_codec import CODECS, ProductQuantizer, encode_embedding
+from endpoint_guard import CircuitOpenError, Endpoint
+from endpoint_guard import report as endpoint_report
+from etl_scheduler import Budget, CarryOver, merge_items, prioritize
+from gemini_cache import ContextCache
+from pipeline_profile import add_profile_argument, profile_output_dir, profiled, stage
+from lazy_import import lazy_import
+from llm_json import TAGS_SCHEMA, TRANSFORM_SCHEMA, decode_response
+from prompt_clusters import cluster_items
+from prompt_clusters import report as cluster_report
+from prompt_dataset import append_run
+from prompt_language import ROUTE_FULL, ROUTE_TAGS, LanguageRoute, route_prompts
+from prompt_language import report as routing_report
+from single_flight import SingleFlight
+from single_flight import report as flight_report
+from twitterhot_harvest import harvest_details
+
+# 第一次使用時才載入（--help 不需要付出 SDK 的載入時間）
+requests = lazy_import("requests")
+genai = lazy_import("google.generativeai")
 
 
 # ============ 設定區 ============
 
 # Google Gemini API 金鑰
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "")
-if not GOOGLE_API_KEY:
-    print("⚠️  警告：未設定 GOOGLE_API_KEY 環境變數")
-    print("請執行：$env:GOOGLE_API_KEY='your_api_key_here'")
 
 # API 端點
 TWEET_LIST_API = "https://ttmouse.com/api/tweets"
 TWEET_DETAIL_API = "https://twitterhot.vercel.app/api/tweet_info"
+TWITTERHOT_PAGE = "https://twitterhot.vercel.app/"
 
 # API 模型配置
 GEMINI_MODEL = "gemini-1.5-flash"
 EMBEDDING_MODEL = "models/text-embedding-004"
+EMBEDDING_DIM = 768
 
 # 預設處理數量限制（節省 API 配額）
 DEFAULT_LIMIT = 10
 
+# 端點的 hedged request 與 circuit breaker（整個程序共用，跨多次 main 保留狀態）
+TWEET_LIST_ENDPOINT = Endpoint("tweets", hedge=False)
+TWEET_DETAIL_ENDPOINT = Endpoint("tweet_info")
+
+# 預算用盡時未處理項目的接續檔（下次執行時優先處理）
+CARRY_OVER_FILE = "twitterhot_carryover.json"
+
 # Retry 設定
 MAX_RETRIES = 3
 RETRY_DELAY = 2  # 秒
@@ -44,6 +69,8 @@ RETRY_DELAY = 2  # 秒
 def init_gemini_api():
     """初始化 Gemini API"""
     if not GOOGLE_API_KEY:
+        print("⚠️  警告：未設定 GOOGLE_API_KEY 環境變數")
+        print("請執行：$env:GOOGLE_API_KEY='your_api_key_here'")
         raise ValueError("❌ GOOGLE_API_KEY 未設定，無法初始化 Gemini API")
     genai.configure(api_key=GOOGLE_API_KEY)
     print("✅ Gemini API 初始化成功")
@@ -64,6 +91,25 @@ def retry_on_failure(func, *args, max_retries=MAX_RETRIES, **kwargs):
 
 # ============ API 爬取模組 ============
 
+def request_json(url: str) -> Optional[Any]:
+    """
+    GET 並解析 JSON
+
+    4xx（tweet 已刪除、受保護、參數錯誤）是單一請求的問題而非端點故障，
+    回傳 None 而不拋出例外，不計入 circuit breaker；
+    逾時、連線錯誤與 5xx 拋出例外，由 Endpoint 計為失敗。
+    """
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    }
+    response = requests.get(url, headers=headers, timeout=30)
+    if 400 <= response.status_code < 500:
+        print(f"⚠️  {url} 回應 {response.status_code}，略過")
+        return None
+    response.raise_for_status()
+    return response.json()
+
+
 def fetch_tweet_list(date_str: str = None) -> List[Dict[str, Any]]:
     """
     抓取 tweet 列表
@@ -81,18 +127,17 @@ def fetch_tweet_list(date_str: str = None) -> List[Dict[str, Any]]:
     print(f"🌐 正在抓取 tweet 列表：{url}")
     
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        data = response.json()
+        data = TWEET_LIST_ENDPOINT.call(request_json, url)
+        if data is None:
+            return []
         tweets = data if isinstance(data, list) else data.get("items", [])
         
         print(f"✅ 成功取得 {len(tweets)} 個 tweets")
         return tweets
         
+    except CircuitOpenError as e:
+        print(f"⛔ {e}")
+        return []
     except requests.RequestException as e:
         print(f"❌ API 請求失敗：{e}")
         return []
@@ -101,27 +146,30 @@ def fetch_tweet_list(date_str: str = None) -> List[Dict[str, Any]]:
         return []
 
 
+def request_tweet_detail(tweet_id: str) -> Optional[Dict[str, Any]]:
+    """呼叫 tweet_info（4xx 回傳 None；逾時、連線錯誤與 5xx 拋出例外，供 circuit breaker 計數）"""
+    return request_json(f"{TWEET_DETAIL_API}?id={tweet_id}")
+
+
 def fetch_tweet_detail(tweet_id: str) -> Optional[Dict[str, Any]]:
     """
     抓取單個 tweet 的詳細資訊
     
+    慢於最近 p95 延遲的請求會再送出一次（取先完成者）；
+    tweet_info 連續失敗時暫停呼叫，直接返回 None。
+    
     Args:
         tweet_id: Tweet ID
         
     Returns:
         Tweet 詳細資訊字典
     """
-    url = f"{TWEET_DETAIL_API}?id={tweet_id}"
-    
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-        }
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        return response.json()
+        return TWEET_DETAIL_ENDPOINT.call(request_tweet_detail, tweet_id)
         
+    except CircuitOpenError as e:
+        print(f"⛔ 略過 tweet 詳情 (ID: {tweet_id})：{e}")
+        return None
     except Exception as e:
         print(f"❌ 取得 tweet 詳情失敗 (ID: {tweet_id})：{e}")
         return None
@@ -173,6 +221,35 @@ def extract_prompt_from_tweet(tweet_detail: Dict[str, Any]) -> Optional[str]:
 
 # ============ Gemini API 轉換模組 ============
 
+# prompt 轉換的固定前綴；可用時以 context cache 只上傳一次（見 gemini_cache）
+TRANSFORM_PREAMBLE = """你是一位專業的 AI 藝術 prompt 分析專家。
+請分析以下 AI 藝術生成 prompt，並以 JSON 格式回傳：
+
+{
+  "translated_text_zh": "繁體中文翻譯（台灣用語風格）",
+  "tags": ["標籤1", "標籤2", "標籤3", "標籤4", "標籤5"],
+  "cleaned_text": "優化後的英文 prompt（移除冗餘詞、修正文法）"
+}
+
+**要求：**
+1. 翻譯必須符合台灣繁體中文習慣用語
+2. 提取 5 個最能代表此 prompt 風格的標籤（如 cyberpunk, watercolor, portrait 等）
+3. 清理後的英文應保持原意但更精簡專業
+4. **僅回傳 JSON，不要包含任何其他說明文字**
+
+"""
+
+_transform_cache: Optional[ContextCache] = None
+
+
+def get_transform_cache() -> ContextCache:
+    """prompt 轉換使用的 context cache（第一次使用時建立）"""
+    global _transform_cache
+    if _transform_cache is None:
+        _transform_cache = ContextCache(f"models/{GEMINI_MODEL}", label="Prompt 轉換")
+    return _transform_cache
+
+
 def transform_prompt_with_gemini(prompt_text: str) -> Optional[Dict[str, Any]]:
     """
     使用 Gemini API 進行 prompt 轉換：翻譯、標籤提取、清理
@@ -186,77 +263,137 @@ def transform_prompt_with_gemini(prompt_text: str) -> Optional[Dict[str, Any]]:
     try:
         model = genai.GenerativeModel(GEMINI_MODEL)
         
-        # 建立結構化 prompt
-        system_prompt = f"""你是一位專業的 AI 藝術 prompt 分析專家。
-請分析以下 AI 藝術生成 prompt，並以 JSON 格式回傳：
-
-{{
-  "translated_text_zh": "繁體中文翻譯（台灣用語風格）",
-  "tags": ["標籤1", "標籤2", "標籤3", "標籤4", "標籤5"],
-  "cleaned_text": "優化後的英文 prompt（移除冗餘詞、修正文法）"
-}}
-
-**要求：**
-1. 翻譯必須符合台灣繁體中文習慣用語
-2. 提取 5 個最能代表此 prompt 風格的標籤（如 cyberpunk, watercolor, portrait 等）
-3. 清理後的英文應保持原意但更精簡專業
-4. **僅回傳 JSON，不要包含任何其他說明文字**
-
-原始 Prompt：
+        # 建立結構化 prompt（固定前綴 + 本次的原始 prompt）
+        prompt_part = f"""原始 Prompt：
 {prompt_text}
 """
-        
-        response = model.generate_content(
-            system_prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.3,
-                candidate_count=1,
-            )
+        generation_config = genai.types.GenerationConfig(
+            temperature=0.3,
+            candidate_count=1,
         )
         
-        # 解析 JSON 回應
-        response_text = response.text.strip()
+        response = get_transform_cache().generate(
+            TRANSFORM_PREAMBLE,
+            prompt_part,
+            lambda: model.generate_content(
+                TRANSFORM_PREAMBLE + prompt_part,
+                generation_config=generation_config
+            ),
+            generation_config=generation_config,
+        )
         
-        # 移除可能的 markdown code block 標記
-        if response_text.startswith("```json"):
-            response_text = response_text[7:]
-        if response_text.startswith("```"):
-            response_text = response_text[3:]
-        if response_text.endswith("```"):
-            response_text = response_text[:-3]
+        # 解析 JSON 回應（fence / 逗號 / 截斷在本機修復，缺少的欄位才重新請求）
+        def refetch(request: str) -> str:
+            return model.generate_content(
+                TRANSFORM_PREAMBLE + prompt_part + "\n" + request,
+                generation_config=generation_config
+            ).text
         
-        result = json.loads(response_text.strip())
+        decoded = decode_response(response.text, TRANSFORM_SCHEMA, refetch=refetch)
+        if decoded.refetched:
+            print(f"🔁 重新請求欄位：{', '.join(decoded.refetched)}")
+        return decoded.data
         
-        # 驗證必要欄位
-        required_fields = ["translated_text_zh", "tags", "cleaned_text"]
-        if not all(field in result for field in required_fields):
-            raise ValueError(f"API 回應缺少必要欄位：{required_fields}")
+    except Exception as e:
+        print(f"❌ Gemini API 轉換失敗：{e}")
+        return None
+
+
+TAGS_PREAMBLE = """你是一位專業的 AI 藝術 prompt 分析專家。
+以下 prompt 已是繁體中文，不需要翻譯。請提取 5 個最能代表此 prompt 風格的標籤，
+以 JSON 格式回傳：
+
+{
+  "tags": ["標籤1", "標籤2", "標籤3", "標籤4", "標籤5"]
+}
+
+**僅回傳 JSON，不要包含任何其他說明文字**
+
+"""
+
+
+def tag_prompt_with_gemini(prompt_text: str) -> Optional[Dict[str, Any]]:
+    """
+    已是繁體中文的 prompt：只請 Gemini 提取標籤，翻譯與清理直接使用原文
+    
+    Args:
+        prompt_text: 原始 prompt 文字
         
-        return result
+    Returns:
+        與 transform_prompt_with_gemini 相同欄位的字典
+    """
+    try:
+        model = genai.GenerativeModel(GEMINI_MODEL)
+        prompt = TAGS_PREAMBLE + f"原始 Prompt：\n{prompt_text}\n"
+        generation_config = genai.types.GenerationConfig(
+            temperature=0.3,
+            candidate_count=1,
+        )
+        response = model.generate_content(prompt, generation_config=generation_config)
+        decoded = decode_response(
+            response.text, TAGS_SCHEMA,
+            refetch=lambda request: model.generate_content(
+                prompt + "\n" + request, generation_config=generation_config
+            ).text,
+        )
+        return local_transform(prompt_text, decoded.data["tags"])
         
     except Exception as e:
-        print(f"❌ Gemini API 轉換失敗：{e}")
+        print(f"❌ Gemini 標籤提取失敗：{e}")
         return None
 
 
-def generate_embedding(text: str) -> Optional[List[float]]:
+def local_transform(prompt_text: str, tags: List[str]) -> Dict[str, Any]:
+    """不需翻譯的 prompt：原文即為翻譯與清理結果"""
+    return {
+        "translated_text_zh": prompt_text,
+        "tags": list(tags)[:5],
+        "cleaned_text": prompt_text,
+    }
+
+
+def estimate_cost(route: str, prompt_text: str):
+    """
+    處理一個 prompt 的估計用量（模型請求數、token 數），含向量嵌入
+
+    Args:
+        route: prompt_language 的分流結果
+        prompt_text: 原始 prompt 文字
+    """
+    requests_needed, tokens = 1, Budget.estimate_tokens(prompt_text, output_tokens=0)
+    if route == ROUTE_FULL:
+        requests_needed += 1
+        tokens += Budget.estimate_tokens(TRANSFORM_PREAMBLE, prompt_text)
+    elif route == ROUTE_TAGS:
+        requests_needed += 1
+        tokens += Budget.estimate_tokens(TAGS_PREAMBLE, prompt_text, output_tokens=50)
+    return requests_needed, tokens
+
+
+def generate_embedding(text: str, dimensionality: Optional[int] = None) -> Optional[List[float]]:
     """
     使用 text-embedding-004 生成向量嵌入
     
     Args:
         text: 要嵌入的文字
+        dimensionality: 要求模型輸出的維度（output_dimensionality）；None 為完整 768 維
         
     Returns:
-        向量列表（768 維），失敗時返回 None
+        向量列表（預設 768 維），失敗時返回 None
     """
     try:
         result = genai.embed_content(
             model=EMBEDDING_MODEL,
             content=text,
-            task_type="retrieval_document"
+            task_type="retrieval_document",
+            output_dimensionality=dimensionality
         )
         
         embedding = result["embedding"]
+        if dimensionality:
+            # 截短後的向量不再是單位長度，重新正規化以便直接計算 cosine
+            norm = sum(x * x for x in embedding) ** 0.5 or 1.0
+            embedding = [x / norm for x in embedding]
         print(f"✅ 生成向量嵌入（{len(embedding)} 維）")
         return embedding
         
@@ -267,7 +404,81 @@ def generate_embedding(text: str) -> Optional[List[float]]:
 
 # ============ 主流程 ============
 
-def main(limit: int = DEFAULT_LIMIT, date_str: str = None, test_mode: str = None):
+def new_flights() -> Dict[str, SingleFlight]:
+    """各階段的請求合併（每次執行一組）"""
+    return {
+        "detail": SingleFlight("tweet_info"),
+        "transform": SingleFlight("Gemini 轉換"),
+        "embedding": SingleFlight("向量嵌入"),
+    }
+
+
+def process_prompt(tweet_meta: Dict[str, Any], prompt_text: str, route: LanguageRoute,
+                   flights: Dict[str, SingleFlight], embedding_dim: Optional[int] = None,
+                   embedding_codec: str = "float32",
+                   pq: Optional[ProductQuantizer] = None) -> Optional[Dict[str, Any]]:
+    """
+    轉換單一 prompt 並生成向量嵌入
+    
+    Args:
+        tweet_meta: tweet 列表 API 的項目
+        prompt_text: 提取到的 prompt 文字
+        route: prompt_language 的分流結果
+        flights: new_flights() 的請求合併
+        embedding_dim: 向量嵌入的維度（None 為模型預設）
+        embedding_codec: 向量的儲存編碼（見 embedding_codec）
+        pq: embedding_codec 為 pq 時的 codebook
+        
+    Returns:
+        輸出 JSON 的一筆資料，轉換失敗時返回 None
+    """
+    print(f"原文：{prompt_text[:80]}...")
+    
+    # 使用 Gemini 進行轉換（繁體中文只提取標籤或不呼叫）
+    if route.route == ROUTE_FULL:
+        transformed = flights["transform"].do(
+            (ROUTE_FULL, prompt_text), retry_on_failure, transform_prompt_with_gemini, prompt_text)
+    elif route.route == ROUTE_TAGS:
+        transformed = flights["transform"].do(
+            (ROUTE_TAGS, prompt_text), retry_on_failure, tag_prompt_with_gemini, prompt_text)
+    else:
+        transformed = local_transform(prompt_text, tweet_meta.get("flat_tags", []))
+    
+    if not transformed:
+        print(f"⚠️  跳過此 prompt（轉換失敗）")
+        return None
+    
+    # 生成向量嵌入
+    embedding = flights["embedding"].do(
+        (embedding_dim, prompt_text), retry_on_failure, generate_embedding, prompt_text, embedding_dim)
+    
+    # 組裝最終數據
+    processed_item = {
+        "id": tweet_meta["id"],
+        "original_prompt": prompt_text,
+        "language": route.language,
+        "translated_prompt_zh": transformed["translated_text_zh"],
+        "cleaned_prompt": transformed["cleaned_text"],
+        "tags": transformed["tags"],
+        "api_tags": tweet_meta.get("flat_tags", []),  # 來自 API 的標籤
+        "embedding": encode_embedding(embedding, embedding_codec, pq) if embedding else [],
+        "author": tweet_meta.get("author", {}),
+        "publish_date": tweet_meta.get("publish_date", ""),
+        "processed_at": datetime.now().isoformat()
+    }
+    print(f"✅ 處理完成：{transformed['translated_text_zh'][:50]}...")
+    
+    # 避免 API 速率限制
+    time.sleep(0.5)
+    return processed_item
+
+
+def main(limit: int = DEFAULT_LIMIT, date_str: str = None, test_mode: str = None,
+         harvest_page: bool = True, language_routing: bool = True,
+         max_requests: Optional[int] = None, max_tokens: Optional[int] = None,
+         carry_over: bool = True, workers: int = 1, embedding_dim: Optional[int] = None,
+         embedding_codec: str = "float32", pq_codebook: Optional[str] = None,
+         parquet_dir: Optional[str] = None, cluster_model: Optional[str] = None):
     """
     主 ETL 流程
     
@@ -275,6 +486,17 @@ def main(limit: int = DEFAULT_LIMIT, date_str: str = None, test_mode: str = None
         limit: 處理的 prompt 數量上限
         date_str: 目標日期 (YYYY-MM-DD)
         test_mode: 測試模式（"api" 或 None）
+        harvest_page: 先從頁面內嵌資料批次取得詳情（False 時全部逐筆呼叫 tweet_info）
+        language_routing: 依語言分流（繁體中文不翻譯）；False 時全部完整轉換
+        max_requests: 本次執行的模型請求數上限（None 表示不限）
+        max_tokens: 本次執行的估計 token 數上限（None 表示不限）
+        carry_over: 合併上次預算用盡時未處理的項目，並保存本次未處理的項目
+        workers: 並行處理的 tweet 數（詳情抓取與 Gemini 呼叫）
+        embedding_dim: 向量嵌入的維度（output_dimensionality，None 為 768）
+        embedding_codec: 向量的儲存編碼（float32 / float16 / int8 / pq）
+        pq_codebook: embedding_codec 為 pq 時的 codebook 檔（embedding_codec.py train-pq 產生）
+        parquet_dir: 同時附加到此 Parquet 資料集（依日期分區，見 prompt_dataset）
+        cluster_model: 以此分群模型檔分群當天的向量（增量更新，見 prompt_clusters）
     """
     print("=" * 60)
     print("🚀 TwitterHot AI Prompt ETL Pipeline")
@@ -303,93 +525,158 @@ def main(limit: int = DEFAULT_LIMIT, date_str: str = None, test_mode: str = None
         return
     
     # 完整 ETL 流程
+    pq = None
+    if embedding_codec == "pq":
+        if not pq_codebook or not os.path.exists(pq_codebook):
+            print("❌ ETL 中止：pq 編碼需要 --pq-codebook（以 embedding_codec.py train-pq 產生）")
+            return
+        pq = ProductQuantizer.load(pq_codebook)
+        if pq.dim != (embedding_dim or EMBEDDING_DIM):
+            print(f"❌ ETL 中止：codebook 為 {pq.dim} 維，與向量維度 {embedding_dim or EMBEDDING_DIM} 不符")
+            return
+    
     if not date_str:
         date_str = datetime.now().strftime("%Y-%m-%d")
     
     print(f"\n📊 開始處理（日期：{date_str}，限制：{limit} 個 prompts）")
     
     # Step 1: 抓取 tweet 列表
-    tweets = retry_on_failure(fetch_tweet_list, date_str)
+    with stage("fetch_list"):
+        tweets = retry_on_failure(fetch_tweet_list, date_str) or []
+    
+    # 合併上次未處理的項目，依互動數、標籤、作者、新鮮度排序
+    carry = CarryOver(os.path.join(os.path.dirname(__file__), CARRY_OVER_FILE))
+    carried = []
+    if carry_over:
+        carried = carry.load()
+        if carried:
+            print(f"📥 接續上次未處理的 {len(carried)} 個項目")
+        tweets = merge_items(tweets, carried)
     if not tweets:
         print("❌ ETL 中止：未找到任何 tweets")
         return
     
-    # 限制處理數量
-    tweets = tweets[:limit]
+    # 限制處理數量（優先分數最高者）；未選入的接續項目繼續保留到期限為止
+    ranked = prioritize(tweets)
+    tweets = ranked[:limit]
+    carried_ids = {str(meta["id"]) for meta in carried}
+    deferred = [meta for meta in ranked[limit:] if str(meta.get("id")) in carried_ids]
     
-    # Step 2: 處理每個 tweet
-    processed_data = []
-    for idx, tweet_meta in enumerate(tweets, 1):
-        tweet_id = tweet_meta.get("id")
-        if not tweet_id:
-            print(f"⚠️  跳過無效項目（缺少 ID）")
-            continue
-        
-        print(f"\n[{idx}/{len(tweets)}] 處理 Tweet ID: {tweet_id}")
-        
-        # 取得詳細資訊
-        tweet_detail = retry_on_failure(fetch_tweet_detail, tweet_id)
-        if not tweet_detail:
-            print(f"⚠️  跳過此 tweet（無法取得詳情）")
-            continue
-        
-        # 提取 prompt
-        prompt_text = extract_prompt_from_tweet(tweet_detail)
-        if not prompt_text:
-            print(f"⚠️  跳過此 tweet（未找到 prompt 文字）")
-            continue
-        
-        print(f"原文：{prompt_text[:80]}...")
-        
-        # 使用 Gemini 進行轉換
-        transformed = retry_on_failure(
-            transform_prompt_with_gemini,
-            prompt_text
-        )
-        
-        if not transformed:
-            print(f"⚠️  跳過此 prompt（轉換失敗）")
-            continue
-        
-        # 生成向量嵌入
-        embedding = retry_on_failure(
-            generate_embedding,
-            prompt_text
+    # 相同的 tweet ID / prompt 文字在本次執行中只請求一次
+    flights = new_flights()
+    
+    # 批次取得詳情：列表回應 → 頁面內嵌資料 → 缺少的才逐筆呼叫 tweet_info
+    with stage("harvest"):
+        harvest = harvest_details(
+            [tweet["id"] for tweet in tweets if tweet.get("id")],
+            tweet_list=tweets,
+            fetch_detail=lambda tweet_id: flights["detail"].do(
+                str(tweet_id), retry_on_failure, fetch_tweet_detail, tweet_id),
+            date_str=date_str,
+            page_url=TWITTERHOT_PAGE if harvest_page else None,
+            workers=workers,
         )
+    print(f"📦 詳情來源：列表 {harvest.from_list}、頁面 {harvest.from_page}、"
+          f"逐筆 {harvest.fetched}（詳情請求 {harvest.requests} 次）")
+    
+    # Step 2: 取得詳情並提取 prompt
+    candidates = []
+    with stage("extract"):
+        for idx, tweet_meta in enumerate(tweets, 1):
+            tweet_id = tweet_meta.get("id")
+            if not tweet_id:
+                print(f"⚠️  跳過無效項目（缺少 ID）")
+                continue
         
-        # 組裝最終數據
-        processed_item = {
-            "id": tweet_id,
-            "original_prompt": prompt_text,
-            "translated_prompt_zh": transformed["translated_text_zh"],
-            "cleaned_prompt": transformed["cleaned_text"],
-            "tags": transformed["tags"],
-            "api_tags": tweet_meta.get("flat_tags", []),  # 來自 API 的標籤
-            "embedding": embedding or [],
-            "author": tweet_meta.get("author", {}),
-            "publish_date": tweet_meta.get("publish_date", ""),
-            "processed_at": datetime.now().isoformat()
-        }
+            # 取得詳細資訊
+            tweet_detail = harvest.details.get(str(tweet_id))
+            if not tweet_detail:
+                print(f"⚠️  跳過 Tweet ID {tweet_id}（無法取得詳情）")
+                continue
         
-        processed_data.append(processed_item)
-        print(f"✅ 處理完成：{transformed['translated_text_zh'][:50]}...")
+            # 提取 prompt
+            prompt_text = extract_prompt_from_tweet(tweet_detail)
+            if not prompt_text:
+                print(f"⚠️  跳過 Tweet ID {tweet_id}（未找到 prompt 文字）")
+                continue
         
-        # 避免 API 速率限制
-        time.sleep(0.5)
+            candidates.append((idx, tweet_meta, prompt_text))
     
-    # Step 3: 輸出 JSON
+    # 整批判斷語言，決定每個 prompt 需要哪種 Gemini 呼叫
+    with stage("route"):
+        routes = route_prompts([prompt_text for _, _, prompt_text in candidates])
+    if not language_routing:
+        for route in routes:
+            route.route = ROUTE_FULL
+    
+    # Step 3: 依優先順序選取預算內的 prompt
+    budget = Budget(max_requests=max_requests, max_tokens=max_tokens)
+    selected = []
+    unprocessed = []
+    for position, (candidate, route) in enumerate(zip(candidates, routes)):
+        cost = estimate_cost(route.route, candidate[2])
+        if not budget.can_afford(*cost):
+            unprocessed = [meta for _, meta, _ in candidates[position:]]
+            print(f"\n💰 預算用盡，停止處理（剩餘 {len(unprocessed)} 個項目留待下次執行）")
+            break
+        budget.charge(*cost)
+        selected.append((candidate, route))
+    
+    # Step 4: 處理選取的 prompt（workers > 1 時並行，相同請求合併為一次）
+    def process(job):
+        (idx, tweet_meta, prompt_text), route = job
+        print(f"\n[{idx}/{len(tweets)}] 處理 Tweet ID: {tweet_meta['id']}（{route.language}，{route.route}）")
+        return process_prompt(tweet_meta, prompt_text, route, flights,
+                              embedding_dim=embedding_dim, embedding_codec=embedding_codec, pq=pq)
+    
+    with stage("process"), ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        processed_data = [item for item in pool.map(process, selected) if item]
+    
+    # Step 4.5: 分群（歸入既有的群，其餘分成新群）
+    clusters = None
+    if cluster_model:
+        try:
+            with stage("cluster"):
+                clusters = cluster_items(processed_data, cluster_model, pq)
+        except ValueError as e:
+            print(f"⚠️  分群略過：{e}")
+    
+    # Step 5: 輸出 JSON
     output_filename = f"twitterhot_prompts_{date_str.replace('-', '')}.json"
     output_path = os.path.join(
         os.path.dirname(__file__),
         output_filename
     )
     
-    with open(output_path, "w", encoding="utf-8") as f:
+    with stage("write_json"), open(output_path, "w", encoding="utf-8") as f:
         json.dump(processed_data, f, ensure_ascii=False, indent=2)
     
     print("\n" + "=" * 60)
     print(f"✅ ETL 完成！處理了 {len(processed_data)}/{len(tweets)} 個 prompts")
     print(f"📁 輸出檔案：{output_path}")
+    if parquet_dir:
+        try:
+            with stage("parquet"):
+                written = append_run(processed_data, parquet_dir, date_str,
+                                     dim=embedding_dim or EMBEDDING_DIM, pq_codebook=pq)
+            if written:
+                print(f"🗃️  Parquet：{written}")
+        except (ImportError, ValueError) as e:
+            print(f"⚠️  Parquet 匯出失敗：{e}")
+    if carry_over:
+        unprocessed += deferred
+        carry.save(unprocessed)
+        if unprocessed:
+            print(f"📤 {len(unprocessed)} 個未處理項目已寫入 {carry.path}")
+    if clusters is not None:
+        print(cluster_report(processed_data, clusters))
+    print(budget.report())
+    print(flight_report(flights.values()))
+    print(endpoint_report([TWEET_LIST_ENDPOINT, TWEET_DETAIL_ENDPOINT]))
+    if language_routing:
+        print(routing_report(routes))
+    if _transform_cache is not None:
+        print(_transform_cache.report())
     print("=" * 60)
 
 
@@ -416,10 +703,87 @@ if __name__ == "__main__":
         action="store_true",
         help="僅測試 Gemini API 連線"
     )
+    parser.add_argument(
+        "--no-page-harvest",
+        action="store_true",
+        help="不從頁面內嵌資料批次取得詳情，全部逐筆呼叫 tweet_info"
+    )
+    
+    parser.add_argument(
+        "--no-language-routing",
+        action="store_true",
+        help="不依語言分流，所有 prompt 都呼叫 Gemini 完整轉換"
+    )
+    
+    parser.add_argument(
+        "--max-requests",
+        type=int,
+        default=None,
+        help="本次執行的模型請求數上限（生成 + 向量嵌入），用盡時未處理項目留待下次"
+    )
+    parser.add_argument(
+        "--max-tokens",
+        type=int,
+        default=None,
+        help="本次執行的估計 token 數上限"
+    )
+    parser.add_argument(
+        "--no-carry-over",
+        action="store_true",
+        help="不合併、不保存預算用盡時未處理的項目"
+    )
+    
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="並行處理的 tweet 數（預設：1）"
+    )
+    
+    parser.add_argument(
+        "--embedding-dim",
+        type=int,
+        default=None,
+        help="向量嵌入維度（output_dimensionality，如 256；預設 768）"
+    )
+    parser.add_argument(
+        "--embedding-codec",
+        choices=CODECS,
+        default="float32",
+        help="向量的儲存編碼（預設 float32：JSON 浮點數陣列）"
+    )
+    parser.add_argument(
+        "--pq-codebook",
+        type=str,
+        default=None,
+        help="--embedding-codec pq 使用的 codebook（python embedding_codec.py train-pq 產生）"
+    )
+    
+    parser.add_argument(
+        "--parquet-dir",
+        type=str,
+        default=None,
+        help="同時附加到依日期分區的 Parquet 資料集（需要 pyarrow）"
+    )
+    parser.add_argument(
+        "--cluster-model",
+        type=str,
+        default=None,
+        help="分群當天的 prompt 並增量更新此分群模型（如 twitterhot_clusters.npz），輸出加上 cluster_id"
+    )
+    add_profile_argument(parser)
     
     args = parser.parse_args()
     
     # 決定測試模式
     test_mode = "api" if args.test_api else None
     
-    main(limit=args.limit, date_str=args.date, test_mode=test_mode)
+    with profiled("twitterhot_etl", profile_output_dir(args)):
+        main(limit=args.limit, date_str=args.date, test_mode=test_mode,
+             harvest_page=not args.no_page_harvest,
+             language_routing=not args.no_language_routing,
+             max_requests=args.max_requests, max_tokens=args.max_tokens,
+             carry_over=not args.no_carry_over, workers=args.workers,
+             embedding_dim=args.embedding_dim, embedding_codec=args.embedding_codec,
+             pq_codebook=args.pq_codebook, parquet_dir=args.parquet_dir,
+             cluster_model=args.cluster_model)
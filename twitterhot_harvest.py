@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+TwitterHot 批次擷取：一次請求取得整天的 tweet 詳情，缺少的才逐筆補抓
+
+原本每個 tweet 各呼叫一次 TWEET_DETAIL_API（N+1 次請求）。這裡依序使用：
+1. tweet 列表 API 的回應本身（已經取得，不需額外請求）
+2. twitterhot 頁面內嵌的資料：<script type="application/json">、__NEXT_DATA__、
+   window.X = {...} / JSON.parse('...') 形式的 inline script（一次請求，lxml 解析）
+3. 以上都找不到的 ID 才逐筆呼叫 fetch_detail
+
+與 tweet_info 回應相容的判斷：物件具有 id（id / tweetID / tweet_id / id_str），
+並同時含有 text 與 media_extended（prompt 最常出現在 media altText，
+只有 text 的摘要資料不能取代詳情）。
+"""
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from lazy_import import lazy_import
+
+requests = lazy_import("requests")
+
+PAGE_URL = "https://twitterhot.vercel.app/"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+ID_KEYS = ("id", "tweetID", "tweet_id", "id_str")
+DETAIL_KEYS = ("text", "media_extended")
+
+# inline script 中的 JSON 起點：window.X = {...}、var X = [...]、JSON.parse('...')
+_ASSIGNMENT_RE = re.compile(r"(?:=|\()\s*(?=[\[{'\"])")
+_JSON_PARSE_RE = re.compile(r"JSON\.parse\(\s*(['\"])(.*?)(?<!\\)\1\s*\)", re.DOTALL)
+
+
+@dataclass
+class HarvestResult:
+    details: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    from_list: int = 0
+    from_page: int = 0
+    fetched: int = 0
+    missing: List[str] = field(default_factory=list)
+    requests: int = 0
+
+
+# ============ 解析 ============
+
+def tweet_id_of(record: Dict[str, Any]) -> Optional[str]:
+    for key in ID_KEYS:
+        value = record.get(key)
+        if isinstance(value, (str, int)) and not isinstance(value, bool) and str(value).strip():
+            return str(value).strip()
+    return None
+
+
+def iter_tweet_records(data: Any) -> Iterator[Dict[str, Any]]:
+    """遞迴找出所有與 tweet_info 回應格式相容的物件"""
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if tweet_id_of(node) and all(key in node for key in DETAIL_KEYS):
+                yield node
+            stack.extend(value for value in node.values() if isinstance(value, (dict, list)))
+        elif isinstance(node, list):
+            stack.extend(value for value in node if isinstance(value, (dict, list)))
+
+
+def _js_string(quote: str, body: str) -> str:
+    """JavaScript 字串常值的內容轉為 Python 字串"""
+    if quote == "'":
+        # 單引號字串：\' 還原為 '，未跳脫的 " 補上跳脫，才能以 JSON 字串解碼
+        body = re.sub(r'\\.|"', lambda m: '\\"' if m.group(0) == '"' else
+                      ("'" if m.group(0) == "\\'" else m.group(0)), body)
+    return json.loads(f'"{body}"')
+
+
+def _decode_inline(script: str) -> Iterator[Any]:
+    """從 inline JavaScript 中取出 JSON 值"""
+    decoder = json.JSONDecoder()
+    for match in _JSON_PARSE_RE.finditer(script):
+        try:
+            yield json.loads(_js_string(match.group(1), match.group(2)))
+        except ValueError:
+            continue
+    for match in _ASSIGNMENT_RE.finditer(script):
+        start = match.end()
+        if script[start] in "'\"":
+            continue  # 字串常值由 JSON.parse 處理
+        try:
+            value, _ = decoder.raw_decode(script, start)
+        except ValueError:
+            continue
+        if isinstance(value, (dict, list)):
+            yield value
+
+
+def extract_payloads(html: str) -> List[Any]:
+    """頁面內所有 script 中可解析的 JSON 資料"""
+    from lxml import html as lxml_html
+
+    root = lxml_html.fromstring(html)
+    payloads = []
+    for script in root.iter("script"):
+        if script.get("src"):
+            continue
+        text = script.text or ""
+        if not text.strip():
+            continue
+        script_type = (script.get("type") or "").lower()
+        if "json" in script_type or script.get("id") == "__NEXT_DATA__":
+            try:
+                payloads.append(json.loads(text))
+            except ValueError:
+                continue
+        else:
+            payloads.extend(_decode_inline(text))
+    return payloads
+
+
+def details_from_payloads(payloads: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+    details: Dict[str, Dict[str, Any]] = {}
+    for payload in payloads:
+        for record in iter_tweet_records(payload):
+            tweet_id = tweet_id_of(record)
+            # 同一個 tweet 出現多次時保留欄位較完整的一筆
+            if tweet_id not in details or len(record) > len(details[tweet_id]):
+                details[tweet_id] = record
+    return details
+
+
+# ============ 擷取 ============
+
+def fetch_page(url: str = PAGE_URL, date_str: Optional[str] = None, timeout: float = 30) -> str:
+    params = {"date": date_str} if date_str else None
+    response = requests.get(url, params=params, headers={"User-Agent": USER_AGENT}, timeout=timeout)
+    response.raise_for_status()
+    return response.text
+
+
+def harvest_details(tweet_ids: List[str], tweet_list: Optional[List[Dict[str, Any]]] = None,
+                    fetch_detail: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None,
+                    date_str: Optional[str] = None, page_url: Optional[str] = PAGE_URL,
+                    workers: int = 1) -> HarvestResult:
+    """
+    取得所有 tweet 的詳情
+
+    Args:
+        tweet_ids: 需要詳情的 tweet ID
+        tweet_list: 已取得的 tweet 列表回應（先從這裡找）
+        fetch_detail: 逐筆補抓函式（如 twitterhot_etl.fetch_tweet_detail）；None 表示不補抓
+        date_str: 目標日期（傳給頁面）
+        page_url: 頁面網址；None 表示不抓頁面
+        workers: 逐筆補抓的並行數
+
+    Returns:
+        HarvestResult（details 以 tweet ID 為 key）
+    """
+    # 重複的 ID 只取一次（請求次數也只算一次）
+    wanted = list(dict.fromkeys(str(tweet_id) for tweet_id in tweet_ids))
+    result = HarvestResult()
+
+    if tweet_list:
+        found = details_from_payloads([tweet_list])
+        for tweet_id in wanted:
+            if tweet_id in found:
+                result.details[tweet_id] = found[tweet_id]
+                result.from_list += 1
+
+    remaining = [tweet_id for tweet_id in wanted if tweet_id not in result.details]
+    if remaining and page_url:
+        try:
+            result.requests += 1
+            found = details_from_payloads(extract_payloads(fetch_page(page_url, date_str)))
+        except Exception as e:
+            print(f"⚠️  頁面內嵌資料擷取失敗，改為逐筆抓取：{e}")
+            found = {}
+        for tweet_id in remaining:
+            if tweet_id in found:
+                result.details[tweet_id] = found[tweet_id]
+                result.from_page += 1
+
+    remaining = [tweet_id for tweet_id in wanted if tweet_id not in result.details]
+    if fetch_detail is not None and remaining:
+        result.requests += len(remaining)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            fetched = list(pool.map(fetch_detail, remaining))
+    else:
+        fetched = [None] * len(remaining)
+    for tweet_id, detail in zip(remaining, fetched):
+        if detail:
+            result.details[tweet_id] = detail
+            result.fetched += 1
+        else:
+            result.missing.append(tweet_id)
+    return result